@@ -1,11 +1,18 @@
 import streamlit as st
-import pandas as pd
 
-@st.cache_data
-def load_data():
-    return pd.read_csv("data/home_data.csv")
+from churn.bulk import current_job, start_job
+from churn.cache import get_aggregate_cube, get_customer_store, get_filter_index, get_name_index, get_report_store, get_shap_table
+from churn.listing import window, window_frame
+from churn.metrics import span
 
-df = load_data()
+MAX_SEARCH_RESULTS = 500
+
+with span("data"):
+    store = get_customer_store()
+    df = store.df
+    filter_index = get_filter_index()
+    cube = get_aggregate_cube()
+    name_index = get_name_index()
 col1, col2 = st.columns([5,1])
 with col1:
     st.title("🏠 Risk Tracking Home")
@@ -15,11 +22,11 @@ st.divider()
 
 
 # Dropdowns for filtering
-regions = ["All"] + sorted(df["region"].dropna().unique().tolist())
-subs_types = ["All"] + sorted(df["subscription_type"].dropna().unique().tolist())
-plan_types = ["All"] + sorted(df["plan_type"].dropna().unique().tolist())
-status_types = ["All"] + sorted(df["subscription_status"].dropna().unique().tolist())
-risk_types = ["All"] + df["churn_risk"].dropna().unique().tolist()
+regions = ["All"] + filter_index.options("region")
+subs_types = ["All"] + filter_index.options("subscription_type")
+plan_types = ["All"] + filter_index.options("plan_type")
+status_types = ["All"] + filter_index.options("subscription_status")
+risk_types = ["All"] + filter_index.options("churn_risk", sort=False)
 
 st.markdown("#### 🔍 Filters:")
 colf1, colf2, colf3= st.columns(3)
@@ -40,23 +47,16 @@ with colf6:
 
 st.divider()
 
-@st.cache_data
-def get_filtered_data(df, region_filter, sub_filter, plan_filter, status_filter, risk_filter):
-    filtered = df.copy()
-    if region_filter != "All":
-        filtered = filtered[filtered["region"] == region_filter]
-    if sub_filter != "All":
-        filtered = filtered[filtered["subscription_type"] == sub_filter]
-    if plan_filter != "All":
-        filtered = filtered[filtered["plan_type"] == plan_filter]
-    if status_filter != "All":
-        filtered = filtered[filtered["subscription_status"] == status_filter]
-    if risk_filter != "All":
-        filtered = filtered[filtered["churn_risk"] == risk_filter]     
-    return filtered
-
-
-filtered = get_filtered_data(df, region_filter, sub_filter, plan_filter, status_filter, risk_filter)
+selection = {
+    "region": region_filter,
+    "subscription_type": sub_filter,
+    "plan_type": plan_filter,
+    "subscription_status": status_filter,
+    "churn_risk": risk_filter,
+}
+# Row positions of the filtered customers; rows are only materialized for what gets rendered
+with span("filter"):
+    filtered_positions = filter_index.positions(selection)
 
 
 col1, col2, col3 = st.columns(3)
@@ -64,9 +64,8 @@ with col1:
     # Expanders for overview and subscription status
     with st.container(border=True):
         st.markdown("#### 📊 Customer Overview")
-        total_customers = 1000
-        filtered_customers = len(filtered)
-        filtered_pct = (filtered_customers / total_customers) * 100
+        total_customers = cube.total()
+        filtered_customers = cube.total(selection)
         colm1, colm2= st.columns(2)
         with colm1:
             st.metric(label="👥 Total Customers", value=total_customers)
@@ -77,13 +76,11 @@ with col1:
 with col2:
     with st.container(border=True):
         st.markdown("#### 📈 Membership Distribution")
-        status_counts = filtered["subscription_status"].value_counts()
-        total = len(filtered)
+        status_counts = cube.breakdown("subscription_status", selection)
+        total = filtered_customers
         if total > 0:
             active = status_counts.get("Active", 0)
             cancelled = status_counts.get("Cancelled", 0)
-            active_pct = (active / total) * 100
-            cancelled_pct = (cancelled / total) * 100
             colm1, colm2 = st.columns(2)
             with colm1:
                 st.metric(label="✅ Active", value=active)
@@ -94,8 +91,8 @@ with col2:
 with col3:
     with st.container(border=True):
         st.markdown("#### 🔥 Churn Risk Metrics")
-        churn_counts = filtered['churn_risk'].value_counts()
-        total = len(filtered)
+        churn_counts = cube.breakdown("churn_risk", selection)
+        total = filtered_customers
         high = churn_counts.get('High', 0)
         medium = churn_counts.get('Medium', 0)
         low = churn_counts.get('Low', 0)
@@ -111,12 +108,34 @@ with col3:
             st.metric(label="🟢 Low Risk", value=low_pct)
 
 
+# Pre-generate LLM reports for the whole filtered segment in the background
+@st.fragment(run_every=2)
+def bulk_report_progress():
+    job = current_job()
+    if job is None:
+        return
+    st.progress(job.processed / job.total if job.total else 1.0)
+    status = "Generating" if job.running else "Finished"
+    st.caption(f"{status}: {job.done} generated, {job.skipped} already up to date, {job.failed} failed of {job.total} customers")
+
+
+with st.expander("📝 Bulk Churn Reports"):
+    job = current_job()
+    running = job is not None and job.running
+    if st.button(f"Generate reports for the {len(filtered_positions)} filtered customers",
+                 disabled=running or len(filtered_positions) == 0, key="bulk_reports"):
+        start_job(df.iloc[filtered_positions], store=get_report_store(), shap_table=get_shap_table())
+    bulk_report_progress()
 
 # Customers per page dropdown
 if 'per_page' not in st.session_state:
     st.session_state['per_page'] = 20
+if 'cursor' not in st.session_state:
+    st.session_state['cursor'] = 0
+if 'list_view' not in st.session_state:
+    st.session_state['list_view'] = "Table"
 
-col1, col2 = st.columns([7,1])
+col1, col2, col3 = st.columns([6,1,1])
 with col1:
     search_id = st.text_input("🔍 Search by Name", "", key="full_name")
 with col2:
@@ -128,77 +147,119 @@ with col2:
     )
     if per_page != st.session_state['per_page']:
         st.session_state['per_page'] = per_page
-        st.session_state['page'] = 1
+        st.session_state['cursor'] = 0
         st.rerun()
+with col3:
+    list_view = st.selectbox("View", ["Table", "Cards"], key="list_view")
 
-# Filter by search
+# Filter by search (ranked, within the current filters)
 if search_id.strip():
-    search_str = search_id.strip().lower()
-    filtered_page = filtered[
-        filtered['first_name'].str.lower().str.contains(search_str, na=False) |
-        filtered['last_name'].str.lower().str.contains(search_str, na=False) |
-        filtered['full_name'].str.lower().str.contains(search_str, na=False)
-    ]
-    show_pagination = False
+    with span("search"):
+        visible_positions, num_matches = name_index.search(search_id, within=filtered_positions, limit=MAX_SEARCH_RESULTS)
+    if num_matches > len(visible_positions):
+        st.caption(f"Showing the best {len(visible_positions)} of {num_matches} matches. Refine the search to narrow them down.")
 else:
-    # Pagination setup
-    CUSTOMERS_PER_PAGE = st.session_state['per_page']
-    num_customers = len(filtered)
-    num_pages = (num_customers - 1) // CUSTOMERS_PER_PAGE + 1 if num_customers > 0 else 1
-    # Initialize page in session state
-    if 'page' not in st.session_state:
-        st.session_state['page'] = 1
-    page = st.session_state['page']
-    start_idx = (page - 1) * CUSTOMERS_PER_PAGE
-    end_idx = start_idx + CUSTOMERS_PER_PAGE
-    filtered_page = filtered.iloc[start_idx:end_idx]
-    show_pagination = True
-
-# Show customer info in containers with clickable button
-for idx, row in filtered_page.iterrows():
-    with st.container(border=True):
-        st.markdown(f"##### 🗂️ Customer ID: {row['customer_id']}")
-        col1, col2, col3, col4 = st.columns([0.75,1,1,0.5])
-        with col1:
-            if row['gender'] == "Male" or row['gender'] == "Other":
-                st.image("assets/man.jpg",width=150)
-            else:
-                st.image("assets/woman.jpg",width=150)
-        with col2:
-            st.markdown(f"###### **🧑 Name:** {row['first_name']} {row['last_name']}")
-            st.markdown(f"###### **🆔 Contact:** {row['Phone']}")
-            st.markdown(f"###### **✉️ Email:** {row['email']}")
-        with col3:
-            st.markdown(f"###### **🎂 Age:** {row['customer_age']}")
-            st.markdown(f"###### **🚻 Gender:** {row['gender']}")
-        with col4:
-            if row['subscription_status'] == "Active":
-                st.badge("Active Member", icon=":material/check:", color="green")
-            else:
-                st.badge("Cancelled Member", icon=":material/close:", color="red")            
-            info_button = st.button(label="View Info", type="primary", key=row['customer_id'], use_container_width=True)    
-            if info_button:
-                st.session_state['selected_customer_id'] = row['customer_id']
-                st.switch_page("2.info.py")
-                st.rerun()
-
-# Pagination controls (only show if not searching)
-if show_pagination:
-    st.markdown("---")
-    col_prev, col_page, col_next = st.columns(3)
-    with col_prev:
-        if page > 1:
-            if st.button("⬅️ Previous", key="prev_page"):
-                st.session_state['page'] = page - 1
-                st.rerun()
-        else:
-            st.button("⬅️ Previous", key="prev_page_disabled", disabled=True)
-    with col_page:
-        st.markdown(f"### {page}")
-    with col_next:
-        if page < num_pages:
-            if st.button("Next ➡️", key="next_page"):
-                st.session_state['page'] = page + 1
-                st.rerun()
-        else:
-            st.button("Next ➡️", key="next_page_disabled", disabled=True)
+    visible_positions = filtered_positions
+
+# Start from the top whenever the filters or the search change
+list_key = (tuple(selection.values()), search_id.strip())
+if st.session_state.get('list_key') != list_key:
+    st.session_state['list_key'] = list_key
+    st.session_state['cursor'] = 0
+
+# Only the window under the cursor is materialized
+CUSTOMERS_PER_PAGE = st.session_state['per_page']
+page_positions, cursor = window(visible_positions, st.session_state['cursor'], CUSTOMERS_PER_PAGE)
+st.session_state['cursor'] = cursor
+num_customers = len(visible_positions)
+with span("list"):
+    filtered_page = window_frame(df, page_positions)
+
+
+def open_profile(customer_id):
+    st.session_state['selected_customer_id'] = customer_id
+    st.switch_page("2.info.py")
+
+
+def render_table(page):
+    event = st.dataframe(
+        page,
+        key=f"customer_table_{cursor}",
+        on_select="rerun",
+        selection_mode="single-row",
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "customer_id": "Customer ID",
+            "full_name": "Name",
+            "customer_age": "Age",
+            "gender": "Gender",
+            "region": "Region",
+            "subscription_type": "Subscription",
+            "plan_type": "Plan",
+            "subscription_status": "Status",
+            "churn_risk": "Churn Risk",
+            "churn_score": st.column_config.ProgressColumn("Churn Score", format="%.2f", min_value=0, max_value=1),
+            "email": "Email",
+            "Phone": "Contact",
+        },
+    )
+    st.caption("Select a row to open the customer's profile.")
+    if event.selection.rows:
+        open_profile(page.iloc[event.selection.rows[0]]['customer_id'])
+
+
+def render_cards(page):
+    # Show customer info in containers with clickable button
+    for idx, row in page.iterrows():
+        with st.container(border=True):
+            st.markdown(f"##### 🗂️ Customer ID: {row['customer_id']}")
+            col1, col2, col3, col4 = st.columns([0.75,1,1,0.5])
+            with col1:
+                if row['gender'] == "Male" or row['gender'] == "Other":
+                    st.image("assets/man.jpg",width=150)
+                else:
+                    st.image("assets/woman.jpg",width=150)
+            with col2:
+                st.markdown(f"###### **🧑 Name:** {row['full_name']}")
+                st.markdown(f"###### **🆔 Contact:** {row['Phone']}")
+                st.markdown(f"###### **✉️ Email:** {row['email']}")
+            with col3:
+                st.markdown(f"###### **🎂 Age:** {row['customer_age']}")
+                st.markdown(f"###### **🚻 Gender:** {row['gender']}")
+            with col4:
+                if row['subscription_status'] == "Active":
+                    st.badge("Active Member", icon=":material/check:", color="green")
+                else:
+                    st.badge("Cancelled Member", icon=":material/close:", color="red")
+                if st.button(label="View Info", type="primary", key=row['customer_id'], use_container_width=True):
+                    open_profile(row['customer_id'])
+
+
+with span("render"):
+    if list_view == "Table":
+        render_table(filtered_page)
+    else:
+        render_cards(filtered_page)
+
+# Pagination controls
+st.markdown("---")
+col_prev, col_page, col_next = st.columns(3)
+with col_prev:
+    if cursor > 0:
+        if st.button("⬅️ Previous", key="prev_page"):
+            st.session_state['cursor'] = cursor - CUSTOMERS_PER_PAGE
+            st.rerun()
+    else:
+        st.button("⬅️ Previous", key="prev_page_disabled", disabled=True)
+with col_page:
+    st.markdown(f"### {cursor // CUSTOMERS_PER_PAGE + 1}")
+    if num_customers:
+        st.caption(f"Customers {cursor + 1}–{cursor + len(page_positions)} of {num_customers}")
+with col_next:
+    if cursor + CUSTOMERS_PER_PAGE < num_customers:
+        if st.button("Next ➡️", key="next_page"):
+            st.session_state['cursor'] = cursor + CUSTOMERS_PER_PAGE
+            st.rerun()
+    else:
+        st.button("Next ➡️", key="next_page_disabled", disabled=True)
@@ -1,110 +1,29 @@
 import streamlit as st
 import pandas as pd
-import pickle
 import numpy as np
-import shap
 import plotly.graph_objects as go
 import matplotlib.pyplot as plt
 import plotly.express as px
 
-from langchain.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
-from langchain_core.output_parsers import StrOutputParser
+from churn import figures
+from churn.cache import get_customer_store, get_interventions, get_report_store, get_shap_table
+from churn.counterfactual import MAX_CHANGES
+from churn.explain import customer_shap_values
+from churn.features import MODEL_FEATURES, encoder
+from churn.metrics import span
+from churn.models import DEFAULT_MODEL, get_model
+from churn.report import report_builder
+from churn.report_store import content_key
 
-import os
 
-
-NVIDIA_API_KEY = os.getenv("NVIDIA_API_KEY")
-
-
-llm = ChatOpenAI(
-    openai_api_base="https://integrate.api.nvidia.com/v1",
-    openai_api_key=NVIDIA_API_KEY,
-    model="qwen/qwen3-235b-a22b"
-)
-
-def prompt(feature_shap_importance: dict ,proba: int, customer_row): 
-    system_message = f"""
-                YOU ARE AN MACHINE LEARNING MODEL EXPLAINABILITY EXPERT
-                Here are the details for a  is assisting:
-                    - Dictioary of feature_name, shap_impact and feature_importance for xgboost machine learning model: {feature_shap_importance}
-                    - Models Predicted Churn Probability: {proba}
-                    - Customer Row: {customer_row}
-                Based on this information, explain to the agent in non-technical terms:
-                    1. Provide summary of who the customer is from user context features.
-                    2. Identify the top 3 reasons for the customers potential churn. Provide a brief explanation of why these
-                    features significantly influence the churn prediction. 
-                    3. Suggest the top 3 actions the agent can take to reduce the likelihood of churn, based on the feature impacts. Each suggestion should include:
-                        - An explanation of why this action is expected to impact churn, based solely on the data provided.
-                Remember :
-                    - The magnitude of a SHAP value indicates the strength of a feature's influence on the prediction.
-                    - Positive SHAP values increase the likelihood of churn; negative values decrease it.
-                    - Feature Importances values adds up to 1, greater the value higher the feature is important in prediction.
-                    - Recommendations should be strictly based on the information provided in the SHAP contributions and customer features.
-                
-                Dont include any technical details like shap scores, probability, feature importance in report, only provide business context.    
-                Keep the report short and concise in 2-3 paragraphs (max 150 words in total).
-                Do not include any other text in the report.
-                Make sure the response is in markdown format with proper use only H3, H4, H5 and emojis.
-            """
-    return system_message
-
-def escape_curly_braces(s):
-    return s.replace("{", "{{").replace("}", "}}")
-
-parser = StrOutputParser()
-
-
-
-
-
-@st.cache_data
-def load_data():
-    return pd.read_csv("data/home_data.csv")
-
-df = load_data()
+with span("data"):
+    store = get_customer_store()
+    shap_table = get_shap_table()
 
 
 # --- ML Model Functions (from playground) ---
 def load_xgb_model():
-    with open('model/model_2.pkl', 'rb') as f:
-        model = pickle.load(f)
-    return model
-
-def preprocess(user_input):
-    df = pd.DataFrame([user_input])
-    df['subscription_type'] = df['subscription_type'].map({'Espresso': 0, 'Digital': 1, 'Digital+Print': 2})
-    df['plan_type'] = df['plan_type'].map({'Monthly': 0, 'Annual': 1})
-    df['auto_renew'] = df['auto_renew'].map({'Yes': 1, 'No': 0})
-    df['discount_used_last_renewal'] = df['discount_used_last_renewal'].map({'Yes': 1, 'No': 0})
-    df['downgrade_history'] = df['downgrade_history'].map({'Yes': 1, 'No': 0})
-    df['previous_renewal_status'] = df['previous_renewal_status'].map({'Auto': 1, 'Manual': 0})
-    df['signup_source'] = df['signup_source'].map({'Web': 0, 'Mobile App': 0, 'Referral': 1})
-    df = pd.get_dummies(df, columns=['region', 'most_read_category', 'primary_device', 'payment_method', 'last_campaign_engaged'])
-    df = df.fillna(0)
-
-    MODEL_FEATURES = ['subscription_type', 'plan_type', 'auto_renew',
-        'avg_articles_per_week', 'days_since_last_login',
-        'support_tickets_last_90d', 'discount_used_last_renewal',
-        'email_open_rate', 'time_spent_per_session_mins',
-        'completion_rate', 'article_skips_per_week',
-        'previous_renewal_status', 'campaign_ctr', 'nps_score',
-        'sentiment_score', 'csat_score', 'customer_age', 'signup_source',
-        'downgrade_history', 'tenure_days', 'region_Asia', 'region_Europe',
-        'region_North America', 'region_Others', 'most_read_Culture',
-        'most_read_Environment', 'most_read_Finance', 'most_read_Politics',
-        'most_read_Technology', 'primary_device_Desktop',
-        'primary_device_Mobile', 'primary_device_Tablet',
-        'payment_method_Credit Card', 'payment_method_Debit Card',
-        'payment_method_PayPal', 'last_campaign_engaged_Newsletter Promo',
-        'last_campaign_engaged_Retention Offer',
-        'last_campaign_engaged_Survey']
-
-
-    for col in MODEL_FEATURES:
-        if col not in df.columns:
-            df[col] = 0
-    return df[MODEL_FEATURES]
+    return get_model(DEFAULT_MODEL)
 
 
 
@@ -116,11 +35,14 @@ if 'selected_customer_id' not in st.session_state:
     st.write("No customer selected.")
 else:
     customer_id = st.session_state['selected_customer_id']
-    customer_row = df[df['customer_id'] == customer_id]
+    with span("lookup"):
+        customer_row = store.get_frame(customer_id)
     if customer_row.empty:
         st.write("Customer not found.")
     else:
         customer = customer_row.iloc[0]
+        # Stored as float32; round so metrics show e.g. 3.93 rather than 3.930000066757202
+        customer = customer.map(lambda v: round(float(v), 4) if isinstance(v, np.floating) else v)
         col1, col2 = st.columns([5,1])
         with col1:
             st.title(f"🪪 Customer Profile for {customer['customer_id']}")
@@ -131,54 +53,16 @@ else:
      # --- ML Prediction ---
         st.markdown("## 🤖 Churn Prediction for Customer")
 
-        # Prepare input dict for preprocess
+        # Scores are precomputed by the batch scoring stage; only SHAP needs the encoded row
         input_dict = customer.to_dict()
-        # Ensure correct string values for categorical fields
-        input_dict['auto_renew'] = str(input_dict['auto_renew'])
-        input_dict['discount_used_last_renewal'] = str(input_dict['discount_used_last_renewal'])
-        input_dict['downgrade_history'] = str(input_dict['downgrade_history'])
-        input_dict['previous_renewal_status'] = str(input_dict['previous_renewal_status'])
-        input_dict['subscription_type'] = str(input_dict['subscription_type'])
-        input_dict['plan_type'] = str(input_dict['plan_type'])
-        input_dict['signup_source'] = str(input_dict['signup_source'])
-        input_dict['region'] = str(input_dict['region'])
-        input_dict['most_read_category'] = str(input_dict['most_read_category'])
-        input_dict['primary_device'] = str(input_dict['primary_device'])
-        input_dict['payment_method'] = str(input_dict['payment_method'])
-        input_dict['last_campaign_engaged'] = str(input_dict['last_campaign_engaged'])
-
-        # Preprocess and predict
-        X = preprocess(input_dict)
-        model = load_xgb_model()
-        prediction = model.predict(X)[0]
-        proba = model.predict_proba(X)[0][1]
-
-
-
-        feature_importances = model.feature_importances_
-        
-        explainer = shap.TreeExplainer(model)
-        shap_values = explainer(X)
-        row = shap_values[0]
-        shap_impact = row.values
-        features = row.feature_names 
-
-        feature_shap_importance = {
-            feature: {
-                'shap_impact': float(shap),
-                'feature_importance': float(importance)
-            }
-            for feature, shap, importance in zip(features, shap_impact, feature_importances)
-        }
-
-        escaped_feature_shap_importance = escape_curly_braces(str(feature_shap_importance))
-        prompt_template = prompt(escaped_feature_shap_importance, proba, customer_row)
-        prompt = ChatPromptTemplate.from_messages([
-                    ("system", prompt_template),
-                    ("human", "")
-                ])
-        
+        proba = customer['churn_score']
+        X = encoder.encode(customer_row)
+        with span("model"):
+            model = load_xgb_model()
 
+        with span("shap"):
+            shap_impact = customer_shap_values(customer_id, X, shap_table)
+        features = MODEL_FEATURES
 
         col1, col2 = st.columns(2)
 
@@ -198,15 +82,54 @@ else:
         with col2:             
             st.info(f"🧠 Model Score: **{input_dict['churn_score'] * 100:.2f}%** for Churn")
 
+        # Smallest sets of actionable changes that the model scores below Medium risk,
+        # searched only on request (or for a new report) and cached per customer
+        def interventions():
+            with span("counterfactual"):
+                return get_interventions(input_dict, X)
+
+        with st.expander("🧪 Retention Interventions Tested Against the Model"):
+            if input_dict['churn_risk'] == "Churned":
+                st.write("The customer has already churned; there is no subscription left to retain.")
+            elif st.toggle("Search for interventions", key="find_interventions"):
+                counterfactuals = interventions()
+                if counterfactuals.proba < counterfactuals.threshold:
+                    st.write("The model already scores this customer below the Medium risk threshold.")
+                elif counterfactuals.interventions:
+                    st.dataframe(
+                        pd.DataFrame([{
+                            "changes": intervention.describe(),
+                            "size": intervention.size,
+                            "proba": intervention.proba,
+                        } for intervention in counterfactuals.interventions]),
+                        hide_index=True,
+                        use_container_width=True,
+                        column_config={
+                            "changes": "Changes",
+                            "size": "Changes Needed",
+                            "proba": st.column_config.ProgressColumn("Churn Probability After", format="%.2f", min_value=0, max_value=1),
+                        },
+                    )
+                else:
+                    best = counterfactuals.best
+                    st.write(f"No combination of up to {MAX_CHANGES} actionable changes brings the churn probability "
+                             f"below {counterfactuals.threshold:.0%}. The closest is **{best.describe()}** at {best.proba:.0%}.")
+                st.caption(f"Evaluated {counterfactuals.evaluated} candidate change sets in {counterfactuals.seconds * 1e3:.0f} ms.")
+            else:
+                st.caption(f"Tests up to {MAX_CHANGES} actionable changes against the model.")
+
         if report_button:
             col1, col2 = st.columns(2)
-            with col1:        
-                with st.spinner("Generating Report..."):
-                    with st.container(border=True):
-                        chain = prompt | llm | parser
-
-                        result = chain.invoke({"feature_shap_importance": escaped_feature_shap_importance, "proba": proba})
-                        st.markdown(f"{result}")    
+            with col1:
+                with st.container(border=True), span("llm"):
+                    stored_report = get_report_store().get(customer_id, content_key(X, shap_impact))
+                    if stored_report is not None:
+                        st.markdown(stored_report)
+                        st.caption("Pre-generated by the bulk report job.")
+                    else:
+                        # The LLM client and prompt are only built here, when a report is requested
+                        st.write_stream(report_builder.stream(input_dict, shap_impact, model.feature_importances_, proba,
+                                                         interventions=interventions()))
             with col2: 
             # SHAP GRAPH
                 with st.container(border=True):
@@ -231,7 +154,8 @@ else:
                         yaxis_title="Feature",
                         waterfallgap=0.4
                     )
-                    st.plotly_chart(fig_waterfall, use_container_width=True)
+                    with span("plot"):
+                        st.plotly_chart(fig_waterfall, use_container_width=True)
 
         st.divider()
 
@@ -351,7 +275,8 @@ else:
                 articles = np.random.randint(1, 10, size=8)
                 fig_content = px.bar(x=weeks, y=articles, labels={'x': 'Week', 'y': 'Articles Read'},
                                     color_discrete_sequence=['#1f77b4'])  # Blue bars
-                st.plotly_chart(fig_content, use_container_width=True)
+                with span("plot"):
+                    st.plotly_chart(fig_content, use_container_width=True)
         
         with colm6:
             with st.container(border=True):
@@ -361,7 +286,8 @@ else:
                 open_rates = np.random.uniform(0.2, 1.0, size=10)
                 fig_campaign = px.line(x=days, y=open_rates, labels={'x': 'Day', 'y': 'Email Open Rate'})
                 fig_campaign.update_traces(line_color='#2ca02c')  # Green line
-                st.plotly_chart(fig_campaign, use_container_width=True)
+                with span("plot"):
+                    st.plotly_chart(fig_campaign, use_container_width=True)
 
         st.divider()
 
@@ -390,7 +316,7 @@ else:
             # Melt for plotly
             df_melt = df_time.melt(id_vars=['date'], value_vars=categories + ['Total'],
                                    var_name='category', value_name='articles')
-            fig_time = px.line(
+            fig_time = figures.line_figure(
                 df_melt,
                 x='date',
                 y='articles',
@@ -398,5 +324,6 @@ else:
                 labels={'date': 'Date', 'articles': 'Articles/Day', 'category': 'Category'},
                 title=''
             )
-            st.plotly_chart(fig_time, use_container_width=True)
+            with span("plot"):
+                st.plotly_chart(fig_time, use_container_width=True)
    
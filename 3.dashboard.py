@@ -1,14 +1,19 @@
 import streamlit as st
 import pickle
-import pandas as pd
 
-import plotly.express as px
-import plotly.graph_objects as go
+from churn import figures
+from churn.cache import get_baseline_service, get_dashboard_stats, get_figure_cache, get_model_comparison
+from churn.metrics import span
 
 # ========== Data & Model Loaders ==========
 
-def load_data():
-    return pd.read_csv("data/baseline_model.csv")
+with span("data"):
+    # Shared, read-only baseline table (one copy per process, not per session)
+    baseline = get_baseline_service()
+    # Per-feature stats, bins, quantiles and crosstabs, computed once per data version
+    stats = get_dashboard_stats()
+    # Serialized figures, dropped together with the data version they were drawn from
+    figure_cache = get_figure_cache()
 
 
 # ========== Streamlit UI ==========
@@ -23,59 +28,107 @@ with col2:
 st.divider()
 
 
-data = load_data()
-if 'subscription_status' not in data.columns and 'churn' in data.columns:
-    data['subscription_status'] = data['churn'].map({0: 'No Churn', 1: 'Churn'})
+columns = baseline.columns()
+feature = st.selectbox("🔎 Select Feature to Analyze", [col for col in columns if col in stats])
+feature_stats = stats[feature]
 
-feature = st.selectbox("🔎 Select Feature to Analyze", [col for col in data.columns if col not in ['churn', 'subscription_status']])
 analysis_type = st.radio("📊 Select Analysis Type", ["Univariate", "Bivariate"], horizontal=True)
 st.markdown("---")
 
 col1, col2, col3 = st.columns(3)
-if pd.api.types.is_numeric_dtype(data[feature]):
+if feature_stats.numeric:
     with st.container(border=True):
-        col1.metric("Mean", f"{data[feature].mean():.2f}")
-        col2.metric("Median", f"{data[feature].median():.2f}")
-        col3.metric("Std Dev", f"{data[feature].std():.2f}")
+        col1.metric("Mean", f"{feature_stats.mean:.2f}")
+        col2.metric("Median", f"{feature_stats.median:.2f}")
+        col3.metric("Std Dev", f"{feature_stats.std:.2f}")
 else:
     with st.container(border=True):
-        col1.metric("Unique Values", data[feature].nunique())
-        top_cat = data[feature].value_counts().idxmax()
-        col2.metric("Most Common", str(top_cat))
-        col3.metric("Total Count", len(data))
+        col1.metric("Unique Values", feature_stats.unique)
+        col2.metric("Most Common", str(feature_stats.most_common))
+        col3.metric("Total Count", stats.total)
 
 st.markdown("---")
 
+# Raw rows are only plotted for small datasets; larger ones are drawn from the precomputed aggregates
+data = None
+if feature_stats.numeric and not figures.use_aggregates(stats.total):
+    status_column = 'subscription_status' if 'subscription_status' in columns else 'churn'
+    data = baseline.frame([feature, status_column])
+    if 'subscription_status' not in data.columns:
+        data['subscription_status'] = data['churn'].map({0: 'No Churn', 1: 'Churn'})
+
+
+def show(chart, build):
+    with span("figure"):
+        fig = figure_cache.get((feature, analysis_type, chart, data is None), build)
+    with span("plot"):
+        st.plotly_chart(fig, use_container_width=True)
+
+
 if analysis_type == "Univariate":
     st.subheader("📌 Univariate Distribution")
     with st.container(border=True):
-        if pd.api.types.is_numeric_dtype(data[feature]):
-            fig = px.histogram(data, x=feature, nbins=30, title=f"{feature} Distribution", marginal="violin")
-            st.plotly_chart(fig, use_container_width=True)
-
-            fig2 = px.box(data, y=feature, title=f"{feature} Boxplot")
-            st.plotly_chart(fig2, use_container_width=True)
+        if feature_stats.numeric:
+            show("histogram", lambda: figures.histogram_figure(feature, feature_stats, data))
+            show("box", lambda: figures.box_figure(feature, feature_stats, data))
         else:
-            counts = data[feature].value_counts().reset_index()
-            counts.columns = [feature, "count"]
-            fig = px.bar(counts, x=feature, y="count", title=f"{feature} Count")
-            st.plotly_chart(fig, use_container_width=True)
+            show("counts", lambda: figures.category_count_figure(feature, feature_stats))
 
 else:
     st.subheader("🔁 Relationship with Churn")
     with st.container(border=True):
-        if pd.api.types.is_numeric_dtype(data[feature]):
-            fig = px.histogram(data, x=feature, color='subscription_status', barmode='overlay', opacity=0.7, title=f"{feature} by Churn")
-            st.plotly_chart(fig, use_container_width=True)
-
-            fig2 = px.box(data, x='subscription_status', y=feature, color='subscription_status', title=f"{feature} vs Churn Category")
-            st.plotly_chart(fig2, use_container_width=True)
+        if feature_stats.numeric:
+            show("histogram", lambda: figures.group_histogram_figure(feature, feature_stats, stats.groups, data))
+            show("box", lambda: figures.group_box_figure(feature, feature_stats, stats.groups, data))
         else:
-            fig = px.histogram(data, x=feature, color='subscription_status', barmode='group', title=f"{feature} vs Churn")
-            st.plotly_chart(fig, use_container_width=True)
+            show("counts", lambda: figures.category_group_figure(feature, feature_stats))
 
-            churn_table = pd.crosstab(data[feature], data['subscription_status'], normalize='index') * 100
+            churn_table = feature_stats.churn_rate()
             st.markdown("#### 📊 Churn Rate by Category")
             st.dataframe(churn_table.style.format("{:.1f}%").background_gradient(axis=1, cmap="RdYlGn_r"))
 
-st.markdown("---")
\ No newline at end of file
+st.markdown("---")
+
+# ========== Model Comparison ==========
+
+st.subheader("🏁 Model Comparison")
+st.write("Every registered model scored on the baseline data with the same encoded features.")
+# Computed once per data version: probabilities, latency, size and agreement for all models
+with span("comparison"):
+    comparison = get_model_comparison()
+summary = comparison.summary
+
+with st.container(border=True):
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Champion", f"{comparison.champion} ({summary.loc[comparison.champion, 'kind']})")
+    col2.metric("Champion Accuracy", f"{summary.loc[comparison.champion, 'accuracy'] * 100:.1f}%")
+    col3.metric("All Models Agree", f"{comparison.unanimous_rate() * 100:.1f}%")
+
+    st.dataframe(
+        summary[['kind', 'accuracy', 'roc_auc', 'agreement_with_champion', 'per_row_us', 'single_row_ms', 'memory_bytes', 'file_bytes']],
+        use_container_width=True,
+        column_config={
+            "kind": "Model",
+            "accuracy": st.column_config.NumberColumn("Accuracy", format="%.3f"),
+            "roc_auc": st.column_config.NumberColumn("ROC AUC", format="%.3f"),
+            "agreement_with_champion": st.column_config.NumberColumn("Agrees with Champion", format="%.3f"),
+            "per_row_us": st.column_config.NumberColumn("Batch µs/row", format="%.2f"),
+            "single_row_ms": st.column_config.NumberColumn("Single Row (ms)", format="%.2f"),
+            "memory_bytes": st.column_config.NumberColumn("Memory (bytes)", format="%d"),
+            "file_bytes": st.column_config.NumberColumn("File (bytes)", format="%d"),
+        },
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        with span("figure"):
+            fig = figure_cache.get(("comparison", "tradeoff"),
+                                   lambda: figures.tradeoff_figure(summary, comparison.champion))
+        with span("plot"):
+            st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        with span("figure"):
+            fig = figure_cache.get(("comparison", "agreement"),
+                                   lambda: figures.agreement_figure(comparison.agreement))
+        with span("plot"):
+            st.plotly_chart(fig, use_container_width=True)
@@ -1,60 +1,20 @@
 import streamlit as st
-import pickle
-import pandas as pd
 import numpy as np
-import shap
 import plotly.graph_objects as go
+import time
 
-# ========== Data & Model Loaders ==========
+from churn import figures
+from churn.cache import get_population
+from churn.features import encoder
+from churn.live import predict_row, prediction_cache
+from churn.metrics import fragment_rerun, span
+from churn.models import DEFAULT_MODEL, get_model
+from churn.sweep import partial_dependence, sweep, sweep_2d
 
-def load_data():
-    return pd.read_csv("data/baseline_model.csv")
+# ========== Data & Model Loaders ==========
 
 def load_xgb_model():
-    with open('model/model_2.pkl', 'rb') as f:
-        model = pickle.load(f)
-    return model
-
-# ========== Preprocessing ==========
-
-def preprocess(user_input):
-    df = pd.DataFrame([user_input])
-    df['subscription_type'] = df['subscription_type'].map({'Espresso': 0, 'Digital': 1, 'Digital+Print': 2})
-    df['plan_type'] = df['plan_type'].map({'Monthly': 0, 'Annual': 1})
-    df['auto_renew'] = df['auto_renew'].map({'Yes': 1, 'No': 0})
-    df['discount_used_last_renewal'] = df['discount_used_last_renewal'].map({'Yes': 1, 'No': 0})
-    df['downgrade_history'] = df['downgrade_history'].map({'Yes': 1, 'No': 0})
-    df['previous_renewal_status'] = df['previous_renewal_status'].map({'Auto': 1, 'Manual': 0})
-    df['signup_source'] = df['signup_source'].map({'Web': 0, 'Mobile App': 0, 'Referral': 1})
-
-    df = pd.get_dummies(df, columns=['region', 'most_read_category', 'primary_device', 'payment_method', 'last_campaign_engaged'])
-    df = df.fillna(0)
-
-
-    MODEL_FEATURES = ['subscription_type', 'plan_type', 'auto_renew',
-       'avg_articles_per_week', 'days_since_last_login',
-       'support_tickets_last_90d', 'discount_used_last_renewal',
-       'email_open_rate', 'time_spent_per_session_mins',
-       'completion_rate', 'article_skips_per_week',
-       'previous_renewal_status', 'campaign_ctr', 'nps_score',
-       'sentiment_score', 'csat_score', 'customer_age', 'signup_source',
-       'downgrade_history', 'tenure_days', 'region_Asia', 'region_Europe',
-       'region_North America', 'region_Others', 'most_read_Culture',
-       'most_read_Environment', 'most_read_Finance', 'most_read_Politics',
-       'most_read_Technology', 'primary_device_Desktop',
-       'primary_device_Mobile', 'primary_device_Tablet',
-       'payment_method_Credit Card', 'payment_method_Debit Card',
-       'payment_method_PayPal', 'last_campaign_engaged_Newsletter Promo',
-       'last_campaign_engaged_Retention Offer',
-       'last_campaign_engaged_Survey']
-    
-    for col in MODEL_FEATURES:
-        if col not in df.columns:
-            df[col] = 0
-
-    return df[MODEL_FEATURES]
-
-
+    return get_model(DEFAULT_MODEL)
 
 # ========== Streamlit UI ==========
 
@@ -68,111 +28,30 @@ with col2:
 st.divider()
 
 
-st.subheader("📋 User Input Options")
-col1, col2 = st.columns(2)
-with col1:
-    with st.expander("📦 Subscription Details", expanded=True):
-        subscription_type = st.selectbox('Subscription Plan Type', ['Espresso', 'Digital', 'Digital+Print'])
-        plan_type = st.selectbox('Plan Type', ['Monthly', 'Annual'])
-        signup_source = st.selectbox('Signup Source', ['Web', 'Mobile App', 'Referral'])
-        auto_renew = st.toggle("Was Auto-renew Enabled on Subscription?")
-        discount_used_last_renewal = st.toggle("Was Discount Used at Last Renewal?")
-        previous_renewal_status = st.toggle("Was Subscription Previously Renewed?")
-        downgrade_history = st.toggle("Was Subscription Downgraded Before?")
-with col2:
-    with st.expander("🌍 User Profile", expanded=True):
-        region = st.selectbox('Region', ['North America', 'Europe', 'Asia', 'Other'])
-        primary_device = st.selectbox('Primary Device', ['Tablet', 'Mobile', 'Desktop'])
-        payment_method = st.selectbox('Payment Method', ['Credit Card', 'Debit Card', 'PayPal'])
-        most_read_category = st.selectbox('Most Read Category', ['Technology', 'Business', 'Science', 'Health', 'Politics', 'Entertainment', 'Culture'])
-        last_campaign_engaged = st.selectbox('Last Campaign Engaged', ['Newsletter Promo', 'Retention Offer', 'Survey'])
-
-if "condition" not in st.session_state:
-    st.session_state["condition"] = True
+def clear_inputs():
+    for key in [key for key in st.session_state if key.startswith("pg_") and key != "pg_live"]:
+        del st.session_state[key]
 
 
-col3, col4 = st.columns(2)
-with col3:
-    with st.expander("📊 Engagement Metrics", expanded=True):
-        col1, col2 = st.columns(2)
-        with col1:
-            customer_age = st.slider('Customer Age', 18, 100, 25)
-            avg_articles_per_week = st.slider('Avg Articles/Week', 0.0, 9.0, 0.0, 0.1)
-            article_skips_per_week = st.slider('Article Skips/Week', 0, 10, 0)
-            days_since_last_login = st.slider('Days Since Last Login', 0, 100, 0)
-        with col2:
-            support_tickets_last_90d = st.slider('Support Tickets (Last 90 Days)', 0, 10, 0)
-            email_open_rate = st.slider('Email Open Rate', 0.00, 1.00, 0.00, 0.01)
-            time_spent_per_session_mins = st.slider('Time/Session (mins)', 0.0, 30.0, 0.0, 0.1)
-            tenure_days = st.slider('Tenure (Days)', 0, 1825, 25)
-
-with col4:
-    with st.expander("📈 Engagement Scores", expanded=True):
-        col1, col2 = st.columns(2)
-        with col1:
-            completion_rate = st.slider('Completion Rate', 0.00, 1.00, 0.00, 0.01)
-            campaign_ctr = st.slider('Campaign CTR', 0.00, 1.00, 0.00, 0.01)
-        with col2:
-            nps_score = st.slider('NPS Score', -100, 100, 0)
-            sentiment_score = st.slider('Sentiment Score', -1.5, 1.5, 0.0, 0.1)
-            csat_score = st.slider('CSAT Score (1-5)', 1, 5, 3)
-
-col5, col6 = st.columns([1, 1])
-predict_button = col5.button("🔍 Predict", use_container_width=True)
-clear_button = col6.button("🗑️ Clear Inputs", use_container_width=True)
-
-user_input = {
-    'subscription_type': subscription_type,
-    'plan_type': plan_type,
-    'primary_device': primary_device,
-    'region': region,
-    'most_read_category': most_read_category,
-    'last_campaign_engaged': last_campaign_engaged,
-    'payment_method': payment_method,
-    'signup_source': signup_source,
-    'customer_age': customer_age,
-    'avg_articles_per_week': avg_articles_per_week,
-    'article_skips_per_week': article_skips_per_week,
-    'days_since_last_login': days_since_last_login,
-    'support_tickets_last_90d': support_tickets_last_90d,
-    'email_open_rate': email_open_rate,
-    'time_spent_per_session_mins': time_spent_per_session_mins,
-    'tenure_days': tenure_days,
-    'completion_rate': completion_rate,
-    'campaign_ctr': campaign_ctr,
-    'nps_score': nps_score,
-    'sentiment_score': sentiment_score,
-    'csat_score': csat_score,
-    'discount_used_last_renewal': 'Yes' if discount_used_last_renewal else 'No',
-    'auto_renew': 'Yes' if auto_renew else 'No',
-    'previous_renewal_status': 'Auto' if previous_renewal_status else 'Manual',
-    'downgrade_history': 'Yes' if downgrade_history else 'No'
-}
-
-
-if clear_button:
-    st.rerun()
-
-if predict_button:
-    df = preprocess(user_input)
-    model = load_xgb_model()
-    prediction = model.predict(df)[0]
-    proba = model.predict_proba(df)[0][1]
+def show_prediction(user_input):
+    for column, values in encoder.unmatched_values(user_input).items():
+        st.warning(f"⚠️ {column} = {', '.join(values)} is not known to the model and is ignored.")
+    x = encoder.encode(user_input)
+    with span("predict"):
+        prediction = predict_row(x)
 
-    result = "Churn" if prediction == 1 else "No Churn"
+    result = "Churn" if prediction.label == 1 else "No Churn"
     st.success(f"📊 **Prediction:** {result}")
-    st.info(f"🧠 Confidence: **{proba * 100:.2f}%** for Churn")
+    st.info(f"🧠 Confidence: **{prediction.proba * 100:.2f}%** for Churn")
+    stats = prediction_cache.as_dict()
+    st.caption(f"Scored in {prediction.seconds * 1e3:.0f} ms · {stats['size']} cached predictions, "
+               f"{stats['hits']} hits / {stats['misses']} misses")
 
     st.subheader("🔎 Feature Importance")
 
-    explainer = shap.TreeExplainer(model)
-    shap_values = explainer(df)
-
     # --- Waterfall Plot ---
-    row = shap_values[0]
-    shap_impact = row.values
-    features = row.feature_names
-    base_val = row.base_values
+    shap_impact = prediction.shap_values
+    features = prediction.feature_names
 
     top_idx = np.argsort(np.abs(shap_impact))[-15:]
     top_features = [features[i] for i in top_idx]
@@ -195,5 +74,143 @@ if predict_button:
         yaxis_title="Feature",
         waterfallgap=0.4
     )
-    st.plotly_chart(fig_waterfall, use_container_width=True)
+    with span("plot"):
+        st.plotly_chart(fig_waterfall, use_container_width=True)
+
+
+@st.fragment
+@fragment_rerun("Playground")
+def playground():
+    st.subheader("📋 User Input Options")
+    col1, col2 = st.columns(2)
+    with col1:
+        with st.expander("📦 Subscription Details", expanded=True):
+            subscription_type = st.selectbox('Subscription Plan Type', ['Espresso', 'Digital', 'Digital+Print'], key='pg_subscription_type')
+            plan_type = st.selectbox('Plan Type', ['Monthly', 'Annual'], key='pg_plan_type')
+            signup_source = st.selectbox('Signup Source', ['Web', 'Mobile App', 'Referral'], key='pg_signup_source')
+            auto_renew = st.toggle("Was Auto-renew Enabled on Subscription?", key='pg_auto_renew')
+            discount_used_last_renewal = st.toggle("Was Discount Used at Last Renewal?", key='pg_discount_used_last_renewal')
+            previous_renewal_status = st.toggle("Was Subscription Previously Renewed?", key='pg_previous_renewal_status')
+            downgrade_history = st.toggle("Was Subscription Downgraded Before?", key='pg_downgrade_history')
+    with col2:
+        with st.expander("🌍 User Profile", expanded=True):
+            region = st.selectbox('Region', ['North America', 'Europe', 'Asia', 'Other'], key='pg_region')
+            primary_device = st.selectbox('Primary Device', ['Tablet', 'Mobile', 'Desktop'], key='pg_primary_device')
+            payment_method = st.selectbox('Payment Method', ['Credit Card', 'Debit Card', 'PayPal'], key='pg_payment_method')
+            most_read_category = st.selectbox('Most Read Category', ['Technology', 'Business', 'Science', 'Health', 'Politics', 'Entertainment', 'Culture'], key='pg_most_read_category')
+            last_campaign_engaged = st.selectbox('Last Campaign Engaged', ['Newsletter Promo', 'Retention Offer', 'Survey'], key='pg_last_campaign_engaged')
+
+    col3, col4 = st.columns(2)
+    with col3:
+        with st.expander("📊 Engagement Metrics", expanded=True):
+            col1, col2 = st.columns(2)
+            with col1:
+                customer_age = st.slider('Customer Age', 18, 100, 25, key='pg_customer_age')
+                avg_articles_per_week = st.slider('Avg Articles/Week', 0.0, 9.0, 0.0, 0.1, key='pg_avg_articles_per_week')
+                article_skips_per_week = st.slider('Article Skips/Week', 0, 10, 0, key='pg_article_skips_per_week')
+                days_since_last_login = st.slider('Days Since Last Login', 0, 100, 0, key='pg_days_since_last_login')
+            with col2:
+                support_tickets_last_90d = st.slider('Support Tickets (Last 90 Days)', 0, 10, 0, key='pg_support_tickets_last_90d')
+                email_open_rate = st.slider('Email Open Rate', 0.00, 1.00, 0.00, 0.01, key='pg_email_open_rate')
+                time_spent_per_session_mins = st.slider('Time/Session (mins)', 0.0, 30.0, 0.0, 0.1, key='pg_time_spent_per_session_mins')
+                tenure_days = st.slider('Tenure (Days)', 0, 1825, 25, key='pg_tenure_days')
+
+    with col4:
+        with st.expander("📈 Engagement Scores", expanded=True):
+            col1, col2 = st.columns(2)
+            with col1:
+                completion_rate = st.slider('Completion Rate', 0.00, 1.00, 0.00, 0.01, key='pg_completion_rate')
+                campaign_ctr = st.slider('Campaign CTR', 0.00, 1.00, 0.00, 0.01, key='pg_campaign_ctr')
+            with col2:
+                nps_score = st.slider('NPS Score', -100, 100, 0, key='pg_nps_score')
+                sentiment_score = st.slider('Sentiment Score', -1.5, 1.5, 0.0, 0.1, key='pg_sentiment_score')
+                csat_score = st.slider('CSAT Score (1-5)', 1, 5, 3, key='pg_csat_score')
+
+    col5, col6, col7 = st.columns([1, 1, 1])
+    live = col5.toggle("⚡ Live Predictions", key="pg_live", help="Score as the inputs change instead of on Predict.")
+    predict_button = col6.button("🔍 Predict", use_container_width=True, disabled=live)
+    col7.button("🗑️ Clear Inputs", use_container_width=True, on_click=clear_inputs)
+
+    user_input = {
+        'subscription_type': subscription_type,
+        'plan_type': plan_type,
+        'primary_device': primary_device,
+        'region': region,
+        'most_read_category': most_read_category,
+        'last_campaign_engaged': last_campaign_engaged,
+        'payment_method': payment_method,
+        'signup_source': signup_source,
+        'customer_age': customer_age,
+        'avg_articles_per_week': avg_articles_per_week,
+        'article_skips_per_week': article_skips_per_week,
+        'days_since_last_login': days_since_last_login,
+        'support_tickets_last_90d': support_tickets_last_90d,
+        'email_open_rate': email_open_rate,
+        'time_spent_per_session_mins': time_spent_per_session_mins,
+        'tenure_days': tenure_days,
+        'completion_rate': completion_rate,
+        'campaign_ctr': campaign_ctr,
+        'nps_score': nps_score,
+        'sentiment_score': sentiment_score,
+        'csat_score': csat_score,
+        'discount_used_last_renewal': 'Yes' if discount_used_last_renewal else 'No',
+        'auto_renew': 'Yes' if auto_renew else 'No',
+        'previous_renewal_status': 'Auto' if previous_renewal_status else 'Manual',
+        'downgrade_history': 'Yes' if downgrade_history else 'No'
+    }
+    st.session_state["playground_input"] = user_input
+
+    if live or predict_button:
+        show_prediction(user_input)
+
+
+playground()
+user_input = st.session_state["playground_input"]
 
+st.divider()
+
+# ========== Sensitivity Sweep ==========
+
+st.subheader("📈 Sensitivity Sweep")
+st.write("Score a whole grid of variants of the input above in one batch, or see how a feature moves churn across a sample of the baseline customers.")
+
+sweep_features = list(user_input)
+col1, col2, col3 = st.columns(3)
+with col1:
+    sweep_mode = st.radio("Mode", ["1-D Curve", "2-D Heatmap", "Population PDP/ICE"], key="sweep_mode")
+with col2:
+    feature_x = st.selectbox("Feature", sweep_features, index=sweep_features.index('days_since_last_login'), key="sweep_feature")
+    if sweep_mode == "2-D Heatmap":
+        other_features = [col for col in sweep_features if col != feature_x]
+        feature_y = st.selectbox("Second Feature", other_features,
+                                 index=other_features.index('tenure_days') if 'tenure_days' in other_features else 0,
+                                 key="sweep_feature_y")
+with col3:
+    points = st.slider("Grid Points per Feature", 10, 60 if sweep_mode == "2-D Heatmap" else 200, 40, key="sweep_points")
+    if sweep_mode == "Population PDP/ICE":
+        population = get_population()
+        population_rows = st.slider("Population Rows", 100, max(len(population.X), 100), min(500, len(population.X)),
+                                    step=100, key="sweep_rows")
+
+if st.button("📈 Run Sweep", use_container_width=True):
+    model = load_xgb_model()
+    population = get_population()
+    values_x = population.grid(feature_x, points)
+    started = time.perf_counter()
+    with span("sweep"):
+        if sweep_mode == "1-D Curve":
+            proba = sweep(user_input, feature_x, values_x, model)
+            fig = figures.sweep_figure(feature_x, values_x, proba, user_input[feature_x])
+            scored = len(values_x)
+        elif sweep_mode == "2-D Heatmap":
+            values_y = population.grid(feature_y, points)
+            proba = sweep_2d(user_input, feature_x, values_x, feature_y, values_y, model)
+            fig = figures.sweep_heatmap_figure(feature_x, values_x, feature_y, values_y, proba)
+            scored = proba.size
+        else:
+            ice, pdp = partial_dependence(population.X[:population_rows], feature_x, values_x, model)
+            fig = figures.partial_dependence_figure(feature_x, values_x, ice, pdp)
+            scored = ice.size
+    st.caption(f"Scored {scored:,} variants in {(time.perf_counter() - started) * 1e3:.0f} ms.")
+    with span("plot"):
+        st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,107 @@
+import time
+
+import streamlit as st
+import pandas as pd
+
+from churn import figures
+from churn.metrics import METRICS_PATH, TOTAL, available_profilers, metrics
+
+PAGES = ["Home", "Customer Profile", "Dashboard", "Playground"]
+
+col1, col2 = st.columns([5,1])
+with col1:
+    st.title("🛠️ Admin")
+    st.write("Where each page's reruns spend their time, across every session since the process started.")
+with col2:
+    st.image("assets/logo.jpg",width=150)
+st.divider()
+
+snapshot = pd.DataFrame(metrics.snapshot())
+
+# ========== Latency ==========
+
+st.subheader("⏱️ Rerun Latency")
+if snapshot.empty:
+    st.info("No reruns recorded yet. Open a page to start collecting timings.")
+else:
+    totals = snapshot[snapshot['stage'] == TOTAL]
+    if len(totals):
+        cols = st.columns(len(totals))
+        for col, (_, row) in zip(cols, totals.iterrows()):
+            col.metric(row['page'], f"{row['p50'] * 1e3:.0f} ms", f"p99 {row['p99'] * 1e3:.0f} ms", delta_color="off")
+        st.plotly_chart(figures.latency_figure(snapshot), use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        page = st.selectbox("Page", list(snapshot['page'].unique()))
+    with col2:
+        stage = st.selectbox("Stage", list(snapshot.loc[snapshot['page'] == page, 'stage']))
+    samples = metrics.samples(page, stage)
+    st.plotly_chart(figures.latency_histogram_figure(samples, f"{page}: {stage} ({len(samples)} most recent)"),
+                    use_container_width=True)
+
+    st.markdown("#### Stages")
+    ms = snapshot.copy()
+    for column in ['mean', 'p50', 'p95', 'p99', 'max']:
+        ms[column] = ms[column] * 1e3
+    st.dataframe(
+        ms,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "page": "Page",
+            "stage": "Stage",
+            "count": st.column_config.NumberColumn("Count", format="%d"),
+            "mean": st.column_config.NumberColumn("Mean (ms)", format="%.1f"),
+            "p50": st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+            "p95": st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+            "p99": st.column_config.NumberColumn("p99 (ms)", format="%.1f"),
+            "max": st.column_config.NumberColumn("Max (ms)", format="%.1f"),
+        },
+    )
+
+st.markdown("---")
+
+# ========== Export ==========
+
+st.subheader("📤 Prometheus Export")
+st.write(f"Percentiles, counts and sums are rewritten to `{METRICS_PATH}` in the background for node_exporter's textfile collector.")
+text = metrics.prometheus_text()
+col1, col2, col3 = st.columns(3)
+with col1:
+    if st.button("Write metrics file now", use_container_width=True):
+        st.toast(f"Wrote {metrics.write_textfile()}")
+with col2:
+    st.download_button("Download metrics.prom", text, file_name="metrics.prom", mime="text/plain",
+                       use_container_width=True)
+with col3:
+    if st.button("Reset timings", use_container_width=True):
+        metrics.reset()
+        st.rerun()
+with st.expander("Metrics text"):
+    st.code(text, language="text")
+
+st.markdown("---")
+
+# ========== Profiling ==========
+
+st.subheader("🔬 Profile a Rerun")
+st.write("Capture a profile of the next rerun of a page, then open that page. Adding `?profile=1` to a page's URL profiles that rerun with cProfile.")
+col1, col2, col3 = st.columns([2,1,1])
+with col1:
+    profile_page = st.selectbox("Page to profile", PAGES)
+with col2:
+    profiler = st.selectbox("Profiler", available_profilers())
+with col3:
+    st.write("")
+    if st.button("Profile next rerun", type="primary", use_container_width=True):
+        metrics.request_profile(profile_page, profiler)
+
+pending = metrics.pending_profiles()
+if pending:
+    st.caption("Waiting for: " + ", ".join(f"{page} ({kind})" for page, kind in pending.items()))
+
+for profile in metrics.profiles:
+    with st.expander(f"{profile.page}: {profile.seconds * 1e3:.0f} ms with {profile.profiler} "
+                     f"at {time.strftime('%H:%M:%S', time.localtime(profile.created))}"):
+        st.code(profile.text, language="text")
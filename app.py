@@ -1,11 +1,39 @@
+import pandas as pd
 import streamlit as st
 
+from churn.cache import get_customer_service
+from churn.explain import build_shap_values_async
+from churn.ingest import watch_incoming
+from churn.metrics import export_periodically, rerun
+from churn.models import get_registry
+
+
+# Column selections and shallow copies become lazy copies: a page writing to
+# its view of a shared DataService frame copies only what it touches.
+pd.set_option("mode.copy_on_write", True)
+
+
+@st.cache_resource
+def start_background_jobs():
+    # Runs once per process: unpickle every model and precompute SHAP values off the request path
+    get_registry().warm_async()
+    build_shap_values_async()
+    # Apply customer deltas dropped into data/incoming/ to the shared data in place
+    watch_incoming(get_customer_service())
+    # Rewrite data/metrics.prom with per-page latency percentiles for Prometheus
+    export_periodically()
+
 home_page = st.Page("1.home.py", title="Home", icon="🏠")
 info_page = st.Page("2.info.py", title="Customer Profile", icon="🪪")
 dashboard_page = st.Page("3.dashboard.py", title="Dashboard", icon="📊")
 playground_page = st.Page("4.playground.py", title="Playground", icon="🚀")
+admin_page = st.Page("5.admin.py", title="Admin", icon="🛠️")
 
-pg = st.navigation([home_page, info_page, dashboard_page, playground_page])
+pg = st.navigation([home_page, info_page, dashboard_page, playground_page, admin_page])
 st.set_page_config(page_title="App", page_icon="📕", layout="wide")
 
-pg.run()
+start_background_jobs()
+
+# Time every rerun per page; ?profile=1 also captures a cProfile of this one
+with rerun(pg.title, profile="profile" in st.query_params):
+    pg.run()
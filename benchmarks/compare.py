@@ -0,0 +1,53 @@
+"""Compare two benchmark result files and flag regressions.
+
+Median timings are matched by dataset size and benchmark name; any that got
+slower than ``--threshold`` times the baseline are reported and make the
+command exit with status 1.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 1.2
+"""
+import argparse
+import json
+import sys
+
+THRESHOLD = 1.2
+
+
+def medians(report):
+    """``{(rows, name): median seconds}`` for every hot path and page timing in a report."""
+    flat = {}
+    for run in report['runs']:
+        for name, summary in run.get('hot_paths', {}).items():
+            flat[(run['rows'], name)] = summary['median']
+        for page, timings in run.get('pages', {}).items():
+            for name, summary in timings.items():
+                flat[(run['rows'], f"page.{page}.{name}")] = summary['median']
+    return flat
+
+
+def compare(baseline, candidate):
+    """Rows of ``(rows, name, baseline, candidate, ratio)`` for benchmarks present in both reports."""
+    before, after = medians(baseline), medians(candidate)
+    return [(rows, name, before[rows, name], after[rows, name], after[rows, name] / before[rows, name])
+            for rows, name in sorted(before.keys() & after.keys()) if before[rows, name] > 0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    print(f"{baseline['environment']['commit']} -> {candidate['environment']['commit']}")
+    regressions = 0
+    for rows, name, before, after, ratio in compare(baseline, candidate):
+        flag = "REGRESSION" if ratio > args.threshold else ""
+        regressions += bool(flag)
+        print(f"{rows:>10} {name:<40} {before * 1e3:>12.3f}ms {after * 1e3:>12.3f}ms {ratio:>7.2f}x {flag}")
+    print(f"\n{regressions} regression(s) above {args.threshold:.2f}x")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,128 @@
+"""Each hot path of the app timed in isolation on one dataset directory.
+
+Whole-table operations (loads, index builds, batch scoring, aggregation) run
+``table_repeats`` times or once when they are cold builds; per-request
+operations (filtering, search, lookup, single-row scoring and SHAP) run
+``repeats`` times after a warm-up call. The pandas versions of filtering and
+lookup that the indexes replaced are timed alongside them as references.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.timing import measure, once
+from churn.cube import AggregateCube
+from churn.data import columnar_path, convert_csv, load_baseline_data, load_columnar, load_home_data
+from churn.explain import explain_matrix
+from churn.features import encoder, preprocess
+from churn.filters import FilterIndex
+from churn.inference import predictor_for
+from churn.models import DEFAULT_MODEL, get_registry
+from churn.scoring import attach_scores, score_customers, scoring_columns
+from churn.search import NameIndex
+from churn.stats import DashboardStats
+from churn.store import CustomerStore
+
+REPEATS = 20
+TABLE_REPEATS = 3
+LOOKUPS = 1_000
+SHAP_ROWS = 10_000
+SEARCH_LIMIT = 500
+
+
+def pandas_filter(df, selection):
+    """The Home page's original boolean-mask filtering, for reference."""
+    filtered = df.copy()
+    for column, value in selection.items():
+        filtered = filtered[filtered[column] == value]
+    return filtered
+
+
+def _selections(df):
+    top = {col: df[col].value_counts().index[0] for col in ('region', 'subscription_type', 'subscription_status')}
+    return {
+        'none': {},
+        'single': {'region': top['region']},
+        'combined': top,
+    }
+
+
+def _queries(df, rng):
+    first, last = df[['first_name', 'last_name']].iloc[int(rng.integers(len(df)))]
+    return {
+        'prefix': first[:2],
+        'word': last,
+        'full': f"{first} {last}",
+        'substring': first[1:4],
+    }
+
+
+def run_hot_paths(data_dir, model_name=DEFAULT_MODEL, repeats=REPEATS, table_repeats=TABLE_REPEATS, seed=0):
+    """Time every hot path on the dataset in ``data_dir``; returns ``{name: summary}``."""
+    home_csv = os.path.join(data_dir, "home_data.csv")
+    baseline_csv = os.path.join(data_dir, "baseline_model.csv")
+    rng = np.random.default_rng(seed)
+    results = {}
+
+    # ========== Loading ==========
+    results['load.csv'] = measure(lambda: pd.read_csv(home_csv), table_repeats, warmup=0)
+    _, results['load.convert'] = once(lambda: convert_csv(home_csv))
+    convert_csv(baseline_csv)
+    results['load.columnar'] = measure(lambda: load_columnar(home_csv), table_repeats, warmup=0)
+    columns = scoring_columns(home_csv)
+    results['load.columnar_scoring'] = measure(lambda: load_columnar(home_csv, columns), table_repeats, warmup=0)
+    results['load.columnar']['file_bytes'] = os.path.getsize(columnar_path(home_csv))
+    results['load.csv']['file_bytes'] = os.path.getsize(home_csv)
+
+    # ========== Scoring ==========
+    model = get_registry().get(model_name)
+    df = load_home_data(home_csv)
+    scores, results['score.table'] = once(lambda: score_customers(df, model))
+    df = attach_scores(df, scores.set_index('customer_id'))
+    results['encode.table'] = measure(lambda: encoder.encode(df), table_repeats, warmup=0)
+
+    # ========== Index Builds ==========
+    store, results['build.customer_store'] = once(lambda: CustomerStore(df))
+    filters, results['build.filter_index'] = once(lambda: FilterIndex(df))
+    cube, results['build.aggregate_cube'] = once(lambda: AggregateCube(df))
+    names, results['build.name_index'] = once(lambda: NameIndex(df))
+
+    # ========== Filtering ==========
+    selections = _selections(df)
+    for label, selection in selections.items():
+        results[f'filter.positions.{label}'] = measure(lambda: filters.positions(selection), repeats)
+        results[f'filter.cube_total.{label}'] = measure(lambda: cube.total(selection), repeats)
+        results[f'filter.pandas_mask.{label}'] = measure(lambda: pandas_filter(df, selection), table_repeats)
+
+    # ========== Name Search ==========
+    within = filters.positions(selections['combined'])
+    for label, query in _queries(df, rng).items():
+        results[f'search.{label}'] = measure(lambda: names.search(query, limit=SEARCH_LIMIT), repeats)
+        results[f'search.{label}.filtered'] = measure(
+            lambda: names.search(query, within=within, limit=SEARCH_LIMIT), repeats)
+
+    # ========== Customer Lookup ==========
+    ids = rng.choice(df['customer_id'].to_numpy(), LOOKUPS)
+    results['lookup.store'] = measure(lambda: [store.get(customer_id) for customer_id in ids], repeats, ops=LOOKUPS)
+    customer_id = ids[0]
+    results['lookup.pandas_scan'] = measure(lambda: df[df['customer_id'] == customer_id], repeats)
+
+    # ========== Prediction ==========
+    row = store.get_frame(customer_id)
+    results['predict.single_row'] = measure(lambda: model.predict_proba(preprocess(row)), repeats)
+    X = encoder.encode(df)
+    results['predict.table'] = measure(lambda: model.predict_proba(X), table_repeats, ops=len(X))
+    predictor = predictor_for(model)
+    results['predict.single_row.native'] = measure(lambda: predictor.predict(preprocess(row)), repeats)
+    results['predict.table.native'] = measure(lambda: predictor.proba(X), table_repeats, ops=len(X))
+
+    # ========== SHAP ==========
+    results['shap.single_row'] = measure(lambda: explain_matrix(preprocess(row), model_name), repeats)
+    sample = X[:SHAP_ROWS]
+    results['shap.batch'] = measure(lambda: explain_matrix(sample, model_name), table_repeats, ops=len(sample))
+
+    # ========== Dashboard ==========
+    baseline = load_baseline_data(baseline_csv)
+    results['dashboard.stats'] = measure(lambda: DashboardStats(baseline), table_repeats, warmup=0)
+    return results
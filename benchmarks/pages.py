@@ -0,0 +1,69 @@
+"""Full page reruns driven headlessly through Streamlit's ``AppTest``.
+
+Must run in a process whose ``CHURN_DATA_DIR`` points at the dataset (the
+paths are resolved when ``churn`` is imported) and from the repository root.
+The first run of the first page pays for loading and scoring the data; each
+page then records its own first run, plain reruns and, on Home, a search and
+a page turn.
+"""
+from contextlib import contextmanager
+
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.element_tree import ButtonGroup
+
+from benchmarks.timing import measure, once
+
+PAGE_RERUNS = 5
+PAGE_TIMEOUT = 600
+
+
+def _button_group_indices(self):
+    # AppTest (Streamlit 1.45) iterates a single-select segmented control's
+    # value as if it were a list of selections, so every rerun after the first
+    # fails on the Home filters; wrap the single value instead.
+    value = self.value
+    values = value if isinstance(value, (list, tuple)) else [] if value is None else [value]
+    return [self.options.index(self.format_func(v)) for v in values]
+
+
+@contextmanager
+def single_select_fix():
+    """Patch ``ButtonGroup.indices`` for the duration of a page run, leaving Streamlit untouched afterwards."""
+    original = ButtonGroup.indices
+    ButtonGroup.indices = property(_button_group_indices)
+    try:
+        yield
+    finally:
+        ButtonGroup.indices = original
+
+
+def _check(at, page):
+    if at.exception:
+        raise RuntimeError(f"{page} raised: {at.exception[0].value}")
+
+
+def run_page(page, reruns=PAGE_RERUNS, timeout=PAGE_TIMEOUT, state=None, interactions=None):
+    at = AppTest.from_file(page, default_timeout=timeout)
+    for key, value in (state or {}).items():
+        at.session_state[key] = value
+    with single_select_fix():
+        _, first_run = once(at.run)
+        _check(at, page)
+        results = {'first_run': first_run, 'rerun': measure(at.run, reruns, warmup=0)}
+        for name, interact in (interactions or {}).items():
+            results[name] = measure(lambda: interact(at), reruns, warmup=0)
+            _check(at, page)
+    return results
+
+
+def run_pages(customer_id, search_query, reruns=PAGE_RERUNS, timeout=PAGE_TIMEOUT):
+    """Time every page; ``customer_id`` is opened on the profile page and ``search_query`` typed on Home."""
+    return {
+        'home': run_page("1.home.py", reruns, timeout, interactions={
+            'next_page': lambda at: at.button(key="next_page").click().run(),
+            'search': lambda at: at.text_input(key="full_name").input(search_query).run(),
+        }),
+        'info': run_page("2.info.py", reruns, timeout, state={'selected_customer_id': customer_id}),
+        'dashboard': run_page("3.dashboard.py", reruns, timeout),
+        'playground': run_page("4.playground.py", reruns, timeout),
+    }
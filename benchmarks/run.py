@@ -0,0 +1,134 @@
+"""Run the benchmark suite over synthetic datasets and write the results as JSON.
+
+For each size a dataset is generated under ``--work-dir`` (and reused on
+later runs) and benchmarked in a fresh child process with ``CHURN_DATA_DIR``
+pointing at it, so every size starts from cold caches. Files derived from the
+CSVs (Parquet, scores, reports) are removed before the hot paths and again
+before the page reruns, so the first page run measures a true cold start.
+
+    python -m benchmarks.run --sizes 1e3 1e4 1e5 --out bench.json
+    python -m benchmarks.run --sizes 1e6 1e7 --no-pages --table-repeats 1
+    python -m benchmarks.compare old.json bench.json
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from importlib import metadata
+
+from benchmarks.hot_paths import REPEATS, TABLE_REPEATS
+from benchmarks.pages import PAGE_RERUNS, PAGE_TIMEOUT
+from benchmarks.synthetic import write_dataset
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZES = [1_000, 10_000, 100_000]
+SOURCE_FILES = ("home_data.csv", "baseline_model.csv")
+PACKAGES = ['numpy', 'pandas', 'pyarrow', 'scikit-learn', 'xgboost', 'shap', 'plotly', 'streamlit']
+
+
+def rows(value):
+    return int(float(value))
+
+
+def environment():
+    """Commit, interpreter and library versions the results were measured with."""
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        'commit': git("rev-parse", "HEAD"),
+        'dirty': bool(git("status", "--porcelain", "--untracked-files=no")),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'packages': {name: metadata.version(name) for name in PACKAGES},
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def reset_derived(data_dir):
+    """Delete everything in ``data_dir`` except the source CSVs."""
+    for path in glob.glob(os.path.join(data_dir, "*")):
+        if os.path.isfile(path) and os.path.basename(path) not in SOURCE_FILES:
+            os.remove(path)
+
+
+def bench_dataset(data_dir, repeats, table_repeats, page_reruns, page_timeout, pages=True):
+    """Benchmark one dataset; run in a process whose ``CHURN_DATA_DIR`` is ``data_dir``."""
+    from benchmarks.hot_paths import run_hot_paths
+    from churn.data import load_home_data
+
+    reset_derived(data_dir)
+    result = {'hot_paths': run_hot_paths(data_dir, repeats=repeats, table_repeats=table_repeats)}
+    if pages:
+        from benchmarks.pages import run_pages
+
+        customer = load_home_data(os.path.join(data_dir, "home_data.csv"), columns=['customer_id', 'last_name']).iloc[0]
+        reset_derived(data_dir)
+        result['pages'] = run_pages(customer['customer_id'], customer['last_name'], page_reruns, page_timeout)
+    return result
+
+
+def run_size(n_rows, args):
+    data_dir = os.path.join(args.work_dir, f"rows-{n_rows}")
+    generate_seconds = None
+    if not all(os.path.exists(os.path.join(data_dir, name)) for name in SOURCE_FILES):
+        start = time.perf_counter()
+        write_dataset(data_dir, n_rows, args.seed)
+        generate_seconds = time.perf_counter() - start
+
+    out = os.path.join(data_dir, "result.json")
+    command = [sys.executable, "-m", "benchmarks.run", "--child", data_dir, "--child-out", out,
+               "--repeats", str(args.repeats), "--table-repeats", str(args.table_repeats),
+               "--page-reruns", str(args.page_reruns), "--page-timeout", str(args.page_timeout)]
+    if args.no_pages:
+        command.append("--no-pages")
+    env = dict(os.environ, CHURN_DATA_DIR=data_dir, CHURN_LLM="fake")
+    subprocess.run(command, cwd=ROOT, env=env, check=True)
+    with open(out) as f:
+        result = json.load(f)
+    return {'rows': n_rows, 'generate_seconds': generate_seconds, **result}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the app's hot paths on synthetic data.")
+    parser.add_argument("--sizes", type=rows, nargs="+", default=SIZES, help="rows per dataset, e.g. 1e3 1e5 1e7")
+    parser.add_argument("--out", help="write the JSON results here instead of stdout")
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "churn-benchmarks"),
+                        help="where synthetic datasets are generated and kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="timed calls per request-sized operation")
+    parser.add_argument("--table-repeats", type=int, default=TABLE_REPEATS, help="timed calls per whole-table operation")
+    parser.add_argument("--page-reruns", type=int, default=PAGE_RERUNS)
+    parser.add_argument("--page-timeout", type=float, default=PAGE_TIMEOUT)
+    parser.add_argument("--no-pages", action="store_true", help="skip the AppTest page reruns")
+    parser.add_argument("--child", metavar="DATA_DIR", help=argparse.SUPPRESS)
+    parser.add_argument("--child-out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = bench_dataset(args.child, args.repeats, args.table_repeats, args.page_reruns, args.page_timeout,
+                               pages=not args.no_pages)
+        with open(args.child_out, "w") as f:
+            json.dump(result, f)
+        sys.exit(0)
+
+    report = {'environment': environment(), 'runs': []}
+    for n_rows in args.sizes:
+        print(f"Benchmarking {n_rows} rows ...", file=sys.stderr)
+        report['runs'].append(run_size(n_rows, args))
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(payload + "\n")
+        print(f"-> {args.out}", file=sys.stderr)
+    else:
+        print(payload)
@@ -0,0 +1,71 @@
+"""Synthetic customer tables with the schema of the bundled datasets.
+
+Rows are bootstrapped from the real CSVs, so every column keeps its values,
+dtypes and joint distribution, while the identifying columns (id, names,
+email, phone) are generated fresh so ids stay unique and names combine into
+many more distinct full names. Tables are written as CSV in chunks, exactly
+like the source files the app converts on first use.
+
+    python -m benchmarks.synthetic 1000000 --out /tmp/churn-1m
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from churn.data import BASELINE_DATA_PATH, HOME_DATA_PATH
+
+CHUNK_ROWS = 1_000_000
+ID_PREFIX = "SYN-"
+
+
+def synthesize(template, n_rows, seed=0, start=0):
+    """``n_rows`` rows resampled from ``template``, numbered from ``start``."""
+    rng = np.random.default_rng([seed, start])
+    df = template.iloc[rng.integers(0, len(template), n_rows)].reset_index(drop=True)
+    numbers = pd.Series(np.arange(start, start + n_rows)).astype(str)
+    if 'Unnamed: 0' in df.columns:
+        df['Unnamed: 0'] = np.arange(start, start + n_rows)
+    if 'customer_id' in df.columns:
+        df['customer_id'] = ID_PREFIX + numbers.str.zfill(8)
+    if 'first_name' in df.columns and 'last_name' in df.columns:
+        first = pd.Series(rng.choice(template['first_name'].unique(), n_rows))
+        last = pd.Series(rng.choice(template['last_name'].unique(), n_rows))
+        df['first_name'] = first
+        df['last_name'] = last
+        if 'full_name' in df.columns:
+            df['full_name'] = first + " " + last
+        if 'email' in df.columns:
+            df['email'] = first.str.lower() + "." + last.str.lower() + numbers + "@example.com"
+    if 'Phone' in df.columns:
+        df['Phone'] = "+44-" + pd.Series(rng.integers(7_000_000_000, 8_000_000_000, n_rows)).astype(str)
+    return df
+
+
+def write_table(template_path, path, n_rows, seed=0, chunk_rows=CHUNK_ROWS):
+    template = pd.read_csv(template_path)
+    for start in range(0, n_rows, chunk_rows):
+        chunk = synthesize(template, min(chunk_rows, n_rows - start), seed, start)
+        chunk.to_csv(path, index=False, mode='w' if start == 0 else 'a', header=start == 0)
+    return path
+
+
+def write_dataset(directory, n_rows, seed=0, chunk_rows=CHUNK_ROWS,
+                  home_template=HOME_DATA_PATH, baseline_template=BASELINE_DATA_PATH):
+    """Write ``home_data.csv`` and ``baseline_model.csv`` with ``n_rows`` rows each into ``directory``."""
+    os.makedirs(directory, exist_ok=True)
+    return (
+        write_table(home_template, os.path.join(directory, "home_data.csv"), n_rows, seed, chunk_rows),
+        write_table(baseline_template, os.path.join(directory, "baseline_model.csv"), n_rows, seed, chunk_rows),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic customer dataset.")
+    parser.add_argument("rows", type=lambda value: int(float(value)), help="rows per table, e.g. 1e6")
+    parser.add_argument("--out", required=True, help="directory to write the CSVs to")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for path in write_dataset(args.out, args.rows, args.seed):
+        print(f"-> {path}")
@@ -0,0 +1,39 @@
+"""Wall-clock timing helpers that return JSON-ready summaries."""
+import time
+
+import numpy as np
+
+
+def summarize(seconds, ops=1):
+    """Summary of repeated timings; ``ops`` is how many operations each timing covered."""
+    seconds = np.asarray(seconds, dtype=np.float64)
+    summary = {
+        'repeats': int(len(seconds)),
+        'ops': ops,
+        'min': float(seconds.min()),
+        'median': float(np.median(seconds)),
+        'mean': float(seconds.mean()),
+        'max': float(seconds.max()),
+    }
+    if ops > 1:
+        summary['per_op_us'] = summary['median'] / ops * 1e6
+    return summary
+
+
+def timed(fn):
+    """``(fn(), seconds)`` for a single call."""
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def measure(fn, repeats, warmup=1, ops=1):
+    for _ in range(warmup):
+        fn()
+    return summarize([timed(fn)[1] for _ in range(repeats)], ops)
+
+
+def once(fn):
+    """``(fn(), summary)`` for a single, cold call such as building an index."""
+    result, seconds = timed(fn)
+    return result, summarize([seconds])
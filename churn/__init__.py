@@ -0,0 +1 @@
+"""Shared data, feature and scoring code used by the Streamlit pages."""
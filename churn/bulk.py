@@ -0,0 +1,272 @@
+"""Bulk churn report generation for a whole customer segment.
+
+``BulkReportJob`` takes customers that already carry their batch scores,
+reuses the precomputed SHAP table and fans report generation out over a
+bounded pool of asyncio workers that share one rate limit and retry
+transient failures (rate limits, timeouts, connection errors, 5xx) with
+exponential backoff; any other error fails the customer at once. Their LLM
+calls take the same per-process slots (``CHURN_LLM_CONCURRENCY``) as the
+reports streamed on the pages. Each finished report is written to the
+``ReportStore`` as it completes, so an interrupted run picks up where it
+stopped and the profile page can show the report without calling the LLM.
+
+    CHURN_LLM_CONCURRENCY=8 python -m churn.bulk --risk High --concurrency 8 --rate 4
+
+Point ``CHURN_LLM_BASE_URL`` at ``python -m churn.llm_stub`` to run a job
+against a local OpenAI-compatible stub.
+"""
+import argparse
+import asyncio
+import logging
+import random
+import threading
+import time
+
+import numpy as np
+import openai
+
+from churn.counterfactual import find_interventions
+from churn.data import load_home_data
+from churn.explain import explain_matrix, load_shap_table, shap_table_version
+from churn.features import encoder
+from churn.models import DEFAULT_MODEL, get_model
+from churn.report import PROMPT_VERSION, model_version, report_builder
+from churn.report_store import ReportStore, content_key
+from churn.scoring import attach_scores, load_or_build_scores
+
+logger = logging.getLogger(__name__)
+
+CONCURRENCY = 4
+RATE_LIMIT = 2.0
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+TRANSIENT_STATUS = {408, 409, 429}
+
+
+class RateLimiter:
+    """Async token bucket allowing ``rate`` acquisitions per second in bursts of up to ``burst``."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def backoff(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Full-jitter exponential delay before retrying after failed attempt number ``attempt``."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def is_transient(exc):
+    """Whether a failed LLM call may succeed when retried."""
+    if isinstance(exc, (TimeoutError, ConnectionError, openai.APIConnectionError)):
+        return True
+    status = getattr(exc, 'status_code', None)
+    return status is not None and (status in TRANSIENT_STATUS or status >= 500)
+
+
+class GenerationFailed(Exception):
+    """A report that could not be generated, after ``attempts`` LLM calls."""
+
+    def __init__(self, cause, attempts):
+        super().__init__(f"{cause!r} after {attempts} attempt(s)")
+        self.cause = cause
+        self.attempts = attempts
+
+
+def select_customers(df, customer_ids=None, risk=None):
+    if customer_ids is not None:
+        df = df[df['customer_id'].isin(list(customer_ids))]
+    if risk is not None:
+        df = df[df['churn_risk'] == risk]
+    return df
+
+
+class BulkReportJob:
+    """Generate and store reports for every customer in a scored frame that lacks a current one."""
+
+    def __init__(self, customers, store=None, builder=report_builder, shap_table=None,
+                 model_name=DEFAULT_MODEL, concurrency=CONCURRENCY, rate=RATE_LIMIT,
+                 max_attempts=MAX_ATTEMPTS):
+        self.customers = customers
+        self.store = store if store is not None else ReportStore()
+        self.builder = builder
+        self.shap_table = shap_table
+        self.model_name = model_name
+        self.concurrency = concurrency
+        self.rate = rate
+        self.max_attempts = max_attempts
+        self.total = len(customers)
+        self.skipped = 0
+        self.done = 0
+        self.failed = 0
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self.started_at is not None and self.finished_at is None
+
+    @property
+    def processed(self):
+        return self.skipped + self.done + self.failed
+
+    def cancel(self):
+        self._cancel.set()
+
+    def start(self):
+        """Run the job on a daemon thread."""
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self.run, name="bulk-reports", daemon=True)
+        self._thread.start()
+        return self
+
+    def run(self):
+        asyncio.run_coroutine_threadsafe(self.arun(), event_loop()).result()
+        return self
+
+    def _shap_values(self, customers):
+        """Precomputed SHAP rows, explaining only the customers missing from the table."""
+        values = np.empty((len(customers), encoder.n_features), dtype=np.float32)
+        missing = np.ones(len(customers), dtype=bool)
+        if self.shap_table is not None:
+            positions = self.shap_table.ids.get_indexer(customers['customer_id'].to_numpy())
+            found = positions >= 0
+            values[found] = self.shap_table.values[positions[found]]
+            missing = ~found
+        if missing.any():
+            values[missing] = explain_matrix(encoder.encode(customers[missing]), self.model_name)
+        return values
+
+    async def _generate(self, limiter, customer, shap_values, importances, interventions=None):
+        for attempt in range(1, self.max_attempts + 1):
+            await limiter.acquire()
+            try:
+                report = await self.builder.agenerate(customer, shap_values, importances, customer['churn_score'],
+                                                      interventions)
+                return report, attempt
+            except Exception as exc:
+                if attempt == self.max_attempts or not is_transient(exc):
+                    raise GenerationFailed(exc, attempt) from exc
+                delay = backoff(attempt)
+                logger.warning("Report for %s failed (attempt %d/%d): %r; retrying in %.1fs",
+                               customer['customer_id'], attempt, self.max_attempts, exc, delay)
+                await asyncio.sleep(delay)
+
+    async def arun(self):
+        self.started_at = self.started_at or time.time()
+        try:
+            version = model_version(self.model_name)
+            # A stored report is current only if the customer's features and SHAP values are unchanged
+            shap_values = self._shap_values(self.customers)
+            X = encoder.encode(self.customers)
+            ids = self.customers['customer_id'].to_numpy()
+            keys = {customer_id: content_key(x, row, version) for customer_id, x, row in zip(ids, X, shap_values)}
+            pending = ~np.isin(ids, list(self.store.completed(keys, version, PROMPT_VERSION)))
+            self.skipped = self.total - int(pending.sum())
+            if not pending.any():
+                return
+
+            model = get_model(self.model_name)
+            importances = getattr(model, 'feature_importances_', np.zeros(encoder.n_features))
+            queue = asyncio.Queue()
+            for customer, row, x in zip(self.customers[pending].to_dict('records'), shap_values[pending], X[pending]):
+                queue.put_nowait((customer, row, x))
+            limiter = RateLimiter(self.rate)
+
+            async def worker():
+                while not self._cancel.is_set() and not queue.empty():
+                    customer, row, x = queue.get_nowait()
+                    customer_id = customer['customer_id']
+                    try:
+                        # Off the event loop: the search scores a few hundred candidates on the CPU
+                        interventions = await asyncio.to_thread(find_interventions, customer, x, model)
+                        report, attempts = await self._generate(limiter, customer, row, importances, interventions)
+                    except Exception as exc:
+                        cause, attempts = (exc.cause, exc.attempts) if isinstance(exc, GenerationFailed) else (exc, 0)
+                        logger.error("Giving up on report for %s after %d attempt(s): %r", customer_id, attempts, cause)
+                        self.store.fail(customer_id, version, PROMPT_VERSION, repr(cause), attempts, keys[customer_id])
+                        self.failed += 1
+                    else:
+                        self.store.put(customer_id, version, PROMPT_VERSION, report, attempts, keys[customer_id])
+                        self.done += 1
+
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, queue.qsize()))))
+        finally:
+            self.finished_at = time.time()
+
+
+# ========== Background Job (one per process) ==========
+
+_job = None
+_job_lock = threading.Lock()
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def event_loop():
+    """The event loop every job of this process runs on, on its own daemon thread.
+
+    The async LLM client pools its connections process-wide and binds them to
+    the loop that opened them, so a fresh loop per job would inherit
+    connections of an already closed one.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="bulk-event-loop", daemon=True).start()
+        return _loop
+
+
+def current_job():
+    return _job
+
+
+def start_job(customers, **kwargs):
+    """Start a background job for ``customers`` unless one is already running; returns the active job."""
+    global _job
+    with _job_lock:
+        if _job is None or not _job.running:
+            _job = BulkReportJob(customers, **kwargs).start()
+        return _job
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate churn reports for a customer segment.")
+    parser.add_argument("--risk", choices=["High", "Medium", "Low", "Churned"], help="only customers in this risk bucket")
+    parser.add_argument("--ids", nargs="+", help="only these customer_ids")
+    parser.add_argument("--limit", type=int, help="at most this many customers")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT, help="LLM requests per second (0 = unlimited)")
+    parser.add_argument("--attempts", type=int, default=MAX_ATTEMPTS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    customers = select_customers(attach_scores(load_home_data(), load_or_build_scores()), args.ids, args.risk)
+    if args.limit is not None:
+        customers = customers.head(args.limit)
+    shap_table = load_shap_table() if shap_table_version() else None
+    job = BulkReportJob(customers, shap_table=shap_table, concurrency=args.concurrency,
+                        rate=args.rate, max_attempts=args.attempts).run()
+    elapsed = job.finished_at - job.started_at
+    print(f"{job.total} customers: {job.done} generated, {job.skipped} already current, "
+          f"{job.failed} failed in {elapsed:.1f}s")
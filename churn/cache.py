@@ -0,0 +1,120 @@
+"""Streamlit-cached services shared by every page.
+
+Each dataset is loaded once per process into a ``DataService`` through
+``st.cache_resource``; all pages and sessions read views of that one frame
+and the indexes derived from it, which are rebuilt when the data version
+changes.
+"""
+import streamlit as st
+
+from churn.compare import compare_models
+from churn.counterfactual import find_interventions
+from churn.cube import AggregateCube
+from churn.data import BASELINE_DATA_PATH, HOME_DATA_PATH
+from churn.explain import build_shap_values_async, load_shap_table, shap_table_version
+from churn.figures import FigureCache
+from churn.filters import FilterIndex
+from churn.report import model_version
+from churn.report_store import ReportStore
+from churn.scoring import SCORES_PATH, attach_scores, load_or_build_scores
+from churn.search import NameIndex
+from churn.service import DataService
+from churn.stats import DashboardStats
+from churn.sweep import Population
+from churn.store import CustomerStore
+
+INTERVENTIONS_CACHE_SIZE = 256
+
+
+def _attach_live_scores(df):
+    return attach_scores(df, load_or_build_scores())
+
+
+@st.cache_resource(show_spinner=False)
+def _customer_service():
+    return DataService(HOME_DATA_PATH, prepare=_attach_live_scores, watch=(SCORES_PATH,))
+
+
+@st.cache_resource(show_spinner=False)
+def _baseline_service():
+    return DataService(BASELINE_DATA_PATH)
+
+
+def get_customer_service():
+    service = _customer_service()
+    service.refresh_if_changed()
+    return service
+
+
+def get_baseline_service():
+    service = _baseline_service()
+    service.refresh_if_changed()
+    return service
+
+
+def get_dashboard_stats():
+    return get_baseline_service().derived('stats', DashboardStats)
+
+
+def get_model_comparison():
+    return get_baseline_service().derived('comparison', compare_models)
+
+
+def get_figure_cache():
+    """Dashboard figures of the current baseline data; a new version (or service) starts an empty cache."""
+    return get_baseline_service().derived('figures', lambda frame: FigureCache())
+
+
+def get_population():
+    return get_baseline_service().derived('population', Population)
+
+
+def get_customer_store():
+    return get_customer_service().derived('store', CustomerStore)
+
+
+def get_filter_index():
+    return get_customer_service().derived('filters', FilterIndex)
+
+
+def get_aggregate_cube():
+    return get_customer_service().derived('cube', AggregateCube)
+
+
+def get_name_index():
+    return get_customer_service().derived('names', NameIndex)
+
+
+# Only the current table is kept: each ingest bumps the version and the old table is dropped
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _shap_table(version):
+    return load_shap_table() if version else None
+
+
+def get_shap_table():
+    """Precomputed SHAP values, or None while the background job is still building them."""
+    version = shap_table_version()
+    if version is None:
+        # The customer data (or model) changed since the table was built, e.g. home_data.csv was replaced
+        build_shap_values_async()
+    return _shap_table(version)
+
+
+@st.cache_resource(show_spinner=False)
+def get_report_store():
+    return ReportStore()
+
+
+@st.cache_resource(show_spinner=False, max_entries=INTERVENTIONS_CACHE_SIZE)
+def _interventions(customer_id, version, x, _customer):
+    return find_interventions(_customer, x)
+
+
+def get_interventions(customer, x):
+    """Model-tested interventions for a customer (a raw dict) with encoded row ``x``; None once they churned.
+
+    Searched once per customer, feature values and model version.
+    """
+    if customer['subscription_status'] == "Cancelled":
+        return None
+    return _interventions(customer['customer_id'], model_version(), x, customer)
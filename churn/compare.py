@@ -0,0 +1,123 @@
+"""Champion/challenger comparison of every model in the registry.
+
+``compare_models`` encodes a frame once and runs each registered model over
+the same matrix, recording its churn probabilities next to its batch and
+single-row inference latency, file and in-memory size, agreement with the
+other models and, when the frame carries labels, accuracy and ROC AUC.
+
+    python -m churn.compare            # baseline_model.csv, with labels
+    python -m churn.compare --customers
+
+``--customers`` scores the customer table with every model and writes the
+probabilities side by side to ``data/model_scores.parquet``.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+
+from churn.data import DATA_DIR, load_baseline_data, load_home_data, write_parquet
+from churn.features import encoder
+from churn.inference import best_seconds, predictor_for
+from churn.models import DEFAULT_MODEL, get_registry
+from churn.scoring import scoring_columns
+
+MODEL_SCORES_PATH = os.path.join(DATA_DIR, "model_scores.parquet")
+LATENCY_REPEATS = 3
+SINGLE_ROW_REPEATS = 20
+
+
+def churn_labels(df):
+    """1 for churned customers, 0 otherwise; None when the frame has no label column."""
+    if 'subscription_status' in df.columns:
+        return (df['subscription_status'] == 'Cancelled').to_numpy(dtype=np.int8)
+    if 'churn' in df.columns:
+        return df['churn'].to_numpy(dtype=np.int8)
+    return None
+
+
+class ModelComparison:
+    def __init__(self, probabilities, summary, agreement, champion):
+        self.probabilities = probabilities
+        self.summary = summary
+        self.agreement = agreement
+        self.champion = champion
+
+    @property
+    def models(self):
+        return list(self.summary.index)
+
+    def predictions(self, threshold=0.5):
+        return self.probabilities[self.models] >= threshold
+
+    def unanimous_rate(self):
+        """Share of rows on which every model predicts the same label."""
+        predictions = self.predictions().to_numpy()
+        return float((predictions.all(axis=1) | ~predictions.any(axis=1)).mean())
+
+
+def compare_models(df, labels=None, keys=None, champion=DEFAULT_MODEL, repeats=LATENCY_REPEATS):
+    """Run every model (or ``keys``) over ``df`` with one shared encoding and compare them."""
+    registry = get_registry()
+    names = [registry.resolve(key) for key in keys] if keys else list(registry.available())
+    labels = churn_labels(df) if labels is None else np.asarray(labels)
+    X = encoder.encode(df)
+    single = X[:1]
+
+    probabilities = {}
+    rows = []
+    for name in names:
+        entry = registry.entry(name)
+        predictor = predictor_for(entry.model)
+        batch_seconds = best_seconds(lambda: predictor.proba(X), repeats)
+        probabilities[name] = predictor.proba(X).astype(np.float32)
+        single_seconds = [best_seconds(lambda: predictor.proba(single), 1) for _ in range(SINGLE_ROW_REPEATS)]
+        row = {
+            'model': name,
+            'kind': entry.kind,
+            'file_bytes': entry.file_bytes,
+            'memory_bytes': entry.memory_bytes,
+            'load_seconds': entry.load_seconds,
+            'batch_seconds': batch_seconds,
+            'per_row_us': batch_seconds / max(len(X), 1) * 1e6,
+            'single_row_ms': float(np.median(single_seconds)) * 1e3,
+            'positive_rate': float((probabilities[name] >= 0.5).mean()),
+        }
+        if labels is not None:
+            row['accuracy'] = float(((probabilities[name] >= 0.5) == labels).mean())
+            row['roc_auc'] = float(roc_auc_score(labels, probabilities[name])) if len(np.unique(labels)) > 1 else float('nan')
+        rows.append(row)
+
+    summary = pd.DataFrame(rows).set_index('model')
+    predictions = {name: proba >= 0.5 for name, proba in probabilities.items()}
+    agreement = pd.DataFrame(
+        [[float((predictions[a] == predictions[b]).mean()) for b in names] for a in names],
+        index=names, columns=names,
+    )
+    if champion in agreement:
+        summary['agreement_with_champion'] = agreement[champion]
+
+    probabilities = pd.DataFrame(probabilities)
+    if 'customer_id' in df.columns:
+        probabilities.insert(0, 'customer_id', df['customer_id'].to_numpy())
+    return ModelComparison(probabilities, summary, agreement, champion)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare every registered model side by side.")
+    parser.add_argument("--customers", action="store_true",
+                        help=f"score the customer table and write {MODEL_SCORES_PATH}")
+    args = parser.parse_args()
+
+    df = load_home_data(columns=scoring_columns()) if args.customers else load_baseline_data()
+    comparison = compare_models(df)
+    pd.set_option("display.width", 200)
+    print(comparison.summary.to_string(float_format=lambda v: f"{v:.4g}"))
+    print()
+    print(comparison.agreement.to_string(float_format=lambda v: f"{v:.3f}"))
+    print(f"\nAll models agree on {comparison.unanimous_rate():.1%} of {len(df)} rows")
+    if args.customers:
+        write_parquet(comparison.probabilities, MODEL_SCORES_PATH)
+        print(f"-> {MODEL_SCORES_PATH}")
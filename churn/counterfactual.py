@@ -0,0 +1,169 @@
+"""Counterfactual search for the cheapest retention intervention.
+
+``ACTIONABLE_FEATURES`` declares what an agent can actually change for a
+customer and to which values. ``find_interventions`` runs a beam search over
+sets of such changes: every level adds one more change to the
+``beam_width`` most promising sets of the level before, all candidates of a
+level are scored in one ``predict_proba`` batch on the customer's encoded
+row, and sets containing an already successful set are pruned. The result is
+the smallest change sets that bring the churn probability below the
+threshold, which the profile page shows and the report prompt cites.
+"""
+import json
+import time
+
+import numpy as np
+
+from churn.features import encoder
+from churn.models import DEFAULT_MODEL, get_model
+from churn.scoring import MEDIUM_RISK_THRESHOLD
+from churn.sweep import predict
+
+# values: every value the feature may be set to; range/step: numeric grid;
+# cost: weight of changing it (ties between equally small sets go to the cheaper one)
+ACTIONABLE_FEATURES = {
+    'auto_renew': {'values': ['Yes', 'No']},
+    'plan_type': {'values': ['Monthly', 'Annual']},
+    'subscription_type': {'values': ['Espresso', 'Digital', 'Digital+Print'], 'cost': 1.5},
+    'discount_used_last_renewal': {'values': ['Yes', 'No']},
+    'last_campaign_engaged': {'values': ['Newsletter Promo', 'Retention Offer', 'Survey']},
+    'payment_method': {'values': ['Credit Card', 'Debit Card', 'PayPal']},
+    'support_tickets_last_90d': {'range': (0, 10), 'step': 1},
+}
+
+MAX_CHANGES = 3
+BEAM_WIDTH = 32
+MAX_RESULTS = 3
+
+
+def _allowed_values(spec):
+    if 'values' in spec:
+        return list(spec['values'])
+    low, high = spec['range']
+    return list(np.arange(low, high + spec.get('step', 1), spec.get('step', 1)))
+
+
+def _same(a, b):
+    if isinstance(a, str) or isinstance(b, str):
+        return str(a) == str(b)
+    return float(a) == float(b)
+
+
+class Intervention:
+    def __init__(self, changes, proba, cost):
+        self.changes = changes
+        self.proba = proba
+        self.cost = cost
+
+    @property
+    def size(self):
+        return len(self.changes)
+
+    def describe(self):
+        return ", ".join(f"{feature}: {old} → {new}" for feature, old, new in self.changes)
+
+    def as_dict(self):
+        return {
+            'changes': {feature: {'from': _plain(old), 'to': _plain(new)} for feature, old, new in self.changes},
+            'churn_probability': round(float(self.proba), 4),
+            'cost': self.cost,
+        }
+
+
+class Counterfactuals:
+    """Interventions found for one customer, the best candidate seen, and what the search cost."""
+
+    def __init__(self, proba, threshold, interventions, best, evaluated, seconds):
+        self.proba = proba
+        self.threshold = threshold
+        self.interventions = interventions
+        self.best = best
+        self.evaluated = evaluated
+        self.seconds = seconds
+
+    def as_dict(self):
+        return {
+            'churn_probability': round(float(self.proba), 4),
+            'threshold': self.threshold,
+            'interventions': [i.as_dict() for i in self.interventions],
+            'best_effort': self.best.as_dict() if self.best is not None and not self.interventions else None,
+        }
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def find_interventions(customer, x=None, model=None, threshold=MEDIUM_RISK_THRESHOLD, actions=ACTIONABLE_FEATURES,
+                       max_changes=MAX_CHANGES, beam_width=BEAM_WIDTH, max_results=MAX_RESULTS):
+    """Smallest sets of actionable changes to ``customer`` (a raw dict) that score below ``threshold``.
+
+    ``x`` is the customer's encoded row (encoded from ``customer`` when not
+    given) and ``model`` defaults to the default model.
+    """
+    started = time.perf_counter()
+    model = get_model(DEFAULT_MODEL) if model is None else model
+    x = encoder.encode(customer) if x is None else np.asarray(x, dtype=np.float32).reshape(1, -1)
+    proba = float(predict(model, x)[0])
+    if proba < threshold:
+        return Counterfactuals(proba, threshold, [], None, 1, time.perf_counter() - started)
+
+    # One option per (feature, new value); each carries that value's encoded block
+    features, options = [], []
+    for feature, spec in actions.items():
+        if feature not in customer:
+            continue
+        values = [v for v in _allowed_values(spec) if not _same(v, customer[feature])]
+        if not values:
+            continue
+        indices, block = encoder.encode_column(feature, values)
+        features.append((feature, indices, spec.get('cost', 1.0)))
+        options += [(len(features) - 1, value, block[i]) for i, value in enumerate(values)]
+
+    def evaluate(states):
+        X = np.repeat(x, len(states), axis=0)
+        for row, state in enumerate(states):
+            for option in state:
+                f, _, block = options[option]
+                X[row, features[f][1]] = block
+        return predict(model, X)
+
+    def intervention(state, p):
+        changes = [(features[options[o][0]][0], customer[features[options[o][0]][0]], options[o][1]) for o in state]
+        return Intervention(changes, float(p), sum(features[options[o][0]][2] for o in state))
+
+    found, best, evaluated = [], None, 0
+    frontier = [(o,) for o in range(len(options))]
+    for _ in range(max_changes):
+        if not frontier:
+            break
+        scores = evaluate(frontier)
+        evaluated += len(frontier)
+        order = np.argsort(scores, kind='stable')
+        if best is None or scores[order[0]] < best[1]:
+            best = (frontier[order[0]], scores[order[0]])
+        found += [(frontier[i], scores[i]) for i in order if scores[i] < threshold]
+        if len(found) >= max_results:
+            break
+        successes = [frozenset(state) for state, _ in found]
+        expanded = set()
+        for i in [i for i in order if scores[i] >= threshold][:beam_width]:
+            used = {options[o][0] for o in frontier[i]}
+            for o in range(len(options)):
+                if options[o][0] in used:
+                    continue
+                state = tuple(sorted(frontier[i] + (o,)))
+                if not any(success <= frozenset(state) for success in successes):
+                    expanded.add(state)
+        frontier = sorted(expanded)
+
+    interventions = sorted((intervention(state, p) for state, p in found), key=lambda i: (i.size, i.cost, i.proba))
+    return Counterfactuals(proba, threshold, interventions[:max_results],
+                           intervention(*best) if best is not None else None, evaluated, time.perf_counter() - started)
+
+
+def interventions_payload(counterfactuals):
+    """Compact JSON of the model-tested interventions for the report prompt."""
+    if counterfactuals is None:
+        return "[]"
+    return json.dumps(counterfactuals.as_dict(), separators=(',', ':'), default=str)
@@ -0,0 +1,76 @@
+"""Precomputed customer counts for every Home page filter combination.
+
+Cells are keyed by one value (or ``"All"``) per filter dimension and hold the
+counts broken down by ``subscription_status`` x ``churn_risk``, so any filter
+selection and its metric cards are answered with a dictionary lookup.
+"""
+from collections import Counter, defaultdict
+from itertools import product
+
+from churn.filters import ALL, FILTER_COLUMNS
+
+BREAKDOWN = ('subscription_status', 'churn_risk')
+
+
+class AggregateCube:
+    def __init__(self, df=None, dimensions=FILTER_COLUMNS, breakdown=BREAKDOWN):
+        self.dimensions = list(dimensions)
+        self.breakdown_columns = list(breakdown)
+        self.cells = defaultdict(Counter)
+        # Every way of rolling dimensions up to "All": 2 ** len(dimensions) masks
+        self._rollups = list(product((False, True), repeat=len(self.dimensions)))
+        if df is not None:
+            self.add(df)
+
+    def copy(self):
+        """An independent cube, safe to ``add``/``remove`` on while this one is being read."""
+        cube = AggregateCube(dimensions=self.dimensions, breakdown=self.breakdown_columns)
+        cube.cells = defaultdict(Counter, {key: Counter(cell) for key, cell in self.cells.items()})
+        return cube
+
+    def add(self, df):
+        """Count new rows into every cell they belong to; no full recount."""
+        self._update(df, 1)
+
+    def remove(self, df):
+        """Take previously counted rows back out, e.g. before re-adding updated versions."""
+        self._update(df, -1)
+
+    def _update(self, df, sign):
+        if len(df) == 0:
+            return
+        columns = self.dimensions + [col for col in self.breakdown_columns if col not in self.dimensions]
+        groups = df.groupby(columns, observed=True, dropna=False).size()
+        for values, count in groups.items():
+            base = values[:len(self.dimensions)]
+            by = tuple(values[columns.index(col)] for col in self.breakdown_columns)
+            for rollup in self._rollups:
+                key = tuple(ALL if rolled else value for rolled, value in zip(rollup, base))
+                cell = self.cells[key]
+                cell[by] += sign * count
+                if cell[by] == 0:
+                    del cell[by]
+                if not cell:
+                    del self.cells[key]
+
+    def key(self, selection=None):
+        selection = selection or {}
+        return tuple(
+            ALL if selection.get(dim) is None else selection.get(dim, ALL)
+            for dim in self.dimensions
+        )
+
+    def counts(self, selection=None):
+        """Counter of (status, risk) -> customers for the selection."""
+        return self.cells.get(self.key(selection), Counter())
+
+    def total(self, selection=None):
+        return sum(self.counts(selection).values())
+
+    def breakdown(self, column, selection=None):
+        """{value: customers} of one breakdown column within the selection."""
+        position = self.breakdown_columns.index(column)
+        result = Counter()
+        for values, count in self.counts(selection).items():
+            result[values[position]] += count
+        return dict(result)
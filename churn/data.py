@@ -0,0 +1,96 @@
+"""Dataset locations and loaders.
+
+The CSVs in ``data/`` (or ``$CHURN_DATA_DIR``) stay the source of truth. On
+first use (or whenever a CSV is newer) each one is converted to a typed Parquet
+file next to it: categorical dtypes for low-cardinality text columns, real
+datetimes for the subscription dates and the narrowest numeric types that hold
+the values. Loaders read from the Parquet file, memory-mapped and limited to
+the requested columns. Run ``python -m churn.data`` to convert ahead of time.
+"""
+import os
+import threading
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+DATA_DIR = os.getenv("CHURN_DATA_DIR", "data")
+HOME_DATA_PATH = os.path.join(DATA_DIR, "home_data.csv")
+BASELINE_DATA_PATH = os.path.join(DATA_DIR, "baseline_model.csv")
+
+CATEGORICAL_COLUMNS = ['subscription_type', 'plan_type', 'auto_renew',
+    'discount_used_last_renewal', 'region', 'most_read_category', 'primary_device',
+    'previous_renewal_status', 'last_campaign_engaged', 'gender', 'signup_source',
+    'payment_method', 'downgrade_history', 'subscription_status', 'churn_risk']
+DATE_COLUMNS = ['subscription_start_date', 'subscription_end_date']
+DROP_COLUMNS = ['Unnamed: 0']
+
+_convert_lock = threading.Lock()
+
+
+def file_version(path):
+    """Cheap version token for a file: changes whenever it is rewritten."""
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def columnar_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def typed_frame(df):
+    """Apply the storage schema to a frame parsed from CSV."""
+    df = df.drop(columns=[col for col in DROP_COLUMNS if col in df.columns])
+    for col in df.columns:
+        if col in CATEGORICAL_COLUMNS:
+            df[col] = df[col].astype('category')
+        elif col in DATE_COLUMNS:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        elif pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+        elif pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype('float32')
+    return df
+
+
+def write_parquet(df, path):
+    """Write ``df`` to ``path`` atomically, so readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def convert_csv(csv_path):
+    """Write the typed Parquet copy of ``csv_path`` atomically and return its path."""
+    return write_parquet(typed_frame(pd.read_csv(csv_path)), columnar_path(csv_path))
+
+
+def ensure_columnar(csv_path):
+    path = columnar_path(csv_path)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(csv_path):
+        return path
+    with _convert_lock:
+        if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(csv_path):
+            return path
+        return convert_csv(csv_path)
+
+
+def available_columns(csv_path):
+    return pq.read_schema(ensure_columnar(csv_path)).names
+
+
+def load_columnar(csv_path, columns=None):
+    return pd.read_parquet(ensure_columnar(csv_path), columns=columns, memory_map=True)
+
+
+def load_home_data(path=HOME_DATA_PATH, columns=None):
+    return load_columnar(path, columns)
+
+
+def load_baseline_data(path=BASELINE_DATA_PATH, columns=None):
+    return load_columnar(path, columns)
+
+
+if __name__ == "__main__":
+    for csv_path in (HOME_DATA_PATH, BASELINE_DATA_PATH):
+        print(f"{csv_path} -> {convert_csv(csv_path)}")
@@ -0,0 +1,127 @@
+"""Cached SHAP explainers and precomputed per-customer SHAP values.
+
+Run ``python -m churn.explain`` to (re)build ``data/shap_values.parquet``: one
+float32 column per model feature, one row per ``customer_id``. The profile
+page reads attributions from that table and only falls back to explaining
+the row itself (with a cached explainer) while the table is being built.
+The app rebuilds it in the background whenever the customer data or model
+is newer than the table.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import shap
+
+from churn.data import DATA_DIR, HOME_DATA_PATH, file_version, load_home_data, write_parquet
+from churn.features import MODEL_FEATURES, SCHEMA_VERSION, encoder
+from churn.models import DEFAULT_MODEL, get_registry
+from churn.scoring import is_stale, scoring_columns
+
+SHAP_PATH = os.path.join(DATA_DIR, "shap_values.parquet")
+BATCH_SIZE = 50_000
+
+_explainers = {}
+_explainers_lock = threading.Lock()
+_build_lock = threading.Lock()
+_build_thread = None
+_build_thread_lock = threading.Lock()
+
+
+def get_explainer(model_name=DEFAULT_MODEL):
+    """One ``TreeExplainer`` per model, built on first use and reused afterwards."""
+    entry = get_registry().entry(model_name)
+    key = (entry.name, entry.path)
+    explainer = _explainers.get(key)
+    if explainer is None:
+        with _explainers_lock:
+            explainer = _explainers.get(key)
+            if explainer is None:
+                explainer = _explainers[key] = shap.TreeExplainer(entry.model)
+    return explainer
+
+
+def base_value(model_name=DEFAULT_MODEL):
+    return float(np.ravel(get_explainer(model_name).expected_value)[0])
+
+
+def explain_matrix(X, model_name=DEFAULT_MODEL, batch_size=BATCH_SIZE):
+    """SHAP values for an encoded matrix, computed in batches into one float32 array."""
+    explainer = get_explainer(model_name)
+    values = np.empty(X.shape, dtype=np.float32)
+    for start in range(0, len(X), batch_size):
+        stop = start + batch_size
+        values[start:stop] = explainer.shap_values(X[start:stop], check_additivity=False)
+    return values
+
+
+def build_shap_values(data_path=HOME_DATA_PATH, model_name=DEFAULT_MODEL, path=SHAP_PATH, batch_size=BATCH_SIZE):
+    df = load_home_data(data_path, columns=scoring_columns(data_path))
+    values = explain_matrix(encoder.encode(df), model_name, batch_size)
+    table = pd.DataFrame(values, columns=MODEL_FEATURES)
+    table.insert(0, 'customer_id', df['customer_id'].to_numpy())
+    table.attrs['schema_version'] = SCHEMA_VERSION
+    table.attrs['model'] = model_name
+    table.attrs['base_value'] = base_value(model_name)
+    write_parquet(table, path)
+    return table
+
+
+def build_shap_values_async(path=SHAP_PATH):
+    """Rebuild the SHAP table on a daemon thread if it is missing or stale, one build at a time."""
+    global _build_thread
+
+    def run():
+        with _build_lock:
+            if is_stale(path):
+                build_shap_values(path=path)
+
+    with _build_thread_lock:
+        if _build_thread is None or not _build_thread.is_alive():
+            _build_thread = threading.Thread(target=run, name="shap-precompute", daemon=True)
+            _build_thread.start()
+        return _build_thread
+
+
+class ShapTable:
+    """Read-only customers x features float32 matrix with a ``customer_id`` index."""
+
+    def __init__(self, ids, values, base_value):
+        self.ids = pd.Index(ids)
+        self.values = values
+        self.base_value = base_value
+
+    def row(self, customer_id):
+        position = self.ids.get_indexer([customer_id])[0]
+        return None if position < 0 else self.values[position]
+
+
+def shap_table_version(path=SHAP_PATH):
+    """File version of a fresh SHAP table, or None when it needs rebuilding."""
+    if is_stale(path):
+        return None
+    return file_version(path)
+
+
+def load_shap_table(path=SHAP_PATH):
+    if not os.path.exists(path):
+        return None
+    table = pd.read_parquet(path)
+    values = table[MODEL_FEATURES].to_numpy(dtype=np.float32)
+    values.flags.writeable = False
+    return ShapTable(table['customer_id'].to_numpy(), values, table.attrs.get('base_value'))
+
+
+def customer_shap_values(customer_id, X, table=None, model_name=DEFAULT_MODEL):
+    """Precomputed SHAP row for a customer, explaining ``X`` directly if it isn't in ``table``."""
+    if table is not None:
+        row = table.row(customer_id)
+        if row is not None:
+            return row
+    return explain_matrix(np.asarray(X, dtype=np.float32), model_name)[0]
+
+
+if __name__ == "__main__":
+    table = build_shap_values()
+    print(f"Explained {len(table)} customers -> {SHAP_PATH}")
@@ -0,0 +1,202 @@
+"""Schema-driven feature encoder shared by the pages and the batch scoring stage.
+
+The schema below declares how every raw customer column becomes model input.
+``FeatureEncoder`` compiles it once into category -> column-index lookup tables
+and encodes any number of rows straight into a float32 matrix laid out in
+``MODEL_FEATURES`` order.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MODEL_FEATURES = ['subscription_type', 'plan_type', 'auto_renew',
+    'avg_articles_per_week', 'days_since_last_login',
+    'support_tickets_last_90d', 'discount_used_last_renewal',
+    'email_open_rate', 'time_spent_per_session_mins',
+    'completion_rate', 'article_skips_per_week',
+    'previous_renewal_status', 'campaign_ctr', 'nps_score',
+    'sentiment_score', 'csat_score', 'customer_age', 'signup_source',
+    'downgrade_history', 'tenure_days', 'region_Asia', 'region_Europe',
+    'region_North America', 'region_Others', 'most_read_Culture',
+    'most_read_Environment', 'most_read_Finance', 'most_read_Politics',
+    'most_read_Technology', 'primary_device_Desktop',
+    'primary_device_Mobile', 'primary_device_Tablet',
+    'payment_method_Credit Card', 'payment_method_Debit Card',
+    'payment_method_PayPal', 'last_campaign_engaged_Newsletter Promo',
+    'last_campaign_engaged_Retention Offer',
+    'last_campaign_engaged_Survey']
+
+# ========== Feature Schema ==========
+
+NUMERIC_FEATURES = ['avg_articles_per_week', 'days_since_last_login',
+    'support_tickets_last_90d', 'email_open_rate', 'time_spent_per_session_mins',
+    'completion_rate', 'article_skips_per_week', 'campaign_ctr', 'nps_score',
+    'sentiment_score', 'csat_score', 'customer_age', 'tenure_days']
+
+ORDINAL_FEATURES = {
+    'subscription_type': {'Espresso': 0, 'Digital': 1, 'Digital+Print': 2},
+    'plan_type': {'Monthly': 0, 'Annual': 1},
+    'auto_renew': {'Yes': 1, 'No': 0},
+    'discount_used_last_renewal': {'Yes': 1, 'No': 0},
+    'downgrade_history': {'Yes': 1, 'No': 0},
+    'previous_renewal_status': {'Auto': 1, 'Manual': 0},
+    'signup_source': {'Web': 0, 'Mobile App': 0, 'Referral': 1},
+}
+
+# prefix: model column prefix, aliases: raw value -> model category,
+# reference: raw values that intentionally encode as all zeros
+ONE_HOT_FEATURES = {
+    'region': {'prefix': 'region', 'aliases': {'Other': 'Others'}},
+    'most_read_category': {'prefix': 'most_read'},
+    'primary_device': {'prefix': 'primary_device'},
+    'payment_method': {'prefix': 'payment_method'},
+    'last_campaign_engaged': {'prefix': 'last_campaign_engaged', 'reference': ['No Data']},
+}
+
+INPUT_COLUMNS = NUMERIC_FEATURES + list(ORDINAL_FEATURES) + list(ONE_HOT_FEATURES)
+
+SCHEMA_VERSION = 2
+
+
+class FeatureEncoder:
+    """Compiled form of the feature schema for a given model column order."""
+
+    def __init__(self, features=MODEL_FEATURES, numeric=NUMERIC_FEATURES,
+                 ordinal=ORDINAL_FEATURES, one_hot=ONE_HOT_FEATURES):
+        self.features = list(features)
+        self.n_features = len(self.features)
+        self.index = {name: i for i, name in enumerate(self.features)}
+
+        self.numeric = [(col, self.index[col]) for col in numeric if col in self.index]
+        self.ordinal = [(col, self.index[col], mapping) for col, mapping in ordinal.items() if col in self.index]
+        self.one_hot = []
+        for col, spec in one_hot.items():
+            prefix = spec['prefix'] + '_'
+            lookup = {name[len(prefix):]: i for name, i in self.index.items() if name.startswith(prefix)}
+            if not lookup:
+                logger.warning("One-hot feature %r matches no model column with prefix %r", col, prefix)
+            for raw, category in spec.get('aliases', {}).items():
+                if category in lookup:
+                    lookup[raw] = lookup[category]
+            self.one_hot.append((col, lookup, frozenset(spec.get('reference', ()))))
+
+        covered = {idx for _, idx in self.numeric} | {idx for _, idx, _ in self.ordinal}
+        for _, lookup, _ in self.one_hot:
+            covered.update(lookup.values())
+        self.unmatched_features = [name for i, name in enumerate(self.features) if i not in covered]
+        if self.unmatched_features:
+            logger.warning("Model features not produced by the schema: %s", self.unmatched_features)
+        self._reported = set()
+
+    def encode(self, data):
+        """Encode a dict, a list of dicts or a DataFrame into an (n, n_features) float32 matrix."""
+        columns, n = _columns(data)
+        X = np.zeros((n, self.n_features), dtype=np.float32)
+        if n == 0:
+            return X
+        for col, idx in self.numeric:
+            values = columns.get(col)
+            if values is not None:
+                X[:, idx] = np.nan_to_num(np.asarray(values, dtype=np.float32))
+        for col, idx, mapping in self.ordinal:
+            values = columns.get(col)
+            if values is not None:
+                codes, uniques = _factorize(values)
+                self._report(col, uniques, mapping)
+                table = np.array([mapping.get(u, 0) for u in uniques] + [0], dtype=np.float32)
+                X[:, idx] = table[codes]
+        rows = np.arange(n)
+        for col, lookup, reference in self.one_hot:
+            values = columns.get(col)
+            if values is not None:
+                codes, uniques = _factorize(values)
+                self._report(col, uniques, lookup, reference)
+                table = np.array([lookup.get(u, -1) for u in uniques] + [-1], dtype=np.intp)
+                target = table[codes]
+                hit = target >= 0
+                X[rows[hit], target[hit]] = 1.0
+        return X
+
+    def unmatched_values(self, data):
+        """Raw categorical values in ``data`` that have no model column, per input column."""
+        columns, _ = _columns(data)
+        unmatched = {}
+        specs = [(col, mapping, ()) for col, _, mapping in self.ordinal] + list(self.one_hot)
+        for col, lookup, reference in specs:
+            values = columns.get(col)
+            if values is None:
+                continue
+            _, uniques = _factorize(values)
+            missing = [u for u in uniques if u not in lookup and u not in reference]
+            if missing:
+                unmatched[col] = missing
+        return unmatched
+
+    def column_indices(self, col):
+        """Model column indices that raw column ``col`` is encoded into."""
+        indices = [idx for name, idx in self.numeric if name == col]
+        indices += [idx for name, idx, _ in self.ordinal if name == col]
+        for name, lookup, _ in self.one_hot:
+            if name == col:
+                indices += sorted(set(lookup.values()))
+        return indices
+
+    def encode_column(self, col, values):
+        """``(indices, block)``: the model columns ``col`` writes and their encoding for each of ``values``."""
+        indices = self.column_indices(col)
+        return indices, self.encode(pd.DataFrame({col: values}))[:, indices]
+
+    def categories(self, col):
+        """Raw values a categorical column can take (one per model category); None for numeric columns."""
+        for name, _, mapping in self.ordinal:
+            if name == col:
+                return list(mapping)
+        for name, lookup, reference in self.one_hot:
+            if name == col:
+                seen = set()
+                values = [value for value, idx in lookup.items() if not (idx in seen or seen.add(idx))]
+                return values + sorted(reference)
+        return None
+
+    def frame(self, X):
+        """Wrap an encoded matrix as a DataFrame for consumers that need feature names."""
+        return pd.DataFrame(X, columns=self.features, copy=False)
+
+    def _report(self, col, uniques, lookup, reference=()):
+        for value in uniques:
+            if value not in lookup and value not in reference and (col, value) not in self._reported:
+                self._reported.add((col, value))
+                logger.warning("Value %r of %r matches no model column and encodes as 0", value, col)
+
+
+def _columns(data):
+    if isinstance(data, pd.DataFrame):
+        return {col: data[col] for col in data.columns}, len(data)
+    if isinstance(data, dict):
+        return {col: [value] for col, value in data.items()}, 1
+    rows = list(data)
+    keys = set().union(*rows) if rows else set()
+    return {col: [row.get(col) for row in rows] for col in keys}, len(rows)
+
+
+def _factorize(values):
+    """Codes into ``uniques`` with missing values pointing one past the end."""
+    if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        uniques = list(values.cat.categories)
+    else:
+        codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        uniques = list(uniques)
+    codes = np.where(codes < 0, len(uniques), codes)
+    return codes, uniques
+
+
+encoder = FeatureEncoder()
+
+
+def preprocess(data):
+    """Encode one input dict or a whole customer frame with the shared encoder."""
+    return encoder.encode(data)
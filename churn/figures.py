@@ -0,0 +1,278 @@
+"""Plotly figure builders shared by the pages.
+
+Distribution charts are drawn from raw rows only while a dataset is small
+(``AGGREGATE_THRESHOLD`` rows); above that they switch to aggregate forms
+built from ``churn.stats``: pre-binned bars, quantile-only boxes and violins
+sampled from a KDE. Line series longer than ``LINE_POINTS`` are downsampled
+with LTTB. Built figures are cached as serialized JSON in a ``FigureCache``
+held per dataset version (``churn.cache.get_figure_cache``) and keyed by the
+caller (typically feature and analysis type), so reruns skip figure
+construction entirely.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
+
+AGGREGATE_THRESHOLD = 5_000
+LINE_POINTS = 1_000
+FIGURE_CACHE_SIZE = 256
+
+COLORS = px.colors.qualitative.Plotly
+
+
+def use_aggregates(n_rows, threshold=None):
+    return n_rows > (AGGREGATE_THRESHOLD if threshold is None else threshold)
+
+
+# ========== Figure Cache ==========
+
+class FigureCache:
+    """Thread-safe LRU of serialized figure JSON."""
+
+    def __init__(self, maxsize=FIGURE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_json(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        payload = build().to_json()
+        with self._lock:
+            self._entries[key] = payload
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return payload
+
+    def get(self, key, build):
+        """The figure for ``key``, building (and serializing) it with ``build()`` only on a cache miss."""
+        return pio.from_json(self.get_json(key, build), skip_invalid=True)
+
+
+# ========== Downsampling ==========
+
+def lttb(x, y, n_out):
+    """Indices of the Largest-Triangle-Three-Buckets downsample of a series to ``n_out`` points."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    bounds = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = bounds[i], bounds[i + 1]
+        next_stop = bounds[i + 2] if i + 2 < len(bounds) else n
+        next_start = stop if i + 2 < len(bounds) else n - 1
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+        area = np.abs((x[previous] - avg_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample_series(df, x, y, color=None, max_points=LINE_POINTS):
+    """Rows of ``df`` kept by LTTB, per ``color`` series, when a series exceeds ``max_points``."""
+    groups = [df] if color is None else [group for _, group in df.groupby(color, sort=False, observed=True)]
+    if all(len(group) <= max_points for group in groups):
+        return df
+    kept = []
+    for group in groups:
+        group = group.sort_values(x)
+        xs = group[x].to_numpy()
+        if np.issubdtype(xs.dtype, np.datetime64):
+            xs = xs.astype('datetime64[ns]').astype(np.int64)
+        kept.append(group.iloc[lttb(xs, group[y].to_numpy(), max_points)])
+    return pd.concat(kept)
+
+
+def line_figure(df, x, y, color=None, max_points=LINE_POINTS, **kwargs):
+    return px.line(downsample_series(df, x, y, color, max_points), x=x, y=y, color=color, **kwargs)
+
+
+# ========== Aggregate Traces ==========
+
+def binned_bars(feature_stats, counts, name=None, color=None, opacity=None):
+    return go.Bar(x=feature_stats.centers, y=counts, width=feature_stats.widths, name=name,
+                  marker_color=color, opacity=opacity)
+
+
+def quantile_box(box, name, color=None, **kwargs):
+    return go.Box(q1=[box['q1']], median=[box['median']], q3=[box['q3']], mean=[box['mean']],
+                  lowerfence=[box['lowerfence']], upperfence=[box['upperfence']],
+                  name=name, marker_color=color, **kwargs)
+
+
+def kde_violin(feature_stats, name, color=None):
+    """A horizontal violin outline drawn from the precomputed KDE samples."""
+    grid, density = feature_stats.kde_grid, feature_stats.kde_density
+    half = density / density.max() / 2
+    return go.Scatter(x=np.concatenate([grid, grid[::-1]]), y=np.concatenate([half, -half[::-1]]),
+                      fill='toself', mode='lines', name=name, line_color=color, hoverinfo='skip')
+
+
+# ========== Dashboard Figures ==========
+
+def histogram_figure(feature, feature_stats, data=None):
+    if data is not None:
+        return px.histogram(data, x=feature, nbins=30, title=f"{feature} Distribution", marginal="violin")
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.02)
+    if feature_stats.kde_grid is not None:
+        fig.add_trace(kde_violin(feature_stats, feature, COLORS[0]), row=1, col=1)
+    else:
+        fig.add_trace(quantile_box(feature_stats.box, feature, COLORS[0], orientation='h'), row=1, col=1)
+    fig.add_trace(binned_bars(feature_stats, feature_stats.counts, color=COLORS[0]), row=2, col=1)
+    fig.update_layout(title=f"{feature} Distribution", showlegend=False, bargap=0)
+    fig.update_yaxes(showticklabels=False, row=1, col=1)
+    fig.update_xaxes(title_text=feature, row=2, col=1)
+    fig.update_yaxes(title_text="count", row=2, col=1)
+    return fig
+
+
+def box_figure(feature, feature_stats, data=None):
+    if data is not None:
+        return px.box(data, y=feature, title=f"{feature} Boxplot")
+    fig = go.Figure(quantile_box(feature_stats.box, feature, COLORS[0]))
+    fig.update_layout(title=f"{feature} Boxplot", yaxis_title=feature)
+    return fig
+
+
+def group_histogram_figure(feature, feature_stats, groups, data=None):
+    if data is not None:
+        return px.histogram(data, x=feature, color='subscription_status', barmode='overlay', opacity=0.7,
+                            title=f"{feature} by Churn")
+    fig = go.Figure([
+        binned_bars(feature_stats, feature_stats.group_counts[group], group, COLORS[i], 0.7)
+        for i, group in enumerate(groups)
+    ])
+    fig.update_layout(title=f"{feature} by Churn", barmode='overlay', bargap=0,
+                      xaxis_title=feature, yaxis_title="count", legend_title_text="subscription_status")
+    return fig
+
+
+def group_box_figure(feature, feature_stats, groups, data=None):
+    if data is not None:
+        return px.box(data, x='subscription_status', y=feature, color='subscription_status',
+                      title=f"{feature} vs Churn Category")
+    fig = go.Figure([
+        quantile_box(feature_stats.group_box[group], group, COLORS[i], x=[group])
+        for i, group in enumerate(groups) if feature_stats.group_box[group] is not None
+    ])
+    fig.update_layout(title=f"{feature} vs Churn Category", xaxis_title="subscription_status",
+                      yaxis_title=feature, legend_title_text="subscription_status")
+    return fig
+
+
+def category_count_figure(feature, feature_stats):
+    counts = feature_stats.value_counts
+    return px.bar(x=counts.index.astype(str), y=counts.to_numpy(), title=f"{feature} Count",
+                  labels={"x": feature, "y": "count"})
+
+
+def category_group_figure(feature, feature_stats):
+    crosstab = feature_stats.crosstab.loc[feature_stats.value_counts.index]
+    fig = go.Figure([
+        go.Bar(x=crosstab.index.astype(str), y=crosstab[group].to_numpy(), name=str(group), marker_color=COLORS[i])
+        for i, group in enumerate(crosstab.columns)
+    ])
+    fig.update_layout(title=f"{feature} vs Churn", barmode='group', xaxis_title=feature,
+                      yaxis_title="count", legend_title_text="subscription_status")
+    return fig
+
+
+# ========== Model Comparison Figures ==========
+
+def tradeoff_figure(summary, champion=None):
+    """Per-row latency against accuracy, one marker per model sized by its in-memory footprint."""
+    size = np.sqrt(summary['memory_bytes'].to_numpy(dtype=np.float64))
+    fig = go.Figure(go.Scatter(
+        x=summary['per_row_us'], y=summary['accuracy'], mode='markers+text',
+        text=[f"{name} ({kind})" for name, kind in zip(summary.index, summary['kind'])], textposition='top center',
+        marker=dict(size=12 + 40 * size / size.max(),
+                    color=[COLORS[1] if name == champion else COLORS[0] for name in summary.index]),
+        customdata=summary['memory_bytes'] / 1024,
+        hovertemplate="%{text}<br>%{x:.2f} µs/row<br>accuracy %{y:.3f}<br>%{customdata:.0f} KiB<extra></extra>",
+    ))
+    fig.update_layout(title="Latency vs Accuracy", xaxis_title="Batch inference (µs per row)",
+                      yaxis_title="Accuracy vs baseline labels", showlegend=False)
+    return fig
+
+
+def agreement_figure(agreement):
+    fig = px.imshow(agreement, text_auto=".3f", zmin=agreement.to_numpy().min(), zmax=1,
+                    color_continuous_scale="Blues", title="Prediction Agreement")
+    fig.update_layout(xaxis_title="", yaxis_title="")
+    return fig
+
+
+# ========== Playground Figures ==========
+
+def sweep_figure(feature, values, proba, current=None):
+    """Churn probability against one swept feature; ``current`` marks the input's own value."""
+    if isinstance(values[0], str):
+        fig = go.Figure(go.Bar(x=list(values), y=proba, marker_color=COLORS[0]))
+    else:
+        fig = go.Figure(go.Scatter(x=values, y=proba, mode='lines', line_color=COLORS[0]))
+    if current is not None and (not isinstance(current, str) or current in list(values)):
+        fig.add_vline(x=current if not isinstance(current, str) else list(values).index(current),
+                      line_dash='dash', line_color=COLORS[1], annotation_text="current")
+    fig.update_layout(title=f"Churn Probability vs {feature}", xaxis_title=feature,
+                      yaxis_title="churn probability", yaxis_range=[0, 1])
+    return fig
+
+
+def sweep_heatmap_figure(feature_x, values_x, feature_y, values_y, proba):
+    fig = px.imshow(proba, x=[str(v) if isinstance(v, str) else v for v in values_x],
+                    y=[str(v) if isinstance(v, str) else v for v in values_y], origin='lower', aspect='auto',
+                    zmin=0, zmax=1, color_continuous_scale="RdYlGn_r",
+                    labels={"x": feature_x, "y": feature_y, "color": "churn probability"},
+                    title=f"Churn Probability over {feature_x} x {feature_y}")
+    return fig
+
+
+def partial_dependence_figure(feature, values, ice, pdp, max_lines=100):
+    """A sample of ICE curves drawn as one trace, with the partial-dependence curve on top."""
+    x = list(values)
+    shown = ice[np.linspace(0, len(ice) - 1, min(max_lines, len(ice))).astype(np.intp)] if len(ice) else ice
+    ice_x = [v for _ in range(len(shown)) for v in x + [None]]
+    ice_y = np.concatenate([np.append(row, np.nan) for row in shown]) if len(shown) else []
+    fig = go.Figure([
+        go.Scatter(x=ice_x, y=ice_y, mode='lines', name=f"ICE ({len(shown)} of {len(ice)} rows)",
+                   line=dict(color='rgba(99, 110, 250, 0.15)', width=1), hoverinfo='skip'),
+        go.Scatter(x=x, y=pdp, mode='lines+markers', name="Partial dependence", line=dict(color=COLORS[1], width=3)),
+    ])
+    fig.update_layout(title=f"Partial Dependence of Churn on {feature}", xaxis_title=feature,
+                      yaxis_title="churn probability", yaxis_range=[0, 1])
+    return fig
+
+
+# ========== Instrumentation Figures ==========
+
+def latency_figure(snapshot, stage="total"):
+    """p50/p95/p99 of ``stage`` per page, in milliseconds, from ``Metrics.snapshot()`` rows."""
+    rows = snapshot[snapshot['stage'] == stage]
+    fig = go.Figure([
+        go.Bar(x=rows['page'], y=rows[q] * 1e3, name=q, marker_color=COLORS[i])
+        for i, q in enumerate(['p50', 'p95', 'p99'])
+    ])
+    fig.update_layout(title=f"Rerun Latency ({stage})", barmode='group', xaxis_title="page",
+                      yaxis_title="ms", legend_title_text="percentile")
+    return fig
+
+
+def latency_histogram_figure(samples, title):
+    fig = px.histogram(x=samples * 1e3, nbins=40, title=title, labels={"x": "ms"})
+    fig.update_layout(yaxis_title="reruns", bargap=0.05)
+    return fig
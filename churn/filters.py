@@ -0,0 +1,107 @@
+"""Bitmap index over the Home page filter columns.
+
+Each filter column is converted to categorical codes once, and every value
+gets a packed bitmap (one bit per row). A filter combination is answered by
+AND-ing the selected bitmaps and returns row positions, never a copied frame.
+"""
+import numpy as np
+import pandas as pd
+
+FILTER_COLUMNS = ['region', 'subscription_type', 'plan_type', 'subscription_status', 'churn_risk']
+ALL = "All"
+
+
+class FilterIndex:
+    def __init__(self, df, columns=FILTER_COLUMNS):
+        self.n_rows = len(df)
+        self.columns = list(columns)
+        self.codes = {}
+        self.categories = {}
+        self.bitmaps = {}
+        for column in self.columns:
+            codes, categories = pd.factorize(df[column], use_na_sentinel=True)
+            self.codes[column] = codes.astype(np.int16 if len(categories) > 127 else np.int8)
+            self.categories[column] = list(categories)
+            self.bitmaps[column] = {
+                value: np.packbits(codes == code) for code, value in enumerate(categories)
+            }
+
+    def copy(self):
+        """An independent index, safe to ``update`` while this one is being read (bitmaps are shared until replaced)."""
+        index = object.__new__(FilterIndex)
+        index.n_rows = self.n_rows
+        index.columns = list(self.columns)
+        index.codes = dict(self.codes)
+        index.categories = dict(self.categories)
+        index.bitmaps = dict(self.bitmaps)
+        return index
+
+    def update(self, df, positions):
+        """Re-index the rows of ``df`` at ``positions`` (changed or appended) without rebuilding the rest."""
+        positions = np.asarray(positions, dtype=np.intp)
+        n_rows = len(df)
+        n_bytes = (n_rows + 7) // 8
+        for column in self.columns:
+            categories = list(self.categories[column])
+            lookup = {value: code for code, value in enumerate(categories)}
+            new_codes = np.empty(len(positions), dtype=np.int64)
+            for i, value in enumerate(df[column].to_numpy()[positions]):
+                if pd.isna(value):
+                    new_codes[i] = -1
+                    continue
+                if value not in lookup:
+                    lookup[value] = len(categories)
+                    categories.append(value)
+                new_codes[i] = lookup[value]
+
+            codes = np.full(n_rows, -1, dtype=np.int16 if len(categories) > 127 else np.int8)
+            codes[:len(self.codes[column])] = self.codes[column]
+            old_codes = codes[positions[positions < len(self.codes[column])]]
+            codes[positions] = new_codes
+
+            bitmaps = {
+                value: bitmap if len(bitmap) == n_bytes else np.concatenate([bitmap, np.zeros(n_bytes - len(bitmap), dtype=np.uint8)])
+                for value, bitmap in self.bitmaps[column].items()
+            }
+            for code in set(old_codes[old_codes >= 0].tolist()) | set(new_codes[new_codes >= 0].tolist()):
+                bitmaps[categories[code]] = np.packbits(codes == code)
+            self.codes[column] = codes
+            self.categories[column] = categories
+            self.bitmaps[column] = bitmaps
+        self.n_rows = n_rows
+        return self
+
+    def options(self, column, sort=True):
+        values = self.categories[column]
+        return sorted(values) if sort else list(values)
+
+    def bitmap(self, selection):
+        """Packed bitmap for a {column: value} selection; None when nothing is filtered."""
+        result = None
+        for column, value in selection.items():
+            if value is None or value == ALL:
+                continue
+            bitmap = self.bitmaps[column].get(value)
+            if bitmap is None:
+                return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+            result = bitmap.copy() if result is None else np.bitwise_and(result, bitmap, out=result)
+        return result
+
+    def positions(self, selection):
+        """Sorted row positions matching every selected value."""
+        bitmap = self.bitmap(selection)
+        if bitmap is None:
+            return np.arange(self.n_rows)
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n_rows))
+
+    def count(self, selection):
+        bitmap = self.bitmap(selection)
+        if bitmap is None:
+            return self.n_rows
+        return int(np.bitwise_count(bitmap).sum())
+
+    def value_counts(self, column, positions=None):
+        """{value: count} of ``column`` over ``positions`` (all rows when None)."""
+        codes = self.codes[column] if positions is None else self.codes[column][positions]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.categories[column]))
+        return dict(zip(self.categories[column], counts.tolist()))
@@ -0,0 +1,192 @@
+"""Fast churn probabilities straight from the model's native booster.
+
+``XGBClassifier.predict_proba`` validates a DataFrame and builds a DMatrix
+on every call, and ``predict`` runs the same inference again for the label.
+A ``Predictor`` extracts the booster once and scores contiguous float32
+matrices with ``inplace_predict``; labels are derived from the probability.
+It keeps two copies of the booster: a single-threaded one for small inputs
+(one customer, a counterfactual level), where spinning up a thread pool
+costs more than it saves, and one using ``batch_threads`` for bulk scoring.
+Models without a booster fall back to their own ``predict_proba``.
+
+Everything that scores goes through ``predictor_for(model)``. Check that it
+matches the pickled model (and optionally export a compiled shared library
+with treelite) with:
+
+    python -m churn.inference [--model model_2] [--export model/model_2.so]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from churn.features import encoder
+from churn.models import DEFAULT_MODEL, get_registry
+
+SINGLE_THREADS = 1
+BATCH_THREADS = int(os.getenv("CHURN_INFERENCE_THREADS", "0")) or os.cpu_count() or 1
+SMALL_BATCH_ROWS = 256
+LABEL_THRESHOLD = 0.5
+PARITY_TOLERANCE = 1e-6
+
+
+def as_matrix(X):
+    """``X`` (an encoded matrix or frame) as a C-contiguous float32 array."""
+    X = X.to_numpy(dtype=np.float32) if hasattr(X, 'to_numpy') else X
+    return np.ascontiguousarray(X, dtype=np.float32).reshape(-1, encoder.n_features)
+
+
+def labels(proba, threshold=LABEL_THRESHOLD):
+    """Class labels the way ``XGBClassifier.predict`` derives them from the positive-class probability."""
+    return (np.asarray(proba) > threshold).astype(np.int8)
+
+
+class Predictor:
+    def __init__(self, model, single_threads=SINGLE_THREADS, batch_threads=BATCH_THREADS, small_batch=SMALL_BATCH_ROWS):
+        self.model = model
+        self.small_batch = small_batch
+        self.native = hasattr(model, 'get_booster')
+        if self.native:
+            booster = model.get_booster()
+            self._single = booster.copy()
+            self._single.set_param({'nthread': single_threads})
+            self._batch = booster.copy()
+            self._batch.set_param({'nthread': batch_threads})
+            try:
+                self._iteration_range = (0, model.best_iteration + 1)
+            except AttributeError:
+                self._iteration_range = (0, 0)
+            self._missing = getattr(model, 'missing', np.nan)
+
+    @property
+    def backend(self):
+        return "booster" if self.native else "sklearn"
+
+    def proba(self, X):
+        """Positive-class probability for every row of an encoded matrix."""
+        X = as_matrix(X)
+        if not self.native:
+            return self.model.predict_proba(encoder.frame(X) if hasattr(self.model, 'feature_names_in_') else X)[:, 1]
+        booster = self._single if len(X) <= self.small_batch else self._batch
+        return booster.inplace_predict(X, iteration_range=self._iteration_range, missing=self._missing)
+
+    def predict(self, X, threshold=LABEL_THRESHOLD):
+        """``(labels, proba)`` from a single inference pass."""
+        proba = self.proba(X)
+        return labels(proba, threshold), proba
+
+
+class CompiledPredictor:
+    """A tree ensemble compiled to a shared library by ``export_compiled``, with the ``Predictor`` interface."""
+
+    backend = "compiled"
+
+    def __init__(self, libpath, threads=BATCH_THREADS):
+        import tl2cgen
+        self._tl2cgen = tl2cgen
+        self._predictor = tl2cgen.Predictor(libpath, nthread=threads)
+
+    def proba(self, X):
+        out = self._predictor.predict(self._tl2cgen.DMatrix(as_matrix(X)))
+        return np.asarray(out, dtype=np.float32).reshape(-1)
+
+    def predict(self, X, threshold=LABEL_THRESHOLD):
+        proba = self.proba(X)
+        return labels(proba, threshold), proba
+
+
+def export_compiled(model, libpath, toolchain="gcc"):
+    """Compile ``model``'s booster into a shared library at ``libpath`` (needs treelite and tl2cgen)."""
+    if not hasattr(model, 'get_booster'):
+        raise ValueError(f"Only boosted tree models can be compiled, not {type(model).__name__}")
+    try:
+        import tl2cgen
+        import treelite
+    except ImportError:
+        raise RuntimeError("Compiling a model needs the optional treelite and tl2cgen packages") from None
+    ensemble = treelite.frontend.from_xgboost(model.get_booster())
+    tl2cgen.export_lib(ensemble, toolchain=toolchain, libpath=libpath, params={'parallel_comp': os.cpu_count() or 1})
+    return libpath
+
+
+_predictors = {}
+_predictors_lock = threading.Lock()
+
+
+def predictor_for(model):
+    """The shared ``Predictor`` of a loaded model object (built on first use)."""
+    entry = _predictors.get(id(model))
+    if entry is None or entry[0] is not model:
+        with _predictors_lock:
+            entry = _predictors.get(id(model))
+            if entry is None or entry[0] is not model:
+                entry = _predictors[id(model)] = (model, Predictor(model))
+    return entry[1]
+
+
+def get_predictor(key=DEFAULT_MODEL):
+    return predictor_for(get_registry().get(key))
+
+
+def best_seconds(fn, repeats):
+    """Fastest of ``repeats`` timed calls of ``fn``, in seconds."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def check_parity(model, X, predictor=None, repeats=20):
+    """Largest probability difference, label agreement and timings of ``predictor`` against the pickled model."""
+    predictor = predictor or Predictor(model)
+    frame = encoder.frame(X)
+    expected = model.predict_proba(frame)[:, 1]
+    proba = predictor.proba(X)
+    single = X[:1]
+
+    def wrapper_single():
+        df = encoder.frame(single)
+        return model.predict(df), model.predict_proba(df)
+
+    return {
+        'backend': predictor.backend,
+        'rows': len(X),
+        'max_abs_diff': float(np.abs(proba.astype(np.float64) - expected).max()) if len(X) else 0.0,
+        'label_agreement': float((labels(proba) == model.predict(frame)).mean()) if len(X) else 1.0,
+        'single_row_wrapper_ms': best_seconds(wrapper_single, repeats) * 1e3,
+        'single_row_ms': best_seconds(lambda: predictor.predict(single), repeats) * 1e3,
+        'batch_wrapper_ms': best_seconds(lambda: model.predict_proba(frame), max(repeats // 4, 1)) * 1e3,
+        'batch_ms': best_seconds(lambda: predictor.proba(X), max(repeats // 4, 1)) * 1e3,
+    }
+
+
+if __name__ == "__main__":
+    from churn.data import load_home_data
+
+    parser = argparse.ArgumentParser(description="Check the fast inference path against the pickled model.")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--rows", type=int, default=None, help="customers to score (all by default)")
+    parser.add_argument("--export", metavar="LIBPATH", help="also compile the model to a shared library and check it")
+    parser.add_argument("--tolerance", type=float, default=PARITY_TOLERANCE)
+    args = parser.parse_args()
+
+    model = get_registry().get(args.model)
+    X = encoder.encode(load_home_data().head(args.rows) if args.rows else load_home_data())
+    predictors = [Predictor(model)]
+    if args.export:
+        predictors.append(CompiledPredictor(export_compiled(model, args.export)))
+    failed = False
+    for predictor in predictors:
+        result = check_parity(model, X, predictor)
+        ok = result['max_abs_diff'] <= args.tolerance and result['label_agreement'] == 1.0
+        failed |= not ok
+        print(f"{args.model} [{result['backend']}] {result['rows']} rows: max |diff| {result['max_abs_diff']:.2e}, "
+              f"labels agree {result['label_agreement']:.2%} -> {'OK' if ok else 'MISMATCH'}")
+        print(f"  single row: {result['single_row_wrapper_ms']:.3f} ms wrapper (predict + predict_proba) -> "
+              f"{result['single_row_ms']:.3f} ms; batch: {result['batch_wrapper_ms']:.2f} ms -> {result['batch_ms']:.2f} ms")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,271 @@
+"""Incremental ingestion of customer deltas keyed by ``customer_id``.
+
+A delta batch (e.g. a CRM export) is typed like the source CSV and compared
+row by row, through a content hash, with the customers already loaded. Only
+new and changed rows are re-scored and re-explained with the default model.
+The customer table, ``scores.parquet`` and ``shap_values.parquet`` are
+merged and rewritten, and inside the app the customer store, filter index,
+aggregate cube and name index are patched in place before the data version
+is bumped.
+
+    python -m churn.ingest delta.csv [delta2.csv ...]
+
+The app also polls ``data/incoming/`` and ingests every CSV moved there
+(write the file elsewhere first, then move it in). Replacing
+``home_data.csv`` itself still triggers a full reload.
+"""
+import glob
+import logging
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from churn.data import DATA_DIR, HOME_DATA_PATH, columnar_path, load_home_data, typed_frame, write_parquet
+from churn.explain import SHAP_PATH, explain_matrix
+from churn.features import MODEL_FEATURES, encoder
+from churn.models import DEFAULT_MODEL, get_registry
+from churn.scoring import SCORES_PATH, attach_scores, is_stale, load_or_build_scores, score_customers, write_scores
+
+logger = logging.getLogger(__name__)
+
+INCOMING_DIR = os.path.join(DATA_DIR, "incoming")
+POLL_INTERVAL = 60.0
+SCORE_COLUMNS = ['churn_score', 'churn_risk', 'churn_prediction']
+
+
+class IngestResult:
+    def __init__(self, added=0, updated=0, unchanged=0, seconds=0.0):
+        self.added = added
+        self.updated = updated
+        self.unchanged = unchanged
+        self.seconds = seconds
+
+    def as_dict(self):
+        return {
+            'added': self.added,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'seconds': self.seconds,
+        }
+
+    def __str__(self):
+        return f"{self.added} added, {self.updated} updated, {self.unchanged} unchanged in {self.seconds:.2f}s"
+
+
+def read_batch(source):
+    """A delta (CSV path or DataFrame) typed like the source data, one row per ``customer_id`` (last wins)."""
+    batch = source if isinstance(source, pd.DataFrame) else pd.read_csv(source)
+    batch = typed_frame(batch.drop(columns=[col for col in SCORE_COLUMNS if col in batch.columns]))
+    return batch.drop_duplicates('customer_id', keep='last').reset_index(drop=True)
+
+
+def row_hashes(df, columns):
+    """One 64-bit content hash per row over ``columns``."""
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def _align(frame, batch):
+    """Give the columns ``frame`` and ``batch`` share identical dtypes, growing categories as needed."""
+    frame = frame.copy(deep=False)
+    batch = batch[[col for col in batch.columns if col in frame.columns]].copy()
+    for col in batch.columns:
+        target = frame[col].dtype
+        if isinstance(target, pd.CategoricalDtype):
+            new = pd.Index(batch[col].dropna().unique()).difference(target.categories)
+            if len(new):
+                frame[col] = frame[col].cat.add_categories(new)
+            batch[col] = batch[col].astype(frame[col].dtype)
+        elif batch[col].dtype != target:
+            try:
+                common = np.promote_types(target, batch[col].dtype)
+            except TypeError:
+                common = np.dtype(object)
+            if common != target:
+                frame[col] = frame[col].astype(common)
+            batch[col] = batch[col].astype(common)
+    return frame, batch
+
+
+def _set_rows(df, positions, column, values):
+    if isinstance(df[column].dtype, pd.CategoricalDtype):
+        new = pd.Index(pd.unique(values)).difference(df[column].cat.categories)
+        if len(new):
+            df[column] = df[column].cat.add_categories(new)
+    df.iloc[positions, df.columns.get_loc(column)] = values
+
+
+class Delta:
+    """What one batch changed: updated positions and their previous rows, appended ids, and new scores/SHAP values."""
+
+    def __init__(self, updated_positions, appended_ids, unchanged, scores=None, shap_values=None, previous_rows=None):
+        self.updated_positions = updated_positions
+        self.previous_rows = previous_rows
+        self.appended_ids = appended_ids
+        self.unchanged = unchanged
+        self.scores = scores
+        self.shap_values = shap_values
+
+
+def apply_batch(frame, batch, model_name=DEFAULT_MODEL, positions=None, explain=True):
+    """Merge ``batch`` into ``frame`` and score/explain only new and changed rows.
+
+    ``positions`` maps ``customer_id`` to row position (e.g. a
+    ``CustomerStore``'s index); it is built from ``frame`` when not given.
+    Returns ``(merged, delta)``, with ``merged`` None when nothing changed.
+    """
+    frame, batch = _align(frame, batch)
+    if positions is None:
+        found = pd.Index(frame['customer_id']).get_indexer(batch['customer_id'])
+    else:
+        found = np.fromiter((positions.get(customer_id, -1) for customer_id in batch['customer_id']),
+                            dtype=np.intp, count=len(batch))
+    existing = found >= 0
+    changed = np.zeros(len(batch), dtype=bool)
+    if existing.any():
+        columns = [col for col in batch.columns if col != 'customer_id']
+        changed[existing] = row_hashes(frame.iloc[found[existing]], columns) != row_hashes(batch[existing], columns)
+    appended = ~existing
+    if not changed.any() and not appended.any():
+        return None, Delta(np.empty(0, dtype=np.intp), [], int(existing.sum()))
+
+    updated_positions = found[changed]
+    previous_rows = frame.iloc[updated_positions].copy()
+    # Without pandas Copy-on-Write a shallow copy writes through to ``frame``, so the written columns are copied
+    merged = frame.copy(deep=False)
+    for col in [col for col in batch.columns if col != 'customer_id'] + ['churn_score', 'churn_risk']:
+        if col in merged.columns:
+            merged[col] = merged[col].copy()
+    for col in batch.columns:
+        if col != 'customer_id':
+            _set_rows(merged, updated_positions, col, batch.loc[changed, col].to_numpy())
+    if appended.any():
+        merged = pd.concat([merged, batch[appended]], ignore_index=True)
+
+    rescored = np.concatenate([updated_positions, np.arange(len(frame), len(merged))])
+    rows = merged.iloc[rescored]
+    scores = score_customers(rows, get_registry().get(model_name))
+    _set_rows(merged, rescored, 'churn_score', scores['churn_score'].to_numpy())
+    _set_rows(merged, rescored, 'churn_risk', scores['churn_risk'].to_numpy())
+    shap_values = explain_matrix(encoder.encode(rows), model_name) if explain else None
+    delta = Delta(updated_positions, batch.loc[appended, 'customer_id'].tolist(), int(existing.sum() - changed.sum()),
+                  scores, shap_values, previous_rows)
+    return merged, delta
+
+
+def _upsert(path, rows):
+    """Replace or append ``rows`` in the Parquet table at ``path`` by ``customer_id``."""
+    table = pd.read_parquet(path)
+    attrs = dict(table.attrs)
+    table = pd.concat([table[~table['customer_id'].isin(rows['customer_id'])], rows], ignore_index=True)
+    table.attrs = attrs
+    return table
+
+
+def persist(merged, delta, data_path=HOME_DATA_PATH, scores_path=SCORES_PATH, shap_path=SHAP_PATH):
+    """Write the merged customer table and upsert the delta's scores and SHAP rows."""
+    write_parquet(typed_frame(merged), columnar_path(data_path))
+    write_scores(_upsert(scores_path, delta.scores), scores_path)
+    if delta.shap_values is not None:
+        rows = pd.DataFrame(delta.shap_values, columns=MODEL_FEATURES)
+        rows.insert(0, 'customer_id', delta.scores['customer_id'].to_numpy())
+        write_parquet(_upsert(shap_path, rows), shap_path)
+
+
+def patch_derived(built, frame, merged, delta):
+    """Copies of the already built Home structures, brought up to date for ``merged`` without rebuilding them.
+
+    The structures in ``built`` are still being read by other sessions, so
+    they are never modified; the service publishes the copies in one swap.
+    """
+    changed = np.concatenate([delta.updated_positions, np.arange(len(frame), len(merged))])
+    derived = {}
+    if 'store' in built:
+        derived['store'] = built['store'].copy().update(merged, delta.appended_ids)
+    if 'filters' in built:
+        derived['filters'] = built['filters'].copy().update(merged, changed)
+    if 'cube' in built:
+        cube = built['cube'].copy()
+        cube.remove(delta.previous_rows)
+        cube.add(merged.iloc[changed])
+        derived['cube'] = cube
+    if 'names' in built:
+        derived['names'] = built['names'].copy().update(merged, changed)
+    return derived
+
+
+def ingest(source, service=None, model_name=DEFAULT_MODEL, data_path=HOME_DATA_PATH):
+    """Ingest one delta; with a ``DataService`` the shared frame and its indexes are updated in place."""
+    started = time.perf_counter()
+    batch = read_batch(source)
+    result = IngestResult()
+    explain = not is_stale(SHAP_PATH, data_path, model_name)
+
+    def update(frame, built):
+        store = built.get('store')
+        merged, delta = apply_batch(frame, batch, model_name, store.positions if store else None, explain)
+        result.unchanged = delta.unchanged
+        if merged is None:
+            return None, None
+        result.added = len(delta.appended_ids)
+        result.updated = len(delta.updated_positions)
+        persist(merged, delta, data_path)
+        return merged, patch_derived(built, frame, merged, delta)
+
+    if service is None:
+        update(attach_scores(load_home_data(data_path), load_or_build_scores()), {})
+    else:
+        service.apply(update)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def ingest_directory(service=None, directory=INCOMING_DIR):
+    """Ingest every CSV in ``directory`` in name order, moving each into ``processed/`` or ``failed/``."""
+    results = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.csv"))):
+        try:
+            result = ingest(path, service)
+            logger.info("Ingested %s: %s", path, result)
+            results.append(result)
+            target = "processed"
+        except Exception:
+            logger.exception("Failed to ingest %s", path)
+            target = "failed"
+        os.makedirs(os.path.join(directory, target), exist_ok=True)
+        os.replace(path, os.path.join(directory, target, os.path.basename(path)))
+    return results
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def watch_incoming(service, directory=INCOMING_DIR, interval=POLL_INTERVAL):
+    """Poll ``directory`` for deltas on a daemon thread (one per process) and ingest them into ``service``."""
+    global _watcher
+
+    def run():
+        while True:
+            if os.path.isdir(directory):
+                ingest_directory(service, directory)
+            time.sleep(interval)
+
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = threading.Thread(target=run, name="ingest-watcher", daemon=True)
+            _watcher.start()
+    return _watcher
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if len(sys.argv) > 1:
+        for source in sys.argv[1:]:
+            print(f"{source}: {ingest(source)}")
+    else:
+        for result in ingest_directory():
+            print(result)
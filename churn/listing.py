@@ -0,0 +1,28 @@
+"""Windowed access to the Home customer list.
+
+The list is an array of row positions (filtered and/or ranked by search);
+only the window under the cursor is ever turned into rows for rendering.
+"""
+import numpy as np
+
+LIST_COLUMNS = ['customer_id', 'full_name', 'customer_age', 'gender', 'region',
+    'subscription_type', 'plan_type', 'subscription_status', 'churn_risk', 'churn_score',
+    'email', 'Phone']
+
+
+def clamp_cursor(cursor, total, size):
+    """Snap a row offset onto a window boundary inside ``[0, total)``."""
+    last = max(0, (total - 1) // size * size)
+    return min(max(0, cursor), last) // size * size
+
+
+def window(positions, cursor, size):
+    """Row positions in the window starting at ``cursor`` and the clamped cursor."""
+    cursor = clamp_cursor(cursor, len(positions), size)
+    return positions[cursor:cursor + size], cursor
+
+
+def window_frame(df, positions, columns=LIST_COLUMNS):
+    """Only the rows and columns the list view renders."""
+    column_idx = [df.columns.get_loc(col) for col in columns if col in df.columns]
+    return df.iloc[np.asarray(positions, dtype=np.intp), column_idx]
@@ -0,0 +1,92 @@
+"""Memoized single-row predictions for the Playground's live mode.
+
+A prediction (label, churn probability and SHAP attributions) depends only on
+the model and the encoded feature vector, so results are kept in a bounded
+LRU cache keyed by the vector's bytes: moving a slider back to a value seen
+before is answered without touching the model. The cache is process-wide
+and shared by every session.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from churn.explain import base_value, explain_matrix
+from churn.features import MODEL_FEATURES
+from churn.inference import get_predictor
+from churn.models import DEFAULT_MODEL
+
+CACHE_SIZE = 1024
+
+
+class Prediction:
+    def __init__(self, label, proba, shap_values, base_value, feature_names, seconds):
+        self.label = label
+        self.proba = proba
+        self.shap_values = shap_values
+        self.base_value = base_value
+        self.feature_names = feature_names
+        self.seconds = seconds
+
+
+class PredictionCache:
+    """Least-recently-used map of (model, encoded vector) -> ``Prediction``.
+
+    ``misses`` counts the predictions that had to be computed and stored.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            prediction = self._items.get(key)
+            if prediction is None:
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return prediction
+
+    def put(self, key, prediction):
+        with self._lock:
+            self._items[key] = prediction
+            self.misses += 1
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = 0
+
+    def as_dict(self):
+        with self._lock:
+            return {'size': len(self._items), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+
+prediction_cache = PredictionCache()
+
+
+def cache_key(x, model_name=DEFAULT_MODEL):
+    return model_name, np.ascontiguousarray(x, dtype=np.float32).tobytes()
+
+
+def predict_row(x, model_name=DEFAULT_MODEL, cache=prediction_cache):
+    """Score and explain the encoded row ``x``, reusing a memoized result when there is one."""
+    key = cache_key(x, model_name)
+    prediction = cache.get(key)
+    if prediction is not None:
+        return prediction
+    started = time.perf_counter()
+    label, proba = get_predictor(model_name).predict(x)
+    values = explain_matrix(x, model_name)[0]
+    prediction = Prediction(int(label[0]), float(proba[0]), values, base_value(model_name), list(MODEL_FEATURES),
+                            time.perf_counter() - started)
+    cache.put(key, prediction)
+    return prediction
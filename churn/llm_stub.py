@@ -0,0 +1,102 @@
+"""Local stub of the OpenAI-compatible chat completions endpoint.
+
+Answers ``POST .../chat/completions`` with a canned report, streamed as
+server-sent events when the request asks for it, so report generation and the
+bulk job can be exercised without a remote LLM. ``--latency`` and
+``--failure-rate`` simulate a slow or flaky endpoint (failures are HTTP 429).
+
+    python -m churn.llm_stub --port 8001 --failure-rate 0.2
+    CHURN_LLM_BASE_URL=http://127.0.0.1:8001/v1 NVIDIA_API_KEY=stub python -m churn.bulk --risk High
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from churn.report import FAKE_REPORT
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    failure_rate = 0.0
+    requests = 0
+    _counter_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self._counter_lock:
+            type(self).requests += 1
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+        time.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            self._send_json(429, {"error": {"message": "rate limited by stub", "type": "rate_limit_error"}})
+            return
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = request.get("model", "stub")
+        if not request.get("stream"):
+            self._send_json(200, {
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": FAKE_REPORT}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        pieces = [{"role": "assistant", "content": ""}] + [{"content": line} for line in FAKE_REPORT.splitlines(keepends=True)]
+        for i, delta in enumerate(pieces + [{}]):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": delta,
+                                                  "finish_reason": "stop" if i == len(pieces) else None}]}
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def make_server(host="127.0.0.1", port=8001, latency=0.0, failure_rate=0.0):
+    handler = type("Handler", (StubHandler,), {"latency": latency, "failure_rate": failure_rate, "requests": 0})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(host="127.0.0.1", port=8001, latency=0.0, failure_rate=0.0):
+    """Start the stub on a daemon thread and return the server (``server_address`` has the bound port)."""
+    server = make_server(host, port, latency, failure_rate)
+    threading.Thread(target=server.serve_forever, name="llm-stub", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a stub OpenAI-compatible chat completions endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before answering")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    args = parser.parse_args()
+    server = make_server(args.host, args.port, args.latency, args.failure_rate)
+    print(f"LLM stub listening on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
@@ -0,0 +1,288 @@
+"""Per-rerun timing spans, latency percentiles and opt-in profiling.
+
+``app.py`` runs every page inside ``rerun(page)``, which times the whole
+rerun; pages time their stages (data, filter, model, SHAP, LLM, plot, ...)
+with ``with span("shap"):``. A ``st.fragment`` rerun does not go through
+``app.py``, so fragments with spans are decorated with ``fragment_rerun(page)``
+to time their own reruns as reruns of their page. Durations are kept per
+(page, stage) as a running count and sum plus a window of the most recent
+samples, from which the Admin page shows p50/p95/p99. ``export_periodically`` writes them in the Prometheus
+text format to ``data/metrics.prom`` for node_exporter's textfile collector.
+
+One rerun of a page can be profiled with cProfile (or pyinstrument, when
+installed) by requesting it on the Admin page or opening the page with
+``?profile=1``.
+"""
+import cProfile
+import functools
+import io
+import logging
+import math
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+from churn.data import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+METRICS_PATH = os.path.join(DATA_DIR, "metrics.prom")
+WINDOW = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+EXPORT_INTERVAL = 15.0
+MAX_PROFILES = 5
+PROFILE_LINES = 40
+TOTAL = "total"
+UNKNOWN_PAGE = "unknown"
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+def available_profilers():
+    try:
+        import pyinstrument  # noqa: F401
+    except ImportError:
+        return ["cprofile"]
+    return list(PROFILERS)
+
+
+class Series:
+    """Running count and sum of one (page, stage) plus its most recent durations."""
+
+    def __init__(self, window=WINDOW):
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        self.samples.append(seconds)
+
+    def quantiles(self, quantiles=QUANTILES):
+        if not self.samples:
+            return [float('nan')] * len(quantiles)
+        return [float(q) for q in np.quantile(np.fromiter(self.samples, dtype=np.float64), quantiles)]
+
+
+class Profile:
+    def __init__(self, page, profiler, seconds, text):
+        self.page = page
+        self.profiler = profiler
+        self.seconds = seconds
+        self.text = text
+        self.created = time.time()
+
+    def as_dict(self):
+        return {
+            'page': self.page,
+            'profiler': self.profiler,
+            'seconds': self.seconds,
+            'created': self.created,
+            'text': self.text,
+        }
+
+
+class _Profiler:
+    """Uniform start/stop around cProfile and pyinstrument for the current thread."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        if kind == "pyinstrument":
+            from pyinstrument import Profiler
+            self._profiler = Profiler(async_mode="disabled")
+        else:
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if self.kind == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if self.kind == "pyinstrument":
+            self._profiler.stop()
+            return self._profiler.output_text(unicode=True, color=False)
+        self._profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+        return out.getvalue()
+
+
+class Metrics:
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.series = {}
+        self.profiles = deque(maxlen=MAX_PROFILES)
+        self.started = time.time()
+        self._requests = {}
+        self._lock = threading.Lock()
+        self._profiling = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def current_page(self):
+        return getattr(self._local, 'page', None)
+
+    def observe(self, page, stage, seconds):
+        with self._lock:
+            series = self.series.get((page, stage))
+            if series is None:
+                series = self.series[(page, stage)] = Series(self.window)
+            series.observe(seconds)
+
+    @contextmanager
+    def span(self, stage):
+        """Time a stage of the page currently rerunning on this thread."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(self.current_page or UNKNOWN_PAGE, stage, time.perf_counter() - start)
+
+    @contextmanager
+    def rerun(self, page, profile=False):
+        """Time a whole page rerun; ``profile`` (or a pending request for ``page``) captures a profile of it."""
+        previous, self._local.page = self.current_page, page
+        kind = self._take_request(page) or ("cprofile" if profile else None)
+        profiler = None
+        if kind and self._profiling.acquire(blocking=False):
+            profiler = _Profiler(kind)
+            profiler.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._local.page = previous
+            self.observe(page, TOTAL, seconds)
+            if profiler is not None:
+                try:
+                    self.profiles.appendleft(Profile(page, kind, seconds, profiler.stop()))
+                finally:
+                    self._profiling.release()
+
+    def request_profile(self, page, profiler="cprofile"):
+        """Profile the next rerun of ``page``."""
+        with self._lock:
+            self._requests[page] = profiler
+
+    def pending_profiles(self):
+        with self._lock:
+            return dict(self._requests)
+
+    def _take_request(self, page):
+        with self._lock:
+            return self._requests.pop(page, None)
+
+    def reset(self):
+        with self._lock:
+            self.series.clear()
+            self.started = time.time()
+
+    def samples(self, page, stage=TOTAL):
+        with self._lock:
+            series = self.series.get((page, stage))
+            return np.fromiter(series.samples, dtype=np.float64) if series else np.empty(0)
+
+    def snapshot(self, quantiles=QUANTILES):
+        """One dict per (page, stage): count, mean, window max and quantiles, in seconds."""
+        rows = []
+        with self._lock:
+            for (page, stage), s in sorted(self.series.items()):
+                row = {'page': page, 'stage': stage, 'count': s.count, 'mean': s.sum / s.count if s.count else float('nan')}
+                for q, value in zip(quantiles, s.quantiles(quantiles)):
+                    row[f"p{round(q * 100):d}"] = value
+                row['max'] = max(s.samples) if s.samples else float('nan')
+                rows.append(row)
+        return rows
+
+    def prometheus_text(self, quantiles=QUANTILES):
+        """All series as a Prometheus summary (quantiles over the recent window, count and sum since start)."""
+        with self._lock:
+            series = sorted(self.series.items())
+            values = [(key, s.count, s.sum, s.quantiles(quantiles)) for key, s in series]
+        lines = [
+            "# HELP churn_page_seconds Duration of Streamlit page reruns (stage=\"total\") and their stages.",
+            "# TYPE churn_page_seconds summary",
+        ]
+        for (page, stage), count, total, measured in values:
+            labels = f'page="{_escape(page)}",stage="{_escape(stage)}"'
+            for q, value in zip(quantiles, measured):
+                lines.append(f'churn_page_seconds{{{labels},quantile="{q:g}"}} {_number(value)}')
+            lines.append(f"churn_page_seconds_sum{{{labels}}} {_number(total)}")
+            lines.append(f"churn_page_seconds_count{{{labels}}} {count}")
+        lines += [
+            "# HELP churn_metrics_start_time_seconds When the metrics were last reset.",
+            "# TYPE churn_metrics_start_time_seconds gauge",
+            f"churn_metrics_start_time_seconds {self.started:.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path=METRICS_PATH):
+        """Write ``prometheus_text()`` to ``path`` atomically."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+        return path
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    return "NaN" if math.isnan(value) else repr(float(value))
+
+
+metrics = Metrics()
+
+
+def span(stage):
+    return metrics.span(stage)
+
+
+def rerun(page, profile=False):
+    return metrics.rerun(page, profile)
+
+
+def fragment_rerun(page):
+    """Decorate a fragment so its reruns are timed as reruns of ``page`` (full reruns already are)."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if metrics.current_page is not None:
+                return fn(*args, **kwargs)
+            with metrics.rerun(page):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def export_periodically(path=METRICS_PATH, interval=EXPORT_INTERVAL):
+    """Rewrite the metrics file every ``interval`` seconds on a daemon thread (one per process)."""
+    global _exporter
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                metrics.write_textfile(path)
+            except OSError:
+                logger.exception("Failed to write %s", path)
+
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = threading.Thread(target=run, name="metrics-exporter", daemon=True)
+            _exporter.start()
+    return _exporter
@@ -0,0 +1,128 @@
+"""Process-wide registry of the pickled models in ``model/``.
+
+Every artifact is unpickled at most once per process and shared by all
+sessions and pages. Models are addressed by name (``"model_2"``) or by
+version (``2`` / ``"2"``).
+"""
+import glob
+import os
+import pickle
+import re
+import threading
+import time
+
+MODEL_DIR = "model"
+DEFAULT_MODEL = "model_2"
+
+_NAME_PATTERN = re.compile(r"model_(\d+)\.pkl$")
+
+
+class LoadedModel:
+    def __init__(self, name, version, path, model, load_seconds, file_bytes, memory_bytes):
+        self.name = name
+        self.version = version
+        self.path = path
+        self.model = model
+        self.kind = type(model).__name__
+        self.load_seconds = load_seconds
+        self.file_bytes = file_bytes
+        self.memory_bytes = memory_bytes
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'version': self.version,
+            'kind': self.kind,
+            'load_seconds': self.load_seconds,
+            'file_bytes': self.file_bytes,
+            'memory_bytes': self.memory_bytes,
+        }
+
+
+class ModelRegistry:
+    def __init__(self, model_dir=MODEL_DIR):
+        self.model_dir = model_dir
+        self._models = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._warm_thread = None
+
+    def available(self):
+        """Map of model name -> (version, path) for every artifact on disk."""
+        found = {}
+        for path in glob.glob(os.path.join(self.model_dir, "model_*.pkl")):
+            match = _NAME_PATTERN.search(path)
+            if match:
+                found[f"model_{match.group(1)}"] = (int(match.group(1)), path)
+        return dict(sorted(found.items(), key=lambda item: item[1][0]))
+
+    def resolve(self, key):
+        name = f"model_{key}" if isinstance(key, int) or str(key).isdigit() else str(key)
+        if name not in self.available():
+            raise KeyError(f"Unknown model {key!r}; available: {list(self.available())}")
+        return name
+
+    def entry(self, key=DEFAULT_MODEL):
+        name = self.resolve(key)
+        loaded = self._models.get(name)
+        if loaded is not None:
+            return loaded
+        with self._lock:
+            name_lock = self._locks.setdefault(name, threading.Lock())
+        with name_lock:
+            if name not in self._models:
+                self._models[name] = self._load(name)
+        return self._models[name]
+
+    def get(self, key=DEFAULT_MODEL):
+        return self.entry(key).model
+
+    def path(self, key=DEFAULT_MODEL):
+        return self.available()[self.resolve(key)][1]
+
+    def loaded(self):
+        return [self._models[name] for name in self.available() if name in self._models]
+
+    def warm(self, keys=None):
+        for key in keys or self.available():
+            self.entry(key)
+
+    def warm_async(self, keys=None):
+        """Load models on a daemon thread; repeated calls reuse the running warm-up."""
+        with self._lock:
+            if self._warm_thread is None:
+                self._warm_thread = threading.Thread(target=self.warm, args=(keys,), name="model-warmup", daemon=True)
+                self._warm_thread.start()
+        return self._warm_thread
+
+    def _load(self, name):
+        version, path = self.available()[name]
+        start = time.perf_counter()
+        with open(path, 'rb') as f:
+            payload = f.read()
+        model = pickle.loads(payload)
+        load_seconds = time.perf_counter() - start
+        return LoadedModel(name, version, path, model, load_seconds, len(payload), _memory_bytes(model))
+
+
+def _memory_bytes(model):
+    """Approximate in-memory size: the serialized size of the fitted state."""
+    if hasattr(model, 'get_booster'):
+        return len(model.get_booster().save_raw())
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
+
+
+def get_model(key=DEFAULT_MODEL):
+    return get_registry().get(key)
@@ -0,0 +1,235 @@
+"""LLM churn report generation: prompt, endpoint, response cache and concurrency limit.
+
+Reports are streamed chunk by chunk so the page can render tokens as they
+arrive, cached by a content hash of everything that determines the answer,
+and at most ``MAX_CONCURRENT_REPORTS`` LLM calls run at once per process.
+``report_builder`` creates the LLM client on the first report and builds the
+prompt only when a report is actually requested, sending just the top-k
+SHAP features and the model-tested interventions as compact JSON.
+Set ``CHURN_LLM=fake`` to swap the remote endpoint for a local fake model.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from churn.counterfactual import interventions_payload
+from churn.data import file_version
+from churn.features import MODEL_FEATURES
+from churn.models import DEFAULT_MODEL, get_registry
+
+PROMPT_VERSION = 3
+TOP_K_FEATURES = 10
+
+LLM_BASE_URL = os.getenv("CHURN_LLM_BASE_URL", "https://integrate.api.nvidia.com/v1")
+LLM_MODEL = os.getenv("CHURN_LLM_MODEL", "qwen/qwen3-235b-a22b")
+
+MAX_CONCURRENT_REPORTS = int(os.getenv("CHURN_LLM_CONCURRENCY", "4"))
+QUEUE_TIMEOUT = 60.0
+CACHE_TTL = 6 * 60 * 60
+CACHE_SIZE = 1024
+
+FAKE_REPORT = """### 👤 Customer Summary
+This is a locally generated placeholder report.
+
+#### 🔍 Churn Drivers
+- Engagement has dropped recently.
+
+#### ✅ Suggested Actions
+- Reach out with a personalised retention offer.
+"""
+
+_llm_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REPORTS)
+
+
+def report_prompt(feature_shap_importance: str, proba: float, customer_row: str, interventions: str = "[]"):
+    system_message = f"""
+                YOU ARE AN MACHINE LEARNING MODEL EXPLAINABILITY EXPERT
+                Here are the details for a  is assisting:
+                    - Dictioary of feature_name, shap_impact and feature_importance for xgboost machine learning model: {feature_shap_importance}
+                    - Models Predicted Churn Probability: {proba}
+                    - Customer Row: {customer_row}
+                    - Interventions tested against the model (smallest sets of changes and the churn probability each leads to): {interventions}
+                Based on this information, explain to the agent in non-technical terms:
+                    1. Provide summary of who the customer is from user context features.
+                    2. Identify the top 3 reasons for the customers potential churn. Provide a brief explanation of why these
+                    features significantly influence the churn prediction. 
+                    3. Suggest the top 3 actions the agent can take to reduce the likelihood of churn, based on the feature impacts. Prefer the tested interventions, which are verified to lower the predicted churn. Each suggestion should include:
+                        - An explanation of why this action is expected to impact churn, based solely on the data provided.
+                Remember :
+                    - The magnitude of a SHAP value indicates the strength of a feature's influence on the prediction.
+                    - Positive SHAP values increase the likelihood of churn; negative values decrease it.
+                    - Feature Importances values adds up to 1, greater the value higher the feature is important in prediction.
+                    - Recommendations should be strictly based on the information provided in the SHAP contributions and customer features.
+                
+                Dont include any technical details like shap scores, probability, feature importance in report, only provide business context.    
+                Keep the report short and concise in 2-3 paragraphs (max 150 words in total).
+                Do not include any other text in the report.
+                Make sure the response is in markdown format with proper use only H3, H4, H5 and emojis.
+            """
+    return system_message
+
+
+def shap_payload(shap_values, importances, features=MODEL_FEATURES, top_k=TOP_K_FEATURES):
+    """Compact JSON of the ``top_k`` features with the largest absolute SHAP impact."""
+    shap_values = np.asarray(shap_values, dtype=np.float32)
+    top = np.argsort(-np.abs(shap_values), kind='stable')[:top_k]
+    payload = {
+        features[i]: {
+            'shap_impact': round(float(shap_values[i]), 4),
+            'feature_importance': round(float(importances[i]), 4),
+        }
+        for i in top
+    }
+    return json.dumps(payload, separators=(',', ':'))
+
+
+def customer_payload(customer):
+    """Compact JSON of a customer's non-missing fields."""
+    fields = {k: v for k, v in dict(customer).items() if v is not None and v == v}
+    return json.dumps(fields, default=str, separators=(',', ':'))
+
+
+def make_llm():
+    """The chat model behind reports; ``CHURN_LLM=fake`` returns a local fake for tests."""
+    if os.getenv("CHURN_LLM") == "fake":
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        return FakeListChatModel(responses=[FAKE_REPORT])
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        openai_api_base=LLM_BASE_URL,
+        openai_api_key=os.getenv("NVIDIA_API_KEY"),
+        model=LLM_MODEL,
+    )
+
+
+def model_version(model_name=DEFAULT_MODEL):
+    entry = get_registry().entry(model_name)
+    return f"{entry.name}:{file_version(entry.path)}"
+
+
+def report_key(customer_features, shap_values, model_version, prompt_version=PROMPT_VERSION, interventions="[]"):
+    """Content hash of everything that determines a report."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(customer_features, sort_keys=True, default=str).encode())
+    digest.update(np.ascontiguousarray(shap_values, dtype=np.float32).tobytes())
+    digest.update(interventions.encode())
+    digest.update(f"{model_version}|{prompt_version}".encode())
+    return digest.hexdigest()
+
+
+class ReportCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, ttl=CACHE_TTL, maxsize=CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+report_cache = ReportCache()
+
+
+def _stream(chain, inputs, key, cache):
+    if not _llm_slots.acquire(timeout=QUEUE_TIMEOUT):
+        yield "⚠️ The report service is busy right now. Please try again in a moment."
+        return
+    try:
+        chunks = []
+        for chunk in chain.stream(inputs):
+            chunks.append(chunk)
+            yield chunk
+    finally:
+        _llm_slots.release()
+    cache.put(key, "".join(chunks))
+
+
+class ReportBuilder:
+    """Builds report prompts on demand and streams them through one LLM client per process."""
+
+    def __init__(self, llm_factory=make_llm, cache=report_cache, top_k=TOP_K_FEATURES):
+        self.llm_factory = llm_factory
+        self.cache = cache
+        self.top_k = top_k
+        self._chain = None
+        self._lock = threading.Lock()
+
+    @property
+    def chain(self):
+        if self._chain is None:
+            with self._lock:
+                if self._chain is None:
+                    from langchain_core.output_parsers import StrOutputParser
+                    self._chain = self.llm_factory() | StrOutputParser()
+        return self._chain
+
+    def messages(self, customer, shap_values, importances, proba, interventions=None):
+        system = report_prompt(
+            shap_payload(shap_values, importances, top_k=self.top_k),
+            round(float(proba), 4),
+            customer_payload(customer),
+            interventions_payload(interventions),
+        )
+        return [("system", system), ("human", "")]
+
+    def stream(self, customer, shap_values, importances, proba, version=None, interventions=None):
+        """Yield report text as it arrives; cached reports are yielded whole.
+
+        A sync generator on purpose: ``st.write_stream`` runs async generators on
+        a fresh event loop per call, which the OpenAI async client's connection
+        pool does not survive.
+        """
+        key = report_key(customer, shap_values, version or model_version(),
+                         interventions=interventions_payload(interventions))
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        messages = self.messages(customer, shap_values, importances, proba, interventions)
+        yield from _stream(self.chain, messages, key, self.cache)
+
+    async def agenerate(self, customer, shap_values, importances, proba, interventions=None):
+        """The whole report in one async call, for batch jobs that run their own event loop.
+
+        Holds one of the process's ``MAX_CONCURRENT_REPORTS`` slots like ``stream``,
+        so a bulk job started from the app shares the limit with the pages.
+        """
+        if not await asyncio.to_thread(_llm_slots.acquire, timeout=QUEUE_TIMEOUT):
+            raise TimeoutError(f"No report slot became free within {QUEUE_TIMEOUT:g}s")
+        try:
+            return await self.chain.ainvoke(self.messages(customer, shap_values, importances, proba, interventions))
+        finally:
+            _llm_slots.release()
+
+
+report_builder = ReportBuilder()
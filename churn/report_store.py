@@ -0,0 +1,105 @@
+"""On-disk store of generated churn reports, shared by the bulk job and the profile page.
+
+One SQLite row per customer holds the latest report (or the last error) along
+with the model and prompt versions it was generated for and a content key of
+the customer's encoded features and SHAP values, so a bulk run can be stopped
+and resumed and the profile page only shows reports that are still current,
+including after an ingest changed the customer.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from churn.data import DATA_DIR
+from churn.report import PROMPT_VERSION, model_version, report_key
+
+REPORTS_PATH = os.path.join(DATA_DIR, "reports.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    customer_id TEXT PRIMARY KEY,
+    model_version TEXT NOT NULL,
+    prompt_version INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    report TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    content_key TEXT
+)
+"""
+
+OK = "ok"
+FAILED = "failed"
+
+
+def content_key(x, shap_values, version=None, prompt_version=PROMPT_VERSION):
+    """``report_key`` of a customer's encoded features and SHAP values: what a stored report must match."""
+    features = np.asarray(x, dtype=np.float32).ravel().tolist()
+    return report_key(features, shap_values, version or model_version(), prompt_version)
+
+
+class ReportStore:
+    def __init__(self, path=REPORTS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            # Stores created before content keys were recorded: their rows never match and get regenerated
+            if 'content_key' not in {row[1] for row in conn.execute("PRAGMA table_info(reports)")}:
+                conn.execute("ALTER TABLE reports ADD COLUMN content_key TEXT")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, customer_id, key, version=None, prompt_version=PROMPT_VERSION):
+        """The stored report for a customer, or None if missing, failed or out of date.
+
+        ``key`` is the customer's current ``content_key``.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT report FROM reports WHERE customer_id = ? AND status = ?"
+                " AND model_version = ? AND prompt_version = ? AND content_key = ?",
+                (customer_id, OK, version or model_version(), prompt_version, key),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def completed(self, keys, version, prompt_version):
+        """The customers in ``keys`` (customer_id -> current ``content_key``) that already have a current report."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT customer_id, content_key FROM reports WHERE status = ? AND model_version = ? AND prompt_version = ?",
+                (OK, version, prompt_version),
+            ).fetchall()
+        done = dict(rows)
+        return {customer_id for customer_id, key in keys.items() if done.get(customer_id) == key}
+
+    def put(self, customer_id, version, prompt_version, report, attempts=1, key=None):
+        self._write(customer_id, version, prompt_version, OK, report, None, attempts, key)
+
+    def fail(self, customer_id, version, prompt_version, error, attempts, key=None):
+        self._write(customer_id, version, prompt_version, FAILED, None, error, attempts, key)
+
+    def _write(self, customer_id, version, prompt_version, status, report, error, attempts, key):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO reports (customer_id, model_version, prompt_version, status, report, error,"
+                " attempts, updated_at, content_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (customer_id, version, prompt_version, status, report, error, attempts, time.time(), key),
+            )
+
+    def counts(self):
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM reports GROUP BY status").fetchall())
@@ -0,0 +1,92 @@
+"""Batch churn scoring for the whole customer table.
+
+Run ``python -m churn.scoring`` to (re)build ``data/scores.parquet``. Pages
+read scores from that file by ``customer_id`` instead of running the model.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from churn.data import DATA_DIR, HOME_DATA_PATH, available_columns, load_home_data, write_parquet
+from churn.features import INPUT_COLUMNS, SCHEMA_VERSION, encoder
+from churn.inference import predictor_for
+from churn.models import DEFAULT_MODEL, get_registry
+
+SCORES_PATH = os.path.join(DATA_DIR, "scores.parquet")
+
+HIGH_RISK_THRESHOLD = 0.7
+MEDIUM_RISK_THRESHOLD = 0.5
+
+
+def churn_risk(proba, subscription_status):
+    """Bucket probabilities the same way ``home_data.csv`` labels ``churn_risk``."""
+    proba = np.asarray(proba)
+    risk = np.select([proba >= HIGH_RISK_THRESHOLD, proba >= MEDIUM_RISK_THRESHOLD], ["High", "Medium"], "Low")
+    return np.where(np.asarray(subscription_status) == "Cancelled", "Churned", risk)
+
+
+def score_customers(df, model):
+    """Score every row of ``df`` with a single call to the model's native predictor."""
+    labels, proba = predictor_for(model).predict(encoder.encode(df))
+    scores = pd.DataFrame({
+        'customer_id': df['customer_id'].to_numpy(),
+        'churn_score': proba,
+        'churn_prediction': labels,
+        'churn_risk': churn_risk(proba, df['subscription_status']),
+    })
+    scores.attrs['schema_version'] = SCHEMA_VERSION
+    return scores
+
+
+def write_scores(scores, path=SCORES_PATH):
+    write_parquet(scores, path)
+
+
+def load_scores(path=SCORES_PATH):
+    return pd.read_parquet(path).set_index('customer_id')
+
+
+def is_stale(path, data_path=HOME_DATA_PATH, model_name=DEFAULT_MODEL):
+    """True when a derived artifact is missing or older than its data, model or feature schema."""
+    if not os.path.exists(path):
+        return True
+    built = os.path.getmtime(path)
+    sources = (data_path, get_registry().path(model_name))
+    if any(os.path.getmtime(source) > built for source in sources):
+        return True
+    return pd.read_parquet(path, columns=[]).attrs.get('schema_version') != SCHEMA_VERSION
+
+
+def scoring_columns(data_path=HOME_DATA_PATH):
+    """Only the columns the encoder and the risk buckets read."""
+    wanted = {'customer_id', 'subscription_status', *INPUT_COLUMNS}
+    return [col for col in available_columns(data_path) if col in wanted]
+
+
+def build_scores(data_path=HOME_DATA_PATH, model_name=DEFAULT_MODEL, path=SCORES_PATH):
+    df = load_home_data(data_path, columns=scoring_columns(data_path))
+    scores = score_customers(df, get_registry().get(model_name))
+    write_scores(scores, path)
+    return scores
+
+
+def load_or_build_scores(path=SCORES_PATH):
+    if is_stale(path):
+        build_scores(path=path)
+    return load_scores(path)
+
+
+def attach_scores(df, scores):
+    """Replace the static ``churn_score``/``churn_risk`` columns with the batch scores."""
+    df = df.drop(columns=['churn_score', 'churn_risk'], errors='ignore')
+    ids = df['customer_id']
+    df['churn_score'] = ids.map(scores['churn_score'])
+    df['churn_risk'] = ids.map(scores['churn_risk'])
+    return df
+
+
+if __name__ == "__main__":
+    scores = build_scores()
+    print(f"Scored {len(scores)} customers -> {SCORES_PATH}")
+    print(scores['churn_risk'].value_counts().to_string())
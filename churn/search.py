@@ -0,0 +1,147 @@
+"""Name search index for the Home page search box.
+
+Names are normalized once (accents stripped, case-folded). Queries of three
+or more characters are answered from a trigram index and verified as
+substrings; shorter queries match the start of a first or last name through
+a sorted token list. Results are ranked: exact name, name prefix, word
+prefix, then any other substring.
+"""
+import heapq
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING = range(4)
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.casefold().split())
+
+
+def _raw_names(df, column):
+    if column in df.columns:
+        return df[column].fillna('')
+    return df['first_name'].fillna('') + ' ' + df['last_name'].fillna('')
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameIndex:
+    def __init__(self, df, column='full_name'):
+        self.column = column
+        self.ids = df['customer_id'].to_numpy()
+        self.names = [normalize(name) for name in _raw_names(df, column)]
+
+        postings = defaultdict(list)
+        tokens = []
+        for position, name in enumerate(self.names):
+            for gram in _trigrams(name):
+                postings[gram].append(position)
+            for token in set(name.split()):
+                tokens.append((token, position))
+        self.postings = {gram: np.asarray(rows, dtype=np.int32) for gram, rows in postings.items()}
+        tokens.sort()
+        self.tokens = [token for token, _ in tokens]
+        self.token_positions = np.asarray([position for _, position in tokens], dtype=np.int32)
+
+    def copy(self):
+        """An independent index, safe to ``update`` while this one is being read (posting arrays are never modified)."""
+        index = object.__new__(NameIndex)
+        index.column = self.column
+        index.ids = self.ids
+        index.names = list(self.names)
+        index.postings = dict(self.postings)
+        index.tokens = self.tokens
+        index.token_positions = self.token_positions
+        return index
+
+    def update(self, df, positions):
+        """Re-index the names of the rows at ``positions`` (changed or appended, in order)."""
+        rows = df.iloc[np.asarray(positions, dtype=np.intp)]
+        removed = set()
+        added = []
+        for position, name in zip(positions, _raw_names(rows, self.column)):
+            position = int(position)
+            name = normalize(name)
+            old = self.names[position] if position < len(self.names) else ''
+            if position < len(self.names) and old == name:
+                continue
+            for gram in _trigrams(old) - _trigrams(name):
+                remaining = self.postings[gram][self.postings[gram] != position]
+                if len(remaining):
+                    self.postings[gram] = remaining
+                else:
+                    del self.postings[gram]
+            for gram in _trigrams(name) - _trigrams(old):
+                current = self.postings.get(gram, np.empty(0, dtype=np.int32))
+                self.postings[gram] = np.insert(current, np.searchsorted(current, position), position)
+            removed.update((token, position) for token in set(old.split()))
+            added.extend((token, position) for token in set(name.split()))
+            if position < len(self.names):
+                self.names[position] = name
+            else:
+                self.names.append(name)
+
+        if removed or added:
+            kept = [pair for pair in zip(self.tokens, self.token_positions.tolist()) if pair not in removed]
+            merged = list(heapq.merge(kept, sorted(added)))
+            self.tokens = [token for token, _ in merged]
+            self.token_positions = np.asarray([position for _, position in merged], dtype=np.int32)
+        self.ids = df['customer_id'].to_numpy()
+        return self
+
+    def _candidates(self, query):
+        if len(query) >= 3:
+            lists = []
+            for gram in _trigrams(query):
+                rows = self.postings.get(gram)
+                if rows is None:
+                    return np.empty(0, dtype=np.int32)
+                lists.append(rows)
+            lists.sort(key=len)
+            candidates = lists[0]
+            for rows in lists[1:]:
+                candidates = np.intersect1d(candidates, rows, assume_unique=True)
+            return np.asarray([p for p in candidates if query in self.names[p]], dtype=np.int32)
+        start = bisect_left(self.tokens, query)
+        stop = bisect_left(self.tokens, query + '\uffff', lo=start)
+        return np.unique(self.token_positions[start:stop])
+
+    def _rank(self, query, position):
+        name = self.names[position]
+        if name == query:
+            return EXACT
+        if name.startswith(query):
+            return PREFIX
+        if any(token.startswith(query) for token in name.split()):
+            return WORD_PREFIX
+        return SUBSTRING
+
+    def search(self, query, within=None, limit=None):
+        """Ranked row positions matching ``query`` and the number of matches before ``limit``.
+
+        ``within`` restricts matches to the given row positions (e.g. the
+        current filter selection).
+        """
+        query = normalize(query)
+        if not query:
+            return np.empty(0, dtype=np.int32), 0
+        candidates = self._candidates(query)
+        if within is not None:
+            candidates = candidates[np.isin(candidates, within, assume_unique=True)]
+        ranks = np.fromiter((self._rank(query, p) for p in candidates), dtype=np.int8, count=len(candidates))
+        order = np.lexsort((candidates, ranks))
+        ranked = candidates[order]
+        total = len(ranked)
+        return (ranked if limit is None else ranked[:limit]), total
+
+    def search_ids(self, query, within=None, limit=None):
+        positions, _ = self.search(query, within, limit)
+        return self.ids[positions]
+
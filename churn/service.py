@@ -0,0 +1,110 @@
+"""Process-wide, read-only access to a dataset and the structures derived from it.
+
+One ``DataService`` per dataset holds a single in-memory frame that every page
+and session shares (created through ``st.cache_resource`` in ``churn.cache``).
+Callers get shallow views; ``app.py`` turns on pandas Copy-on-Write at
+startup, so nothing they do can modify the shared frame. ``version`` changes whenever the frame is replaced, and derived
+structures (indexes, cubes, ...) are rebuilt lazily for the new version.
+"""
+import os
+import threading
+import time
+
+from churn.data import file_version, load_columnar
+
+CHECK_INTERVAL = 1.0
+
+
+class DataService:
+    def __init__(self, path, prepare=None, watch=()):
+        self.path = path
+        self.prepare = prepare
+        self.watch = (path, *watch)
+        self.version = 0
+        self._lock = threading.RLock()
+        self._frame = None
+        self._derived = {}
+        self._source_version = None
+        self._checked_at = 0.0
+        self.refresh(force=True)
+
+    def _current_source_version(self):
+        return tuple(file_version(p) if os.path.exists(p) else None for p in self.watch)
+
+    def refresh(self, force=False):
+        """Reload from disk if the source files changed (or unconditionally with ``force``)."""
+        with self._lock:
+            if not force and self._current_source_version() == self._source_version:
+                return False
+            frame = load_columnar(self.path)
+            if self.prepare is not None:
+                frame = self.prepare(frame)
+            self._set_frame(frame)
+            # Read after prepare(), which may itself (re)write a watched file
+            self._source_version = self._current_source_version()
+            return True
+
+    def refresh_if_changed(self):
+        """Throttled staleness check meant to be called on every rerun."""
+        now = time.monotonic()
+        if now - self._checked_at < CHECK_INTERVAL:
+            return False
+        self._checked_at = now
+        return self.refresh()
+
+    def replace(self, frame, derived=None):
+        """Swap in a new frame produced in-process (e.g. by ingestion) and bump the version.
+
+        ``derived`` holds structures already brought up to date for ``frame``;
+        they are kept for the new version and everything else is rebuilt lazily.
+        """
+        with self._lock:
+            self._set_frame(frame, derived)
+            # The caller has written the watched files this frame reflects
+            self._source_version = self._current_source_version()
+
+    def apply(self, update):
+        """Run ``update(frame, built)`` under the service lock and swap in the ``(frame, derived)`` it returns.
+
+        ``built`` maps the names of derived structures already built for the
+        current version to their values. Other sessions keep reading them until
+        the swap, so ``update`` must return patched copies, never modify them.
+        Returning a ``None`` frame leaves the service unchanged.
+        """
+        with self._lock:
+            built = {name: value for name, (version, value) in self._derived.items() if version == self.version}
+            frame, derived = update(self._frame, built)
+            if frame is not None:
+                self.replace(frame, derived)
+
+    def _set_frame(self, frame, derived=None):
+        # Lock-free readers in derived() only trust entries tagged with the
+        # current version, so the new entries go in before the version moves
+        version = self.version + 1
+        self._derived = {name: (version, value) for name, value in (derived or {}).items()}
+        self._frame = frame
+        self.version = version
+
+    def frame(self, columns=None):
+        """A read-only (Copy-on-Write) view of the shared frame, optionally limited to ``columns``."""
+        frame = self._frame
+        return frame.copy(deep=False) if columns is None else frame[list(columns)]
+
+    def columns(self):
+        return list(self._frame.columns)
+
+    def derived(self, name, builder):
+        """``builder(frame)`` computed once per version and shared by every caller."""
+        entry = self._derived.get(name)
+        if entry is not None and entry[0] == self.version:
+            return entry[1]
+        with self._lock:
+            entry = self._derived.get(name)
+            if entry is None or entry[0] != self.version:
+                entry = self._derived[name] = (self.version, builder(self._frame))
+            return entry[1]
+
+    def set_derived(self, name, value):
+        """Register an already up-to-date derived structure for the current version."""
+        with self._lock:
+            self._derived[name] = (self.version, value)
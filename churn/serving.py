@@ -0,0 +1,288 @@
+"""HTTP scoring service with request micro-batching.
+
+Each request carries one customer (a raw input dict, like a row of
+``home_data.csv``) or a list of them. Each request encodes its own rows,
+with the same encoding the app uses, so a malformed row fails only its
+request. The encoded rows are queued per endpoint, and a single worker
+thread drains the queue into micro-batches of at most ``max_batch_size``
+rows, waiting at most ``max_wait_ms`` for a batch to fill once its first row
+arrived, so that concurrent single-row requests share one model (or SHAP)
+call.
+
+    POST /predict   {"customer_age": 42, ...}  -> {"churn_probability": ..., "churn_prediction": ..., "churn_risk": ...}
+    POST /explain   same body                  -> prediction plus per-feature SHAP values
+    GET  /health
+    GET  /metrics   queue depth, batch sizes and request latency in the Prometheus text format
+
+Connections are kept alive (HTTP/1.1). Start it with ``python server.py``.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from churn.explain import get_explainer
+from churn.features import MODEL_FEATURES, encoder
+from churn.inference import predictor_for
+from churn.metrics import QUANTILES, Series
+from churn.models import DEFAULT_MODEL, get_model
+from churn.scoring import churn_risk
+
+logger = logging.getLogger(__name__)
+
+HOST = "127.0.0.1"
+PORT = 8600
+MAX_BATCH_SIZE = 256
+MAX_WAIT_MS = 2.0
+REQUEST_TIMEOUT = 30.0
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+
+class MicroBatcher:
+    """Coalesce single items submitted from many threads into batches for ``fn`` (a list -> list function)."""
+
+    def __init__(self, fn, name, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.fn = fn
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1e3
+        self.batch_sizes = Series()
+        self.batch_seconds = Series()
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def map(self, items, timeout=REQUEST_TIMEOUT):
+        """Results for ``items``, in order; each item joins whichever batch is being gathered."""
+        futures = [self.submit(item) for item in items]
+        return [future.result(timeout) for future in futures]
+
+    def _gather(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._gather()
+            futures = [future for _, future in batch]
+            start = time.perf_counter()
+            try:
+                results = self.fn([item for item, _ in batch])
+            except Exception as e:
+                logger.exception("%s batch of %d failed", self.name, len(batch))
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            with self._lock:
+                self.batch_sizes.observe(len(batch))
+                self.batch_seconds.observe(time.perf_counter() - start)
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+    def stats(self):
+        with self._lock:
+            sizes, seconds = self.batch_sizes, self.batch_seconds
+            return {
+                'queue_depth': self.queue_depth,
+                'batches': sizes.count,
+                'rows': int(sizes.sum),
+                'mean_batch_size': sizes.sum / sizes.count if sizes.count else 0.0,
+                'batch_size_quantiles': dict(zip(QUANTILES, sizes.quantiles())),
+                'batch_seconds_sum': seconds.sum,
+                'batch_seconds_quantiles': dict(zip(QUANTILES, seconds.quantiles())),
+            }
+
+
+def _stack(items):
+    """The encoded rows and subscription statuses of a batch of ``(x, status)`` items."""
+    return np.stack([x for x, _ in items]), [status for _, status in items]
+
+
+def _predictions(status, labels, proba):
+    risk = churn_risk(proba, status)
+    return [{'churn_probability': float(p), 'churn_prediction': int(label), 'churn_risk': str(r)}
+            for label, p, r in zip(labels, proba, risk)]
+
+
+class ScoringService:
+    """The model, its explainer and one ``MicroBatcher`` per endpoint."""
+
+    def __init__(self, model_name=DEFAULT_MODEL, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.model_name = model_name
+        self.model = get_model(model_name)
+        self.predictor = predictor_for(self.model)
+        self.explainer = get_explainer(model_name)
+        self.base_value = float(np.ravel(self.explainer.expected_value)[0])
+        self.started = time.time()
+        self.requests = {}
+        self._lock = threading.Lock()
+        self.batchers = {
+            'predict': MicroBatcher(self.predict_batch, 'predict', max_batch_size, max_wait_ms),
+            'explain': MicroBatcher(self.explain_batch, 'explain', max_batch_size, max_wait_ms),
+        }
+
+    def predict_batch(self, items):
+        X, status = _stack(items)
+        return _predictions(status, *self.predictor.predict(X))
+
+    def explain_batch(self, items):
+        X, status = _stack(items)
+        values = self.explainer.shap_values(X, check_additivity=False)
+        results = _predictions(status, *self.predictor.predict(X))
+        for result, row_values in zip(results, values):
+            result['base_value'] = self.base_value
+            result['shap_values'] = dict(zip(MODEL_FEATURES, row_values.tolist()))
+        return results
+
+    def handle(self, endpoint, body):
+        rows = body if isinstance(body, list) else [body]
+        if not rows or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("Expected a JSON object or a non-empty list of objects")
+        # Bad values raise here, in the request's own thread, before anything joins a shared batch
+        X = encoder.encode(rows)
+        results = self.batchers[endpoint].map(list(zip(X, (row.get('subscription_status') for row in rows))))
+        return results if isinstance(body, list) else results[0]
+
+    def observe(self, endpoint, status, seconds):
+        with self._lock:
+            series = self.requests.get((endpoint, status))
+            if series is None:
+                series = self.requests[(endpoint, status)] = Series()
+            series.observe(seconds)
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP churn_api_request_seconds Duration of scoring API requests.",
+            "# TYPE churn_api_request_seconds summary",
+        ]
+        with self._lock:
+            requests = [(key, s.count, s.sum, s.quantiles()) for key, s in sorted(self.requests.items())]
+        for (endpoint, status), count, total, measured in requests:
+            labels = f'endpoint="{endpoint}",status="{status}"'
+            for q, value in zip(QUANTILES, measured):
+                lines.append(f'churn_api_request_seconds{{{labels},quantile="{q:g}"}} {_number(value)}')
+            lines.append(f"churn_api_request_seconds_sum{{{labels}}} {_number(total)}")
+            lines.append(f"churn_api_request_seconds_count{{{labels}}} {count}")
+        stats = {name: batcher.stats() for name, batcher in self.batchers.items()}
+        lines += ["# HELP churn_api_queue_depth Rows waiting to join a batch.", "# TYPE churn_api_queue_depth gauge"]
+        lines += [f'churn_api_queue_depth{{endpoint="{name}"}} {s["queue_depth"]}' for name, s in stats.items()]
+        lines += ["# HELP churn_api_batch_size Rows per model call.", "# TYPE churn_api_batch_size summary"]
+        for name, s in stats.items():
+            for q, value in s['batch_size_quantiles'].items():
+                lines.append(f'churn_api_batch_size{{endpoint="{name}",quantile="{q:g}"}} {_number(value)}')
+            lines.append(f'churn_api_batch_size_sum{{endpoint="{name}"}} {s["rows"]}')
+            lines.append(f'churn_api_batch_size_count{{endpoint="{name}"}} {s["batches"]}')
+        lines += ["# HELP churn_api_batch_seconds Duration of model calls.", "# TYPE churn_api_batch_seconds summary"]
+        for name, s in stats.items():
+            for q, value in s['batch_seconds_quantiles'].items():
+                lines.append(f'churn_api_batch_seconds{{endpoint="{name}",quantile="{q:g}"}} {_number(value)}')
+            lines.append(f'churn_api_batch_seconds_sum{{endpoint="{name}"}} {_number(s["batch_seconds_sum"])}')
+            lines.append(f'churn_api_batch_seconds_count{{endpoint="{name}"}} {s["batches"]}')
+        return "\n".join(lines) + "\n"
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'model': self.model_name,
+            'uptime_seconds': time.time() - self.started,
+            'batchers': {name: batcher.stats() for name, batcher in self.batchers.items()},
+        }
+
+
+def _number(value):
+    return "NaN" if np.isnan(value) else repr(float(value))
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Small responses on kept-alive connections would otherwise wait on delayed ACKs
+    disable_nagle_algorithm = True
+    service = None
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, json.dumps(self.service.health(), default=str), "application/json")
+        elif self.path == "/metrics":
+            self._send(200, self.service.prometheus_text(), "text/plain; version=0.0.4")
+        else:
+            self._error(404, f"Unknown path {self.path}")
+
+    def do_POST(self):
+        start = time.perf_counter()
+        endpoint = self.path.strip("/")
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._error(413, "Request body too large")
+            return
+        # Always consume the body so the next request on this connection starts clean
+        payload = self.rfile.read(length)
+        if endpoint not in self.service.batchers:
+            self._error(404, f"Unknown path {self.path}")
+            return
+        status = 200
+        try:
+            body = json.loads(payload)
+            result = self.service.handle(endpoint, body)
+            self._send(status, json.dumps(result), "application/json")
+        except (ValueError, TypeError) as e:
+            status = 400
+            self._error(status, str(e))
+        except Exception as e:
+            status = 500
+            logger.exception("Scoring request failed")
+            self._error(status, str(e))
+        finally:
+            self.service.observe(endpoint, status, time.perf_counter() - start)
+
+    def _send(self, status, text, content_type):
+        payload = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status, message):
+        self._send(status, json.dumps({'error': message}), "application/json")
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class ScoringServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def make_server(host=HOST, port=PORT, service=None):
+    """A threaded HTTP server answering with ``service`` (a default ``ScoringService`` when not given)."""
+    handler = type("Handler", (ScoringHandler,), {'service': service or ScoringService()})
+    return ScoringServer((host, port), handler)
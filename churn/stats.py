@@ -0,0 +1,123 @@
+"""Pre-aggregated statistics behind the dashboard.
+
+``DashboardStats`` summarises every column of a dataset once per data version:
+summary metrics, fixed-bin histograms (overall and per ``subscription_status``),
+box-plot quantiles and category x status crosstabs. The dashboard plots these
+small arrays instead of raw rows, so the figures sent to the browser stay the
+same size however large the dataset grows.
+"""
+import numpy as np
+import pandas as pd
+
+STATUS_COLUMN = 'subscription_status'
+N_BINS = 30
+KDE_BINS = 512
+KDE_POINTS = 100
+
+
+def box_stats(values):
+    """Tukey box statistics: quartiles, mean and whiskers at the furthest points within 1.5 IQR."""
+    if len(values) == 0:
+        return None
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    return {
+        'q1': float(q1),
+        'median': float(median),
+        'q3': float(q3),
+        'lowerfence': float(values[values >= q1 - 1.5 * iqr].min()),
+        'upperfence': float(values[values <= q3 + 1.5 * iqr].max()),
+        'mean': float(values.mean()),
+        'min': float(values.min()),
+        'max': float(values.max()),
+        'count': int(len(values)),
+    }
+
+
+def kde(values, points=KDE_POINTS, bins=KDE_BINS):
+    """Gaussian KDE (Scott's bandwidth) sampled on ``points`` grid points, computed from a fine histogram."""
+    if len(values) < 2 or values.min() == values.max():
+        return None, None
+    bandwidth = values.std(ddof=1) * len(values) ** (-1 / 5)
+    if bandwidth == 0:
+        return None, None
+    counts, edges = np.histogram(values, bins=bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    grid = np.linspace(values.min() - 3 * bandwidth, values.max() + 3 * bandwidth, points)
+    z = (grid[:, None] - centers[None, :]) / bandwidth
+    density = (np.exp(-0.5 * z ** 2) @ counts) / (len(values) * bandwidth * np.sqrt(2 * np.pi))
+    return grid, density
+
+
+class NumericStats:
+    numeric = True
+
+    def __init__(self, values, status, groups, bins=N_BINS):
+        valid = ~np.isnan(values)
+        values, status = values[valid], status[valid]
+        self.count = int(len(values))
+        self.mean = float(values.mean()) if self.count else float('nan')
+        self.median = float(np.median(values)) if self.count else float('nan')
+        self.std = float(values.std(ddof=1)) if self.count > 1 else float('nan')
+        self.edges = np.histogram_bin_edges(values, bins=bins) if self.count else np.array([0.0, 1.0])
+        self.counts = np.histogram(values, bins=self.edges)[0]
+        self.box = box_stats(values)
+        self.kde_grid, self.kde_density = kde(values)
+        self.group_counts = {}
+        self.group_box = {}
+        for code, name in enumerate(groups):
+            group = values[status == code]
+            self.group_counts[name] = np.histogram(group, bins=self.edges)[0]
+            self.group_box[name] = box_stats(group)
+
+    @property
+    def centers(self):
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+    @property
+    def widths(self):
+        return np.diff(self.edges)
+
+
+class CategoricalStats:
+    numeric = False
+
+    def __init__(self, values, status):
+        self.crosstab = pd.crosstab(values, status)
+        self.value_counts = self.crosstab.sum(axis=1).sort_values(ascending=False)
+        self.value_counts = self.value_counts[self.value_counts > 0]
+        self.count = int(values.notna().sum())
+        self.unique = int(len(self.value_counts))
+        self.most_common = self.value_counts.index[0] if self.unique else None
+
+    def churn_rate(self):
+        """Percentage of each category in each status (rows sum to 100)."""
+        counts = self.crosstab.loc[self.value_counts.index]
+        return counts.div(counts.sum(axis=1), axis=0) * 100
+
+
+class DashboardStats:
+    """Per-column statistics of a dataset, computed once and shared by every session."""
+
+    def __init__(self, df, status_column=STATUS_COLUMN, bins=N_BINS):
+        if status_column in df.columns:
+            status = df[status_column].astype('category')
+        else:
+            status = df['churn'].map({0: 'No Churn', 1: 'Churn'}).astype('category')
+        self.groups = list(status.cat.categories)
+        codes = status.cat.codes.to_numpy()
+        self.total = len(df)
+        self.features = {}
+        for col in df.columns:
+            if col in (status_column, 'churn'):
+                continue
+            if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+                self.features[col] = NumericStats(df[col].to_numpy(dtype=np.float64), codes, self.groups, bins)
+            else:
+                self.features[col] = CategoricalStats(df[col], status)
+
+    def __getitem__(self, feature):
+        return self.features[feature]
+
+    def __contains__(self, feature):
+        return feature in self.features
@@ -0,0 +1,47 @@
+"""Customer lookup by ``customer_id`` through a prebuilt hash index."""
+import numpy as np
+
+
+class CustomerStore:
+    def __init__(self, df):
+        self.df = df
+        self.positions = {customer_id: i for i, customer_id in enumerate(df['customer_id'].to_numpy())}
+
+    def __len__(self):
+        return len(self.df)
+
+    def __contains__(self, customer_id):
+        return customer_id in self.positions
+
+    def position(self, customer_id):
+        return self.positions.get(customer_id)
+
+    def get(self, customer_id):
+        """The customer's row as a Series, or None if the id is unknown."""
+        position = self.positions.get(customer_id)
+        return None if position is None else self.df.iloc[position]
+
+    def get_frame(self, customer_id):
+        """The customer's row as a one-row DataFrame (empty if the id is unknown)."""
+        position = self.positions.get(customer_id)
+        return self.df.iloc[[] if position is None else [position]]
+
+    def get_many(self, ids):
+        """Rows for ``ids`` in the order given; unknown ids are skipped."""
+        positions = [self.positions[customer_id] for customer_id in ids if customer_id in self.positions]
+        return self.df.iloc[np.asarray(positions, dtype=np.intp)]
+
+    def copy(self):
+        """An independent store over the same frame, safe to ``update`` while this one is being read."""
+        store = object.__new__(CustomerStore)
+        store.df = self.df
+        store.positions = dict(self.positions)
+        return store
+
+    def update(self, df, appended_ids=()):
+        """Point at ``df``: the same rows (possibly with new values) followed by ``appended_ids``."""
+        start = len(self.df)
+        for offset, customer_id in enumerate(appended_ids):
+            self.positions[customer_id] = start + offset
+        self.df = df
+        return self
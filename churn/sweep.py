@@ -0,0 +1,76 @@
+"""Batched what-if scoring: sensitivity sweeps and partial dependence.
+
+An input is encoded once and every variant only overwrites the model columns
+of the swept feature(s) in a copy of that row, so a grid of thousands of
+variants is scored with a single call to the model's native predictor. Partial-dependence
+and ICE curves apply the same grid to every row of a population sample, in
+chunks of at most ``MAX_BATCH_ROWS`` encoded rows so memory stays bounded
+however many rows and grid points are requested.
+"""
+import numpy as np
+import pandas as pd
+
+from churn.features import NUMERIC_FEATURES, encoder
+from churn.inference import predictor_for
+
+GRID_POINTS = 50
+MAX_BATCH_ROWS = 100_000
+POPULATION_SIZE = 2_000
+
+
+def predict(model, X):
+    """Churn probability for every row of an encoded matrix."""
+    return predictor_for(model).proba(X)
+
+
+def sweep(base, feature, values, model):
+    """Churn probability of ``base`` (a raw input dict) with ``feature`` set to each of ``values``."""
+    indices, block = encoder.encode_column(feature, values)
+    X = np.repeat(encoder.encode(base), len(block), axis=0)
+    X[:, indices] = block
+    return predict(model, X)
+
+
+def sweep_2d(base, feature_x, values_x, feature_y, values_y, model):
+    """``(len(values_y), len(values_x))`` churn probabilities of ``base`` over the grid of both features."""
+    indices_x, block_x = encoder.encode_column(feature_x, values_x)
+    indices_y, block_y = encoder.encode_column(feature_y, values_y)
+    X = np.repeat(encoder.encode(base), len(block_x) * len(block_y), axis=0)
+    X[:, indices_x] = np.tile(block_x, (len(block_y), 1))
+    X[:, indices_y] = np.repeat(block_y, len(block_x), axis=0)
+    return predict(model, X).reshape(len(block_y), len(block_x))
+
+
+def partial_dependence(X, feature, values, model, max_batch_rows=MAX_BATCH_ROWS):
+    """ICE curves (one row per row of the encoded matrix ``X``) and their mean, the partial dependence."""
+    indices, block = encoder.encode_column(feature, values)
+    chunk = max(1, max_batch_rows // len(block))
+    ice = np.empty((len(X), len(block)), dtype=np.float32)
+    for start in range(0, len(X), chunk):
+        rows = X[start:start + chunk]
+        batch = np.repeat(rows, len(block), axis=0)
+        batch[:, indices] = np.tile(block, (len(rows), 1))
+        ice[start:start + len(rows)] = predict(model, batch).reshape(len(rows), len(block))
+    return ice, ice.mean(axis=0)
+
+
+class Population:
+    """An encoded random sample of a dataset and the range of each numeric feature over all of it."""
+
+    def __init__(self, df, size=POPULATION_SIZE, seed=0):
+        sample = df.sample(min(size, len(df)), random_state=seed)
+        self.X = encoder.encode(sample)
+        self.ranges = {}
+        for col in NUMERIC_FEATURES:
+            if col in df.columns:
+                values = df[col]
+                self.ranges[col] = (float(values.min()), float(values.max()), pd.api.types.is_integer_dtype(values))
+
+    def grid(self, feature, points=GRID_POINTS):
+        """Values to sweep ``feature`` over: evenly spaced across its range, or every category."""
+        categories = encoder.categories(feature)
+        if categories is not None:
+            return categories
+        low, high, integer = self.ranges[feature]
+        grid = np.linspace(low, high, points)
+        return np.unique(np.round(grid)) if integer else grid
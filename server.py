@@ -0,0 +1,32 @@
+"""Standalone churn scoring service for the CRM and campaign tooling.
+
+    python server.py --port 8600 --max-batch-size 256 --max-wait-ms 2
+
+See ``churn.serving`` for the endpoints.
+"""
+import argparse
+import logging
+
+from churn.models import DEFAULT_MODEL
+from churn.serving import HOST, MAX_BATCH_SIZE, MAX_WAIT_MS, PORT, ScoringService, make_server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve churn predictions and explanations over HTTP.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE, help="rows per model call")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                        help="how long a batch waits to fill once its first row arrived")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    service = ScoringService(args.model, args.max_batch_size, args.max_wait_ms)
+    server = make_server(args.host, args.port, service)
+    logging.info("Serving %s on http://%s:%d", args.model, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,28 @@
+"""Run the tests against a throwaway copy of the dataset.
+
+``churn`` resolves its data paths when it is imported, so ``CHURN_DATA_DIR``
+is pointed at a temporary copy of the CSVs before any test module imports it.
+The Parquet, score and SHAP files built during the run go there instead of
+into ``data/``.
+"""
+import os
+import shutil
+import tempfile
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "data")
+DATA_FILES = ("home_data.csv", "baseline_model.csv")
+
+_data_dir = None
+
+
+def pytest_configure(config):
+    global _data_dir
+    _data_dir = tempfile.mkdtemp(prefix="churn-tests-")
+    for name in DATA_FILES:
+        shutil.copy(os.path.join(DATA_DIR, name), _data_dir)
+    os.environ["CHURN_DATA_DIR"] = _data_dir
+
+
+def pytest_unconfigure(config):
+    if _data_dir is not None:
+        shutil.rmtree(_data_dir, ignore_errors=True)
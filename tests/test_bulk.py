@@ -0,0 +1,159 @@
+import threading
+
+import httpx
+import openai
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_openai import ChatOpenAI
+
+from churn import bulk, llm_stub, report
+from churn.bulk import BulkReportJob, backoff
+from churn.data import load_home_data
+from churn.report import FAKE_REPORT, ReportBuilder, ReportCache
+from churn.report_store import FAILED, OK, ReportStore
+from churn.scoring import attach_scores, load_or_build_scores
+
+CUSTOMERS = 4
+
+
+@pytest.fixture(scope="module")
+def customers():
+    return attach_scores(load_home_data(), load_or_build_scores()).head(CUSTOMERS)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ReportStore(str(tmp_path / "reports.sqlite"))
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    delays = []
+
+    def record(attempt):
+        delays.append(attempt)
+        return 0.0
+
+    monkeypatch.setattr(bulk, "backoff", record)
+    return delays
+
+
+def fake_builder():
+    return ReportBuilder(llm_factory=lambda: FakeListChatModel(responses=[FAKE_REPORT]), cache=ReportCache())
+
+
+def stub_builder(failure_rate):
+    """Reports from the local stub endpoint; the client's own retries are off so only the job retries."""
+    server = llm_stub.serve(port=0, failure_rate=failure_rate)
+    host, port = server.server_address
+    llm = ChatOpenAI(base_url=f"http://{host}:{port}/v1", api_key="stub", model="stub", max_retries=0)
+    return ReportBuilder(llm_factory=lambda: llm, cache=ReportCache()), server
+
+
+class FailingBuilder:
+    def __init__(self, exc):
+        self.exc = exc
+        self.calls = 0
+
+    async def agenerate(self, *args, **kwargs):
+        self.calls += 1
+        raise self.exc
+
+
+def run_job(customers, store, builder, max_attempts=3):
+    return BulkReportJob(customers, store=store, builder=builder, rate=0, max_attempts=max_attempts).run()
+
+
+def test_backoff_is_capped_full_jitter():
+    for attempt in range(1, 10):
+        delay = backoff(attempt, base=1.0, cap=8.0)
+        assert 0.0 <= delay <= min(8.0, 2 ** (attempt - 1))
+
+
+def test_generates_and_stores_every_report(customers, store):
+    job = run_job(customers, store, fake_builder())
+    assert (job.done, job.skipped, job.failed) == (CUSTOMERS, 0, 0)
+    assert store.counts() == {OK: CUSTOMERS}
+
+
+def test_resume_after_restart_skips_current_reports(customers, store):
+    run_job(customers.head(2), store, fake_builder())
+    # A new job and store object over the same file, as after a process restart
+    job = run_job(customers, ReportStore(store.path), fake_builder())
+    assert (job.done, job.skipped, job.failed) == (CUSTOMERS - 2, 2, 0)
+    job = run_job(customers, ReportStore(store.path), fake_builder())
+    assert (job.done, job.skipped, job.failed) == (0, CUSTOMERS, 0)
+
+
+def test_changed_customer_is_regenerated(customers, store):
+    run_job(customers, store, fake_builder())
+    changed = customers.copy()
+    changed.loc[changed.index[0], 'days_since_last_login'] += 7
+    job = run_job(changed, store, fake_builder())
+    assert (job.done, job.skipped, job.failed) == (1, CUSTOMERS - 1, 0)
+
+
+def test_rate_limited_calls_are_retried_until_attempts_run_out(customers, store, no_backoff):
+    builder, server = stub_builder(failure_rate=1.0)
+    try:
+        job = run_job(customers, store, builder, max_attempts=3)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert (job.done, job.failed) == (0, CUSTOMERS)
+    assert store.counts() == {FAILED: CUSTOMERS}
+    # Two backoffs per customer: after attempts 1 and 2, none after the last
+    assert sorted(no_backoff) == [1] * CUSTOMERS + [2] * CUSTOMERS
+    assert server.RequestHandlerClass.requests == 3 * CUSTOMERS
+
+
+def test_stub_reports_succeed(customers, store):
+    builder, server = stub_builder(failure_rate=0.0)
+    try:
+        job = run_job(customers, store, builder)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert (job.done, job.failed) == (CUSTOMERS, 0)
+
+
+def test_jobs_in_a_row_share_the_builder_without_retries(customers, tmp_path, no_backoff):
+    builder, server = stub_builder(failure_rate=0.0)
+    try:
+        # Separate stores so the second job has to call the LLM again over the pooled connections
+        jobs = [run_job(customers, ReportStore(str(tmp_path / f"reports_{i}.sqlite")), builder, max_attempts=1)
+                for i in range(2)]
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert [(job.done, job.failed) for job in jobs] == [(CUSTOMERS, 0)] * 2
+    assert no_backoff == []
+    assert server.RequestHandlerClass.requests == 2 * CUSTOMERS
+
+
+def test_failed_customers_are_retried_on_the_next_run(customers, store):
+    run_job(customers, store, FailingBuilder(TimeoutError()), max_attempts=2)
+    job = run_job(customers, store, fake_builder())
+    assert (job.done, job.skipped, job.failed) == (CUSTOMERS, 0, 0)
+
+
+def test_reports_wait_for_the_process_wide_llm_slots(customers, store, monkeypatch):
+    # Every slot is taken, e.g. by reports streaming on the pages
+    monkeypatch.setattr(report, "_llm_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(report, "QUEUE_TIMEOUT", 0.01)
+    report._llm_slots.acquire()
+    job = run_job(customers, store, fake_builder(), max_attempts=2)
+    assert (job.done, job.failed) == (0, CUSTOMERS)
+    report._llm_slots.release()
+    job = run_job(customers, store, fake_builder())
+    assert (job.done, job.failed) == (CUSTOMERS, 0)
+
+
+def test_permanent_errors_are_not_retried(customers, store, no_backoff):
+    request = httpx.Request("POST", "http://llm/v1/chat/completions")
+    error = openai.AuthenticationError("bad key", response=httpx.Response(401, request=request), body=None)
+    builder = FailingBuilder(error)
+    job = run_job(customers, store, builder, max_attempts=4)
+    assert (job.done, job.failed) == (0, CUSTOMERS)
+    assert builder.calls == CUSTOMERS
+    assert no_backoff == []
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from churn.data import load_baseline_data, load_home_data
+from churn.features import encoder
+from churn.inference import PARITY_TOLERANCE, Predictor, predictor_for
+from churn.models import get_registry
+
+SINGLE_ROWS = 50
+
+
+@pytest.fixture(scope="module", params=["customers", "baseline"])
+def population(request):
+    df = load_home_data() if request.param == "customers" else load_baseline_data()
+    return encoder.encode(df)
+
+
+@pytest.fixture(scope="module", params=list(get_registry().available()))
+def model(request):
+    return get_registry().get(request.param)
+
+
+def expected(model, X):
+    frame = encoder.frame(X)
+    return model.predict_proba(frame)[:, 1], model.predict(frame)
+
+
+def test_batch_matches_the_pickled_model(model, population):
+    proba, labels = expected(model, population)
+    predictor = Predictor(model)
+    assert len(population) > predictor.small_batch
+    predicted_labels, predicted_proba = predictor.predict(population)
+    np.testing.assert_allclose(predicted_proba, proba, rtol=0, atol=PARITY_TOLERANCE)
+    np.testing.assert_array_equal(predicted_labels, labels)
+
+
+def test_single_rows_match_the_pickled_model(model, population):
+    X = population[:SINGLE_ROWS]
+    proba, labels = expected(model, X)
+    predictor = Predictor(model)
+    rows = [predictor.predict(x) for x in X]
+    np.testing.assert_allclose(np.concatenate([p for _, p in rows]), proba, rtol=0, atol=PARITY_TOLERANCE)
+    np.testing.assert_array_equal(np.concatenate([label for label, _ in rows]), labels)
+
+
+def test_predictor_is_shared_per_model(model):
+    assert predictor_for(model) is predictor_for(model)
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from churn.cube import AggregateCube
+from churn.data import load_home_data
+from churn.filters import FilterIndex
+from churn.ingest import apply_batch, patch_derived
+from churn.scoring import attach_scores, load_or_build_scores
+from churn.search import NameIndex
+from churn.store import CustomerStore
+
+UPDATED = 5
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return attach_scores(load_home_data(), load_or_build_scores())
+
+
+@pytest.fixture
+def batch(frame):
+    """Changed plan types and names for the first rows plus two new customers."""
+    batch = frame.head(UPDATED).drop(columns=['churn_score', 'churn_risk']).astype({'plan_type': object})
+    batch['plan_type'] = batch['plan_type'].map({'Monthly': 'Annual', 'Annual': 'Monthly'})
+    batch.loc[batch.index[0], 'full_name'] = 'Zzyzx Doe'
+    added = batch.head(2).assign(customer_id=['NEW-1', 'NEW-2'])
+    return pd.concat([batch, added], ignore_index=True)
+
+
+def built(frame):
+    return {'store': CustomerStore(frame), 'filters': FilterIndex(frame), 'cube': AggregateCube(frame),
+            'names': NameIndex(frame)}
+
+
+def test_shared_frame_is_never_written(frame, batch):
+    assert not pd.get_option("mode.copy_on_write")
+    before = frame.copy()
+    merged, delta = apply_batch(frame, batch, explain=False)
+    patch_derived(built(frame), frame, merged, delta)
+    assert_frame_equal(frame, before)
+    assert len(merged) == len(frame) + 2
+
+
+def test_patched_structures_match_a_rebuild(frame, batch):
+    structures = built(frame)
+    merged, delta = apply_batch(frame, batch, positions=structures['store'].positions, explain=False)
+    derived = patch_derived(structures, frame, merged, delta)
+    assert dict(derived['cube'].cells) == dict(AggregateCube(merged).cells)
+    for plan in ('Monthly', 'Annual'):
+        selection = {'plan_type': plan}
+        assert derived['cube'].total(selection) == derived['filters'].count(selection) == FilterIndex(merged).count(selection)
+    assert derived['store'].position('NEW-2') == len(merged) - 1
+    assert list(derived['names'].search('zzyzx')[0]) == [0, len(frame)]
+    # The structures other sessions are still reading describe the old frame
+    assert dict(structures['cube'].cells) == dict(AggregateCube(frame).cells)
+    assert 'NEW-1' not in structures['store']